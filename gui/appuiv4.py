@@ -1,23 +1,25 @@
 import gradio as gr
+import asyncio
 import time
 import os
 import json
 import logging
 from datetime import datetime
 from typing import Tuple, List, Dict, Any, Optional
-from threading import Lock
 from pathlib import Path
 
 # Import managers
 from node_manager import NodeManager
-from training_manager import TrainingManager
+from cluster_state import ClusterSnapshot, ClusterStateRefresher
 from health_manager import HealthManager
-from job_manager import Job, JobManager
+from job_manager import Job, JobManager, JobCancelResult
 from task_manager import TaskManager
 from cloudwatch_manager import CloudWatchManager
 from file_manager import FileManager
-
-import threading
+from launch_pipeline import LaunchPipeline, LaunchRequest, LaunchState
+from launch_tracer import render_timeline
+from ddb_cache import DynamoDBReadCache
+from ddb_metrics import StorageMetrics
 
 # Configure logging
 logging.basicConfig(
@@ -34,6 +36,19 @@ def get_login_user(request: gr.Request):
 # Constants
 APP_TITLE = "Hybrid-GPU Training Console"
 DEFAULT_PORT = 7860
+# Seconds between periodic node/job table refreshes of each session
+TABLE_REFRESH_INTERVAL = 30
+
+# Progress bar position while a submission is in each launch state
+LAUNCH_STATE_PROGRESS = {
+    LaunchState.SUBMITTED: 0.1,
+    LaunchState.RESERVING: 0.2,
+    LaunchState.GENERATING_PRECHECK: 0.35,
+    LaunchState.LAUNCHING_PRECHECK: 0.4,
+    LaunchState.GENERATING: 0.5,
+    LaunchState.LAUNCHING: 0.7,
+    LaunchState.RECORDING: 0.8,
+}
 
 # task_manager = TaskManager()
 
@@ -44,11 +59,21 @@ class EnhancedTrainingGUI:
         self.cloudwatch_manager = CloudWatchManager()
         self.task_manager = TaskManager()
         self.node_manager = NodeManager()
-        self.submission_lock = Lock()
-        self.training_manager = None
+        self.launch_pipeline = LaunchPipeline()
+        JobManager.create_job_table_if_not_exists()
+        TaskManager.create_task_table_if_not_exists()
+        JobManager.configure_read_cache()
+        # One background refresher serves the node and job tables of all sessions
+        self.cluster_state = ClusterStateRefresher()
+        self.cluster_state.start()
+        # (snapshot table version, HTML) and row -> <tr> HTML of the last renders
+        self._job_table_html = (None, "")
+        self._node_table_html = (None, "")
+        self._job_row_html: Dict[tuple, str] = {}
+        self._node_row_html: Dict[tuple, str] = {}
         logger.info("EnhancedTrainingGUI initialized")
 
-    def launch_training(self, 
+    async def launch_training(self, 
                       base_job_name: str, 
                       num_nodes: int, 
                       master_port: str, 
@@ -60,158 +85,40 @@ class EnhancedTrainingGUI:
                       container_workdir: str,
                       host_workdir: str,
                       health_check_checkbox: bool,
+                      gpus_per_node: Optional[int] = None,
                       progress=gr.Progress()) -> Tuple[gr.Markdown, List[List[str]]]:
-        if not self.submission_lock.acquire(blocking=False):
-            logger.warning("Another job submission is in progress")
-            return (
-                gr.Markdown("⚠️ Another job submission is in progress. Please wait."),
-                None
-            )
-
         try:
-            logger.info(f"Launching training job: {base_job_name} with {num_nodes} nodes")
-            self.training_manager = TrainingManager()
+            logger.info(f"Launching training job: {base_job_name} with {num_nodes} nodes, "
+                        f"{gpus_per_node or 'all'} GPUs per node")
             progress(0, desc="Initializing...")
-            
-            ui_task_config = {
-                # 'family': family,
-                # 'image': image,
-                'traininghealth_check': health_check_checkbox
-            }
-            
-            progress(0.1, desc="Generating Job ID...")
-            job_id, exec_history_save_dir, job_timestamp = self._generate_job_id(base_job_name)
-            
-            progress(0.2, desc="Assigning nodes...")
-            # all_node_names = self._assign_job_nodes(num_nodes)
-            # master_node_name = self._assign_job_master()
-            # logger.info(f"Assigned master node: {master_node_name}")
-
-            train_job_settings_pack = {
-                'job_id': job_id,
-                'job_timestamp': job_timestamp,
-                'num_nodes': num_nodes,
-                'master_port': master_port,
-                'user_script_path': user_script_path,
-                'exec_history_save_dir': exec_history_save_dir,
-                'health_check_checkbox': health_check_checkbox,
-                # 'ui_task_config': ui_task_config
-            }
-            
-            if health_check_checkbox:
-                progress(0.3, desc="Setting up health check...")
-                # self._setup_health_check([])
-                
-                progress(0.35, desc="Generating health check scripts...")
-                precheck_task_def_path = self.health_manager.generate_precheck_scripts(
-                    num_nodes, exec_history_save_dir, True
-                )
-                
-                precheck_job_id = job_id+'-precheck'
-                progress(0.4, desc="Submit health check Tasks...")
-                precheck_task_ids, orch_node_names, container_inst_ids, precheck_history_file_path = self._run_all_tasks(
-                    precheck_job_id,
-                    job_timestamp,
-                    num_nodes,
-                    precheck_task_def_path,
-                    exec_history_save_dir
-                )
-                
-                progress(0.4, desc="Record HealthCheck Job...")
-                self._record_job(
-                    precheck_task_ids,
-                    num_nodes,
-                    precheck_job_id,
-                    job_timestamp,
-                    orch_node_names,
-                    container_inst_ids,
-                    'PRE_CHECKING'
-                )
 
-                ## Lock all instances for following training
-                self.node_manager.lock_healthcheck_instances(container_inst_ids)
+            # The launch pipeline runs submissions concurrently on its own
+            # event loop; wait here only until this job has been accepted
+            job = self.launch_pipeline.submit(LaunchRequest(
+                base_job_name=base_job_name,
+                num_nodes=int(num_nodes),
+                master_port=master_port,
+                user_script_path=user_script_path,
+                health_check=health_check_checkbox,
+                gpus_per_node=int(gpus_per_node) if gpus_per_node else None
+            ))
+
+            accepted = asyncio.wrap_future(job.accepted)
+            while not accepted.done():
+                progress(LAUNCH_STATE_PROGRESS.get(job.state, 0), desc=f"{job.state.value.replace('_', ' ').capitalize()}...")
+                await asyncio.wait([accepted], timeout=0.5)
+            summary = accepted.result()
 
-                self.node_manager.refresh_all_node_status()
-                
-                results = self._prepare_results(
-                    orch_node_names,
-                    precheck_task_def_path,
-                    precheck_task_ids,
-                    exec_history_save_dir,
-                    precheck_job_id
-                )
-
-
-                ## TODO
-                ## Launch a background thread to polling the healthCheck job/tasks status 
-                #   + submit training
-                #   + record tasks to ddb
-                #   + change job status on ddb existing item 
-
-                training_job_thread = threading.Thread(
-                    target = self._background_launch_training_job_after_precheck,
-                    kwargs={'job_id': job_id,
-                            'precheck_job_id': precheck_job_id,
-                            'precheck_task_ids': precheck_task_ids,
-                            'container_inst_ids': container_inst_ids,
-                            'train_job_settings_pack': train_job_settings_pack
-                            }
-                )
-
-                training_job_thread.start()
-
-                
-                node_data = self.node_manager.get_node_status_display()
-                progress(1.0, desc="Complete!")
-                return (
-                    gr.Markdown("\n".join(results)),
-                    node_data
-                )
-
-
-            progress(0.5, desc="Generating task definitions...")
-            task_def_path = self._generate_nodes_script(
-                num_nodes,
-                master_port,
-                user_script_path,
-                exec_history_save_dir,
-                ui_task_config
-            )
-            
-            progress(0.7, desc="Launching training tasks...")
-            training_task_ids, orch_node_names, container_inst_ids, history_file_path = self._run_all_tasks(
-                job_id,
-                job_timestamp,
-                num_nodes,
-                task_def_path,
-                exec_history_save_dir
-            )
-
-            progress(0.8, desc="Record whole training job to DDB...")
-            self._record_job(
-                    training_task_ids,
-                    num_nodes,
-                    job_id,
-                    job_timestamp,
-                    orch_node_names,
-                    container_inst_ids,
-                    'IN_PROGRESS'
-                )
-            
-            progress(0.9, desc="Refreshing node status...")
-            self.node_manager.refresh_all_node_status()
-            
             results = self._prepare_results(
-                orch_node_names,
-                task_def_path,
-                training_task_ids,
-                history_file_path,
-                job_id
+                summary['node_names'],
+                summary['task_def_path'],
+                summary['task_ids'],
+                summary['history_file_path'],
+                summary['job_id']
             )
-            
-            node_data = self.node_manager.get_node_status_display()
 
-            #job_data = self.refresh_job_status()
+            snapshot = await asyncio.to_thread(self.cluster_state.request_refresh)
+            node_data = [list(row) for row in snapshot.node_rows]
             
             progress(1.0, desc="Complete!")
             return (
@@ -225,180 +132,6 @@ class EnhancedTrainingGUI:
                 gr.Markdown(f"⚠️ Error: {str(e)}"),
                 None
             )
-        finally:
-            self.submission_lock.release()
-
-
-
-    def _background_launch_training_job_after_precheck(self, job_id, precheck_job_id, precheck_task_ids, container_inst_ids, train_job_settings_pack):
-        retry_interval=10
-        retry_times=60
-        timeout = retry_interval*retry_times
-
-        succeed_healthcheck_tasks = []
-        for i in range(retry_times):
-            print(f"Background polling Pre-HealthChecking Status {i} times.")
-
-            for taskid in precheck_task_ids:
-
-                if taskid in succeed_healthcheck_tasks:
-                    continue
-
-                taskstatus = TaskManager.check_task_stop_status(taskid)
-                if taskstatus == 'FAIL':
-                    ## TODO keep locking healthcheck failed instance
-                    self.node_manager.clear_healthcheck_instances()
-
-                    JobManager.update_job_status(precheck_job_id, 'PRE_CHECKING_FAIL')
-
-                    print(f"Find Pre Health Check Failed on task - {taskid}. Stop Launching Training Job.")
-                    return 
-
-                elif taskstatus == 'RUNNING':
-                    continue
-                elif taskstatus == 'SUCCESS':
-                    succeed_healthcheck_tasks.append(taskid)
-
-            if len(set(succeed_healthcheck_tasks)) == len(precheck_task_ids):
-                ## TODO
-                ## call ecs start-tasks provided with container instance ids
-                
-                task_def_path = self._generate_nodes_script(
-                    train_job_settings_pack['num_nodes'],
-                    train_job_settings_pack['master_port'],
-                    train_job_settings_pack['user_script_path'],
-                    train_job_settings_pack['exec_history_save_dir'],
-                    train_job_settings_pack['health_check_checkbox']
-                )
-                
-                training_task_ids, orch_node_names, container_inst_ids, history_file_path = self._run_all_tasks(
-                    job_id,
-                    train_job_settings_pack['job_timestamp'],
-                    train_job_settings_pack['num_nodes'],
-                    task_def_path,
-                    train_job_settings_pack['exec_history_save_dir'],
-                    container_inst_ids
-                )
-                
-                ## Change health check job to Done
-                JobManager.update_job_status(precheck_job_id, 'PRE_CHECKING_DONE')
-                ## Add training JOB IN_PROGRESS
-                JobManager.gather_task_and_record_job(job_id, 
-                                                      train_job_settings_pack['job_timestamp'],
-                                                      train_job_settings_pack['num_nodes'], 
-                                                      orch_node_names, 
-                                                      container_inst_ids, 
-                                                      training_task_ids, 
-                                                      "IN_PROGRESS")
-
-
-                ## Unlock instances after task launched for re-assign
-                self.node_manager.unlock_healthcheck_instances(container_inst_ids)
-                
-                self.node_manager.refresh_all_node_status()
-
-                return 
-
-            time.sleep(retry_interval)
-        return
-
-
-    def _generate_job_id(self, base_job_name: str) -> Tuple[str, str, str]:
-        try:
-            return self.training_manager.generate_job_id(base_job_name)
-        except Exception as e:
-            logger.error(f"Error generating job ID: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Failed to generate job ID: {str(e)}")
-
-    def _assign_job_nodes(self, num_nodes: int) -> List[str]:
-        try:
-            return self.training_manager.assign_job_nodes(num_nodes)
-        except Exception as e:
-            logger.error(f"Error assigning job nodes: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Failed to assign job nodes: {str(e)}")
-
-    def _assign_job_master(self) -> List[str]:
-        try:
-            return self.training_manager.assign_master_node()
-        except Exception as e:
-            logger.error(f"Error assigning job nodes: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Failed to assign job nodes: {str(e)}")
-
-    
-    def _setup_health_check(self, node_names: List[str]) -> None:
-        try:
-            self.health_manager.setup_connectivity_host_file(node_names)
-        except Exception as e:
-            logger.error(f"Error setting up health check: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Failed to setup health check: {str(e)}")
-
-
-    def _generate_nodes_script(self, 
-                             num_nodes: int,
-                             master_port: str,
-                             user_script_path: str,
-                             exec_history_save_dir: str,
-                             is_health_check: bool,
-                            #  ui_task_config: Dict[str, Any]
-                             ) -> List[str]:
-        try:
-            return self.training_manager.generate_nodes_script(
-                num_nodes,
-                master_port,
-                user_script_path,
-                exec_history_save_dir,
-                # ui_task_config
-                is_health_check
-            )
-
-        except Exception as e:
-            logger.error(f"Error generating node scripts: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Failed to generate node scripts: {str(e)}")
-
-
-    def _run_all_tasks(self,
-                     job_id: str,
-                     job_timestamp: str,
-                     num_nodes: int,
-                     task_def_path: str,
-                     exec_history_save_dir: str,
-                     container_inst_ids: List[str] = None
-                     ) -> Tuple[List[str], str]:
-        try:
-            return TaskManager.register_task_and_run_all(
-                job_id,
-                job_timestamp,
-                num_nodes,
-                task_def_path,
-                exec_history_save_dir,
-                container_inst_ids
-            )
-        except Exception as e:
-            logger.error(f"Error running tasks: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Failed to run tasks: {str(e)}")
-
-
-    def _record_job(self,
-        ecs_task_ids,
-        num_nodes,
-        job_id,
-        job_timestamp,
-        orch_node_names,
-        container_inst_ids,
-        JOB_STATUS
-    ):
-        try:
-            # ## if Each node is assigned a task, write to job
-            if len(ecs_task_ids) == num_nodes:
-                JobManager.gather_task_and_record_job(
-                    job_id, job_timestamp, num_nodes, orch_node_names, container_inst_ids, ecs_task_ids, JOB_STATUS
-                )
-            else:
-                logger.error(f"Tasks belongs to the job do not completely submitted")
-        except Exception as e:
-            logger.error(f"Error recording job: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Failed to record job: {str(e)}")
-
 
     def _prepare_results(self,
                        node_names: List[str],
@@ -449,26 +182,73 @@ class EnhancedTrainingGUI:
             logger.error(f"Error launching health check: {str(e)}", exc_info=True)
             return f"⚠️ Error: {str(e)}", []
 
-    def refresh_job_status(self) -> List[List[str]]:
+    def get_cluster_snapshot(self, force: bool = False) -> ClusterSnapshot:
+        """
+        Shared cluster snapshot; force rebuilds it from ECS and DynamoDB
+        (coalesced with concurrent requests) instead of reading the latest one.
+        """
+        snapshot = self.cluster_state.get_snapshot()
+        if force or not snapshot.taken_at:
+            snapshot = self.cluster_state.request_refresh()
+        return snapshot
+
+    def refresh_job_status(self, force: bool = False) -> List[List[str]]:
+        return self._job_status_with_version(force)[1]
+
+    def refresh_node_status(self, force: bool = False) -> List[List[str]]:
+        return self._node_status_with_version(force)[1]
+
+    def _job_status_with_version(self, force: bool = False) -> Tuple[Optional[int], List[List[str]]]:
+        """Job rows of the shared snapshot and their job_version, None for error rows"""
         try:
-            return JobManager.get_jobs_data()
+            snapshot = self.get_cluster_snapshot(force)
+            if snapshot.job_error and not snapshot.job_rows:
+                raise RuntimeError(snapshot.job_error)
+            return snapshot.job_version, snapshot.job_rows
         except Exception as e:
             logger.error(f"Error refreshing job status: {str(e)}", exc_info=True)
-            return [["Error", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), f"Error: {str(e)}", "", ""]]
+            return None, [["Error", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), f"Error: {str(e)}", "", ""]]
 
-    def refresh_node_status(self) -> List[List[str]]:
+    def _node_status_with_version(self, force: bool = False) -> Tuple[Optional[int], List[List[str]]]:
+        """Node rows of the shared snapshot and their node_version, None for error rows"""
         try:
-            self.node_manager.refresh_all_node_status()
-            return self.node_manager.get_node_status_display()
+            snapshot = self.get_cluster_snapshot(force)
+            if snapshot.node_error and not snapshot.node_rows:
+                raise RuntimeError(snapshot.node_error)
+            return snapshot.node_version, snapshot.node_rows
         except Exception as e:
             logger.error(f"Error refreshing node status: {str(e)}", exc_info=True)
-            return [["Error", "", "", f"Error: {str(e)}"]]
+            return None, [["Error", "", "", f"Error: {str(e)}"]]
+
+    def render_job_table(self, force: bool = False) -> Tuple[Optional[int], str]:
+        """
+        Job table HTML of the shared snapshot with its job_version. The HTML is
+        rendered once per version and reused by every session.
+        """
+        version, rows = self._job_status_with_version(force)
+        cached = self._job_table_html
+        if version is not None and cached[0] == version:
+            return cached
+        table_html = self._create_job_table(rows)
+        if version is not None:
+            self._job_table_html = (version, table_html)
+        return version, table_html
+
+    def render_node_table(self, force: bool = False) -> Tuple[Optional[int], str]:
+        """Node table HTML of the shared snapshot with its node_version, see render_job_table"""
+        version, rows = self._node_status_with_version(force)
+        cached = self._node_table_html
+        if version is not None and cached[0] == version:
+            return cached
+        table_html = self._create_node_table(rows)
+        if version is not None:
+            self._node_table_html = (version, table_html)
+        return version, table_html
 
     def release_all_nodes(self) -> List[List[str]]:
         try:
             self.node_manager.release_all_node_names()
-            self.node_manager.refresh_all_node_status()
-            return self.node_manager.get_node_status_display()
+            return self.refresh_node_status(force=True)
         except Exception as e:
             logger.error(f"Error releasing nodes: {str(e)}", exc_info=True)
             return [["Error", "", "", f"Error: {str(e)}"]]
@@ -487,9 +267,104 @@ class EnhancedTrainingGUI:
             logger.error(f"Error viewing task logs: {str(e)}", exc_info=True)
             return "", f"Error fetching logs: {str(e)}"
 
+    def view_storage_metrics(self) -> str:
+        try:
+            def _ms(value):
+                return "N/A" if value is None else f"{value:g}"
+
+            lines = [
+                "| Table | Operation | Calls | Errors | Capacity Units | Mean ms | p50 ms | p95 ms | p99 ms |",
+                "|---|---|---|---|---|---|---|---|---|"
+            ]
+            for row in StorageMetrics.snapshot():
+                lines.append(
+                    f"| {row['table']} | {row['operation']} | {row['calls']} | {row['errors']} | "
+                    f"{row['capacity_units']:g} | {_ms(row['mean_ms'])} | {_ms(row['p50_ms'])} | "
+                    f"{_ms(row['p95_ms'])} | {_ms(row['p99_ms'])} |"
+                )
+
+            cache_stats = DynamoDBReadCache.get_stats()
+            status_metrics = JobManager.get_status_write_metrics()
+            lines += [
+                "",
+                f"**Read cache**: {cache_stats['entries']} entries, "
+                f"{cache_stats['hits']} hits, {cache_stats['misses']} misses",
+                "",
+                f"**Job status writes**: {status_metrics.get('writes', 0)} writes, "
+                f"{status_metrics.get('coalesced', 0)} coalesced, "
+                f"{status_metrics.get('pending', 0)} pending",
+                "",
+                "_Latency percentiles are histogram bucket upper bounds. "
+                "Capacity units are only reported by the DynamoDB backend._"
+            ]
+            return "\n".join(lines)
+
+        except Exception as e:
+            logger.error(f"Error viewing storage metrics: {str(e)}", exc_info=True)
+            return f"Error fetching storage metrics: {str(e)}"
+
+    def view_launch_timeline(self, job_id: str) -> str:
+        try:
+            if not job_id or not job_id.strip():
+                return "No job ID provided"
+            job_id = job_id.strip()
+
+            # Jobs submitted in this process, then the job record
+            timeline = self.launch_pipeline.get_launch_timeline(job_id) \
+                or JobManager.get_launch_timeline(job_id)
+            if not timeline:
+                return f"No launch timeline recorded for job {job_id}"
+            return render_timeline(timeline)
+
+        except Exception as e:
+            logger.error(f"Error viewing launch timeline: {str(e)}", exc_info=True)
+            return f"Error fetching launch timeline: {str(e)}"
+
+    def format_cancel_result(self, result: JobCancelResult) -> str:
+        stopped = sum(1 for task in result.tasks if task.stop_requested)
+        lines = [
+            f"**Job {result.job_id}**: stop requested for {stopped} of {len(result.tasks)} tasks "
+            f"in {result.elapsed_seconds:.2f}s",
+            ""
+        ]
+        if result.all_stopped is not None:
+            lines += [
+                "✅ All stopped tasks reported STOPPED" if result.all_stopped
+                else "⚠️ Some tasks did not report STOPPED before the timeout",
+                ""
+            ]
+
+        lines += [
+            "| Task ID | Node | Was Running | Stop Requested | Last Status | Error |",
+            "|---|---|---|---|---|---|"
+        ]
+        for task in result.tasks:
+            lines.append(
+                f"| {task.task_id} | {task.node_name} | {task.was_running} | {task.stop_requested} | "
+                f"{task.last_status or 'N/A'} | {task.error or ''} |"
+            )
+        return "\n".join(lines)
+
     def _get_env_var(self, var_name: str, default: str = "") -> str:
         return os.environ.get(var_name, default)
 
+    @staticmethod
+    def _render_rows(data: List[List[str]], row_cache: Dict[tuple, str]) -> str:
+        """<tr> HTML of each row, rendering only rows not in the last render"""
+        rendered = {}
+        for row in data:
+            row = tuple(row)
+            if row not in rendered:
+                rendered[row] = row_cache.get(row) or (
+                    '\n                <tr class="selectable-row">\n'
+                    + ''.join(f"                    <td>{cell}</td>\n" for cell in row)
+                    + '                </tr>'
+                )
+        # Keep only the rows of this render
+        row_cache.clear()
+        row_cache.update(rendered)
+        return '\n'.join(rendered[tuple(row)] for row in data)
+
     def _create_job_table(self, data: List[List[str]]) -> str:
         table_html = """
         <div class="interactive-table">
@@ -506,17 +381,8 @@ class EnhancedTrainingGUI:
                 <tbody>
         """
         
-        for row in data:
-            table_html += f"""
-                <tr class="selectable-row">
-                    <td>{row[0]}</td>
-                    <td>{row[1]}</td>
-                    <td>{row[2]}</td>
-                    <td>{row[3]}</td>
-                    <td>{row[4]}</td>
-                </tr>
-            """
-            
+        table_html += self._render_rows(data, self._job_row_html)
+
         table_html += """
                 </tbody>
             </table>
@@ -539,16 +405,8 @@ class EnhancedTrainingGUI:
                 <tbody>
         """
         
-        for row in data:
-            table_html += f"""
-                <tr class="selectable-row">
-                    <td>{row[0]}</td>
-                    <td>{row[1]}</td>
-                    <td>{row[2]}</td>
-                    <td>{row[3]}</td>
-                </tr>
-            """
-            
+        table_html += self._render_rows(data, self._node_row_html)
+
         table_html += """
                 </tbody>
             </table>
@@ -652,8 +510,11 @@ class UIBuilder:
                             node_status = gr.HTML(
                                 label="Node Status Overview",
                                 value=self._get_initial_node_table,
-                                every=30
+                                every=self._value_refresh_interval()
                             )
+                            # node_version of the table this session shows
+                            node_table_version = gr.State(None)
+                            self._add_periodic_table_refresh(self._refresh_node_table, node_status, node_table_version)
 
         # Connect event handlers
         self._connect_training_tab_events(
@@ -663,13 +524,15 @@ class UIBuilder:
             task_configs,
             output_log,
             node_status,
+            node_table_version,
             refresh_node_btn,
             node_assignment_tab
         )
 
         return {
             "output_log": output_log,
-            "node_status": node_status
+            "node_status": node_status,
+            "node_table_version": node_table_version
         }
 
     def _build_training_configs_group(self):
@@ -689,11 +552,20 @@ class UIBuilder:
                 info="Number of nodes to use for distributed training",
                 container=False
             )
+            gpus_per_node = gr.Number(
+                minimum=1,
+                precision=0,
+                label="GPUs per Node",
+                value=None,
+                info="Empty uses the training container definition's GPUs; jobs using part of a node "
+                     "share it when their master port ranges do not overlap",
+                container=False
+            )
             master_port = gr.Textbox(
                 label="Master Port",
                 placeholder="10000",
                 value="10000",
-                info="An exclusive port number for inter-node communication",
+                info="Port for inter-node communication; the job also binds the port after it on each node",
                 container=False
             )
             health_check_checkbox = gr.Checkbox(
@@ -705,6 +577,7 @@ class UIBuilder:
         return {
             "base_job_name": base_job_name,
             "num_nodes": num_nodes,
+            "gpus_per_node": gpus_per_node,
             "master_port": master_port,
             "health_check_checkbox": health_check_checkbox
         }
@@ -800,8 +673,27 @@ class UIBuilder:
         }
 
     def _get_initial_node_table(self):
-        data = self.gui.refresh_node_status()
-        return self.gui._create_node_table(data)
+        return self.gui.render_node_table()[1]
+
+    @staticmethod
+    def _value_refresh_interval():
+        # Without gr.Timer, fall back to re-sending the whole table periodically
+        return None if hasattr(gr, 'Timer') else TABLE_REFRESH_INTERVAL
+
+    def _add_periodic_table_refresh(self, fn, table, version_state):
+        if hasattr(gr, 'Timer'):
+            gr.Timer(TABLE_REFRESH_INTERVAL).tick(
+                fn=fn,
+                inputs=[version_state],
+                outputs=[table, version_state]
+            )
+
+    @staticmethod
+    def _table_update(version: Optional[int], table_html: str, shown_version: Optional[int]):
+        """Send no payload when the session already shows this table version"""
+        if version is not None and version == shown_version:
+            return gr.update(), shown_version
+        return table_html, version
 
     def _connect_training_tab_events(self, 
                                    launch_btn, 
@@ -810,11 +702,14 @@ class UIBuilder:
                                    task_configs,
                                    output_log,
                                    node_status,
+                                   node_table_version,
                                    refresh_node_btn,
                                    node_assignment_tab):
         # Launch button click event
         launch_btn.click(
             fn=self.gui.launch_training,
+            # Submissions don't serialize on the handler, the launch pipeline bounds AWS calls
+            concurrency_limit=None,
             inputs=[
                 training_configs["base_job_name"],
                 training_configs["num_nodes"],
@@ -826,32 +721,38 @@ class UIBuilder:
                 task_configs["image"],
                 task_configs["container_workdir"],
                 task_configs["host_workdir"],
-                training_configs["health_check_checkbox"]
+                training_configs["health_check_checkbox"],
+                training_configs["gpus_per_node"]
             ],
             outputs=[
                 output_log,
                 node_status
             ]
         ).then(
+            # The launch output replaced the table, render it in full
             fn=self._refresh_node_table,
-            outputs=[node_status]
+            outputs=[node_status, node_table_version]
         )
 
         # Refresh node button click event
         refresh_node_btn.click(
-            fn=self._refresh_node_table,
-            outputs=[node_status]
+            fn=self._force_refresh_node_table,
+            inputs=[node_table_version],
+            outputs=[node_status, node_table_version]
         )
 
         # Tab selection event
         node_assignment_tab.select(
             fn=self._refresh_node_table,
-            outputs=[node_status]
+            inputs=[node_table_version],
+            outputs=[node_status, node_table_version]
         )
 
-    def _refresh_node_table(self):
-        data = self.gui.refresh_node_status()
-        return self.gui._create_node_table(data)
+    def _refresh_node_table(self, shown_version: Optional[int] = None):
+        return self._table_update(*self.gui.render_node_table(), shown_version)
+
+    def _force_refresh_node_table(self, shown_version: Optional[int] = None):
+        return self._table_update(*self.gui.render_node_table(force=True), shown_version)
 
     def build_health_check_tab(self):
         with gr.Row():
@@ -911,26 +812,39 @@ class UIBuilder:
                     
                     job_status = gr.HTML(
                         value=self._get_initial_job_table,
-                        every=30,
+                        every=self._value_refresh_interval(),
                         elem_classes="status-table"
                     )
+                    # job_version of the table this session shows
+                    job_table_version = gr.State(None)
+                    self._add_periodic_table_refresh(self._refresh_job_table, job_status, job_table_version)
                     
                     job_control = self._build_job_control_section()
 
             log_viewer = self._build_log_viewer_section()
 
+            launch_timeline = self._build_launch_timeline_section()
+
+            storage_metrics = self._build_storage_metrics_section()
+
         # Connect event handlers
         self._connect_job_status_tab_events(
             job_refresh_btn,
             job_status,
+            job_table_version,
             job_control,
-            log_viewer
+            log_viewer,
+            launch_timeline,
+            storage_metrics
         )
 
         return {
             "job_status": job_status,
+            "job_table_version": job_table_version,
             "job_control": job_control,
-            "log_viewer": log_viewer
+            "log_viewer": log_viewer,
+            "launch_timeline": launch_timeline,
+            "storage_metrics": storage_metrics
         }
 
     def _build_job_control_section(self):
@@ -943,15 +857,22 @@ class UIBuilder:
                     type="text"
                 )
             with gr.Column(scale=2):
-                pass
+                wait_stopped_checkbox = gr.Checkbox(
+                    label="Wait until all tasks are STOPPED",
+                    value=False,
+                    interactive=True
+                )
             with gr.Column(scale=2):
                 pass
             with gr.Column(scale=1):
                 stop_job_btn = gr.Button("🛑 STOP JOB", variant="stop", size="lg")
+        cancel_result = gr.Markdown()
         
         return {
             "job_id_input": job_id_input,
-            "stop_job_btn": stop_job_btn
+            "wait_stopped_checkbox": wait_stopped_checkbox,
+            "stop_job_btn": stop_job_btn,
+            "cancel_result": cancel_result
         }
 
 
@@ -1050,26 +971,72 @@ class UIBuilder:
             "log_output": log_output
         }
 
+    def _build_launch_timeline_section(self):
+        with gr.Blocks(elem_classes="dashboard-card"):
+            with gr.Column():
+                with gr.Row():
+                    gr.Markdown("## ⏱️ Launch Timeline", elem_classes="card-title")
+
+                with gr.Row(equal_height=True):
+                    with gr.Column(scale=4):
+                        timeline_job_id_input = gr.Textbox(
+                            label="Job ID",
+                            placeholder="Input Job ID to view its launch timeline",
+                            interactive=True,
+                            type="text"
+                        )
+                    with gr.Column(scale=1):
+                        timeline_btn = gr.Button("⏱️ View Timeline", variant="secondary", elem_classes="action-button")
+
+                with gr.Row():
+                    timeline_output = gr.Markdown()
+
+        return {
+            "timeline_job_id_input": timeline_job_id_input,
+            "timeline_btn": timeline_btn,
+            "timeline_output": timeline_output
+        }
+
+    def _build_storage_metrics_section(self):
+        with gr.Blocks(elem_classes="dashboard-card"):
+            with gr.Column():
+                with gr.Row():
+                    gr.Markdown("## 📈 Storage Metrics", elem_classes="card-title")
+
+                with gr.Row():
+                    metrics_refresh_btn = gr.Button("🔄 Refresh Metrics", variant="secondary", elem_classes="action-button")
+
+                with gr.Row():
+                    metrics_output = gr.Markdown()
+
+        return {
+            "metrics_refresh_btn": metrics_refresh_btn,
+            "metrics_output": metrics_output
+        }
+
     def _get_initial_job_table(self):
-        jobs_data = self.gui.refresh_job_status()
-        return self.gui._create_job_table(jobs_data)
+        return self.gui.render_job_table()[1]
 
     def _connect_job_status_tab_events(self, 
                                      job_refresh_btn,
                                      job_status,
+                                     job_table_version,
                                      job_control,
-                                     log_viewer):
+                                     log_viewer,
+                                     launch_timeline,
+                                     storage_metrics):
         # Refresh job status button click event
         job_refresh_btn.click(
-            fn=self._refresh_job_table,
-            outputs=[job_status]
+            fn=self._force_refresh_job_table,
+            inputs=[job_table_version],
+            outputs=[job_status, job_table_version]
         )
 
         # Stop job button click event
         job_control["stop_job_btn"].click(
             fn=self._stop_job_and_refresh,
-            inputs=[job_control["job_id_input"]],
-            outputs=[job_control["job_id_input"], job_status]
+            inputs=[job_control["job_id_input"], job_control["wait_stopped_checkbox"], job_table_version],
+            outputs=[job_control["job_id_input"], job_status, job_table_version, job_control["cancel_result"]]
         )
 
         # Log refresh button click event
@@ -1083,22 +1050,35 @@ class UIBuilder:
             outputs=[log_viewer["task_id_input"], log_viewer["log_output"]]
         )
 
-    def _refresh_job_table(self):
-        jobs_data = self.gui.refresh_job_status()
-        return self.gui._create_job_table(jobs_data)
+        # Launch timeline button click event
+        launch_timeline["timeline_btn"].click(
+            fn=self.gui.view_launch_timeline,
+            inputs=[launch_timeline["timeline_job_id_input"]],
+            outputs=[launch_timeline["timeline_output"]]
+        )
+
+        # Storage metrics refresh button click event
+        storage_metrics["metrics_refresh_btn"].click(
+            fn=self.gui.view_storage_metrics,
+            outputs=[storage_metrics["metrics_output"]]
+        )
+
+    def _refresh_job_table(self, shown_version: Optional[int] = None):
+        return self._table_update(*self.gui.render_job_table(), shown_version)
+
+    def _force_refresh_job_table(self, shown_version: Optional[int] = None):
+        return self._table_update(*self.gui.render_job_table(force=True), shown_version)
 
-    def _stop_job_and_refresh(self, job_id: str):
+    def _stop_job_and_refresh(self, job_id: str, wait_stopped: bool, shown_version: Optional[int] = None):
         if not job_id or not job_id.strip():
-            return "", self._refresh_job_table()
+            return "", *self._refresh_job_table(shown_version), ""
         
         try:
-            success = JobManager.stop_job(job_id.strip())
-            if success:
-                return "", self._refresh_job_table()
-            return job_id, self._refresh_job_table()
+            result = JobManager.cancel_job(job_id.strip(), wait=wait_stopped)
+            return "", *self._force_refresh_job_table(shown_version), self.gui.format_cancel_result(result)
         except Exception as e:
             logger.error(f"Error stopping job: {str(e)}", exc_info=True)
-            return job_id, self._refresh_job_table()
+            return job_id, *self._force_refresh_job_table(shown_version), f"⚠️ Error stopping job: {str(e)}"
 
     def _fetch_logs(self, task_id: str, log_group: str, container_name: str):
         return self.gui.view_task_logs(task_id, log_group, container_name)
@@ -1158,12 +1138,14 @@ def create_interface():
         
         training_tab_item.select(
             fn=ui_builder._refresh_node_table,
-            outputs=[training_tab["node_status"]]
+            inputs=[training_tab["node_table_version"]],
+            outputs=[training_tab["node_status"], training_tab["node_table_version"]]
         )
 
         job_status_tab_item.select(
             fn=ui_builder._refresh_job_table,
-            outputs=[job_status_tab["job_status"]]
+            inputs=[job_status_tab["job_table_version"]],
+            outputs=[job_status_tab["job_status"], job_status_tab["job_table_version"]]
         )
     
     return interface
@@ -0,0 +1,159 @@
+import os
+import threading
+from typing import Dict, Any, Tuple
+
+import boto3
+from botocore.config import Config
+
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+
+
+class AWSClientPool:
+    """
+    Process-wide cache of boto3 clients and resources.
+
+    One boto3 Session is built per process so credential resolution happens
+    once. Clients, resources and DynamoDB Table objects are shared by every
+    thread (Gradio handlers, background precheck threads and the short-lived
+    launch and describe pool workers alike), so their HTTP connection pool
+    and keep-alive connections are reused across calls. Resource calls go
+    through the thread-safe low-level client; the console never loads or
+    mutates resource attributes, the part of a resource that is not
+    thread-safe. Only construction, which uses the Session, is serialized.
+
+    Pool size is read from AWS_MAX_POOL_CONNECTIONS.
+
+    set_client_override() injects a stand-in client for a service (see
+    fake_aws), which get_client() returns instead of a boto3 client.
+    """
+
+    _lock = threading.Lock()
+    _session = None
+    _config = None
+    _clients: Dict[Tuple[str, str], Any] = {}
+    _resources: Dict[Tuple[str, str], Any] = {}
+    _tables: Dict[str, Any] = {}
+    _overrides: Dict[str, Any] = {}
+
+    @classmethod
+    def _get_session(cls) -> boto3.session.Session:
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    cls._session = boto3.session.Session()
+        return cls._session
+
+    @classmethod
+    def get_config(cls) -> Config:
+        if cls._config is None:
+            max_pool = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', DEFAULT_MAX_POOL_CONNECTIONS))
+            cls._config = Config(
+                max_pool_connections=max_pool,
+                tcp_keepalive=True,
+                retries={'max_attempts': 5, 'mode': 'standard'}
+            )
+        return cls._config
+
+    @classmethod
+    def get_client(cls, service_name: str, region_name: str = None):
+        """
+        Returns the shared client for a service, creating it on first use.
+
+        Args:
+            service_name: AWS service name, e.g. 'ecs' or 'dynamodb'
+            region_name: Optional region, defaults to the session region
+
+        Returns:
+            The cached boto3 client
+        """
+        override = cls._overrides.get(service_name)
+        if override is not None:
+            return override
+
+        cache_key = (service_name, region_name or '')
+        client = cls._clients.get(cache_key)
+        if client is not None:
+            return client
+
+        session = cls._get_session()
+        with cls._lock:
+            client = cls._clients.get(cache_key)
+            if client is None:
+                client = session.client(service_name,
+                                        region_name=region_name,
+                                        config=cls.get_config())
+                cls._clients[cache_key] = client
+        return client
+
+    @classmethod
+    def get_resource(cls, service_name: str, region_name: str = None):
+        """
+        Returns the shared resource for a service, creating it on first use.
+
+        Args:
+            service_name: AWS service name, e.g. 'dynamodb'
+            region_name: Optional region, defaults to the session region
+
+        Returns:
+            The cached boto3 service resource
+        """
+        cache_key = (service_name, region_name or '')
+        resource = cls._resources.get(cache_key)
+        if resource is not None:
+            return resource
+
+        session = cls._get_session()
+        # Session objects are not thread-safe, serialize construction
+        with cls._lock:
+            resource = cls._resources.get(cache_key)
+            if resource is None:
+                resource = session.resource(service_name,
+                                            region_name=region_name,
+                                            config=cls.get_config())
+                cls._resources[cache_key] = resource
+        return resource
+
+    @classmethod
+    def get_dynamodb_table(cls, table_name: str):
+        """
+        Returns the shared DynamoDB Table object, creating it on first use.
+        """
+        table = cls._tables.get(table_name)
+        if table is not None:
+            return table
+
+        resource = cls.get_resource('dynamodb')
+        with cls._lock:
+            table = cls._tables.get(table_name)
+            if table is None:
+                table = resource.Table(table_name)
+                cls._tables[table_name] = table
+        return table
+
+    @classmethod
+    def set_client_override(cls, service_name: str, client: Any) -> None:
+        """
+        Makes get_client return client for service_name in every region,
+        None removes the override.
+        """
+        with cls._lock:
+            if client is None:
+                cls._overrides.pop(service_name, None)
+            else:
+                cls._overrides[service_name] = client
+
+    @classmethod
+    def clear_client_overrides(cls) -> None:
+        with cls._lock:
+            cls._overrides = {}
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drops all cached sessions, clients, resources and tables, keeps overrides."""
+        with cls._lock:
+            cls._session = None
+            cls._config = None
+            cls._clients = {}
+            cls._resources = {}
+            cls._tables = {}
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from job_manager import JobManager
+from node_manager import NodeManager, singleton
+
+
+DEFAULT_SNAPSHOT_INTERVAL = 15
+
+Rows = Tuple[Tuple[str, ...], ...]
+
+
+@dataclass(frozen=True)
+class ClusterSnapshot:
+    # Incremented whenever the node or job rows change; node_version and
+    # job_version only when that table's rows change, so sessions that
+    # already show a version can skip re-rendering it
+    version: int
+    taken_at: float
+    node_version: int = 0
+    job_version: int = 0
+    # Rows as shown by the node and job tables, see
+    # NodeManager.get_node_status_display and JobManager.get_jobs_data
+    node_rows: Rows = ()
+    job_rows: Rows = ()
+    node_error: Optional[str] = None
+    job_error: Optional[str] = None
+
+
+@singleton
+class ClusterStateRefresher:
+    """
+    Shared, immutable view of node state and recent jobs for all UI sessions.
+
+    A single daemon thread rebuilds the snapshot once per
+    CLUSTER_SNAPSHOT_INTERVAL seconds; table refreshes of every connected
+    browser only read the latest snapshot, so the ECS and DynamoDB load
+    stays the same however many operators have the console open.
+
+    Explicit refreshes (refresh buttons, after a launch or a stop) go
+    through request_refresh, which coalesces concurrent requests into one
+    rebuild. A source that fails keeps its previous rows and reports the
+    error on the snapshot.
+    """
+
+    def __init__(self):
+        self.interval = float(os.environ.get('CLUSTER_SNAPSHOT_INTERVAL', DEFAULT_SNAPSHOT_INTERVAL))
+        self.node_manager = NodeManager()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._snapshot = ClusterSnapshot(version=0, taken_at=0.0)
+        # Start of the latest rebuild, requests made before it are served by it
+        self._refresh_started_at = None
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='cluster-state-refresher', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.request_refresh()
+            except Exception as e:
+                # Keep serving the previous snapshot, the next interval retries
+                print(f"Error refreshing cluster snapshot: {str(e)}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def get_snapshot(self) -> ClusterSnapshot:
+        """Latest published snapshot, without any AWS call; taken_at is 0 before the first one."""
+        return self._snapshot
+
+    def request_refresh(self) -> ClusterSnapshot:
+        """
+        Rebuild the snapshot from ECS and DynamoDB, unless a rebuild started
+        after this call was made; concurrent callers share that rebuild.
+
+        Returns:
+            ClusterSnapshot: A snapshot taken after the request
+        """
+        requested_at = time.monotonic()
+        with self._refresh_lock:
+            if self._refresh_started_at is not None and self._refresh_started_at >= requested_at:
+                return self._snapshot
+
+            self._refresh_started_at = time.monotonic()
+            previous = self._snapshot
+
+            node_rows, node_error = previous.node_rows, None
+            try:
+                self.node_manager.refresh_all_node_status(force=True)
+                node_rows = tuple(tuple(row) for row in self.node_manager.get_node_status_display())
+            except Exception as e:
+                node_error = str(e)
+                print(f"Error refreshing node status snapshot: {node_error}")
+
+            job_rows, job_error = previous.job_rows, None
+            try:
+                job_rows = tuple(tuple(row) for row in JobManager.get_jobs_data())
+            except Exception as e:
+                job_error = str(e)
+                print(f"Error refreshing job snapshot: {job_error}")
+
+            node_changed = (node_rows, node_error) != (previous.node_rows, previous.node_error)
+            job_changed = (job_rows, job_error) != (previous.job_rows, previous.job_error)
+            snapshot = ClusterSnapshot(
+                version=previous.version + int(node_changed or job_changed),
+                taken_at=time.time(),
+                node_version=previous.node_version + int(node_changed),
+                job_version=previous.job_version + int(job_changed),
+                node_rows=node_rows,
+                job_rows=job_rows,
+                node_error=node_error,
+                job_error=job_error
+            )
+            self._snapshot = snapshot
+            return snapshot
@@ -0,0 +1,320 @@
+"""
+Control-plane benchmarks of the console against in-process fake AWS services.
+
+Measures launch latency versus node count, concurrent job submissions,
+job-table refresh under concurrent sessions and log fetch size, with
+configurable injected AWS latency and failures, and checks that two jobs
+using half a node each share one node. Results are written as JSON so runs
+can be compared across versions; the exit status is 1 if the check fails:
+
+    python gui/control_plane_bench.py --output bench_results.json --latency-ms 30
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+GUI_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(GUI_DIR)
+PRE_SETTINGS_DIR = os.path.join(REPO_DIR, 'HYBRID_GPU_PRE_SETTINGS')
+
+BENCH_CLUSTER_NAME = 'bench-cluster'
+
+
+def _configure_environment(num_nodes: int) -> List[str]:
+    """Console settings for the fake cluster, set before the managers are imported"""
+    node_names = [f"bench-node-{i:04d}" for i in range(num_nodes)]
+    os.environ.update({
+        'CLUSTER_NAME': BENCH_CLUSTER_NAME,
+        'JOB_MANAGE_TABLE': f"{BENCH_CLUSTER_NAME}-jobs",
+        'TASK_MANAGE_TABLE': f"{BENCH_CLUSTER_NAME}-tasks",
+        'ECS_TASK_DEF': os.path.join(PRE_SETTINGS_DIR, 'ecs_task_def.json'),
+        'TRAINING_CONTAINER_DEF': os.path.join(PRE_SETTINGS_DIR, 'training_container_def.json'),
+        'HEALTH_CONTAINER_DEF': os.path.join(PRE_SETTINGS_DIR, 'healthcheck_container_def.json'),
+        'NODE_NAME_LIST': ','.join(node_names),
+        # Measure the writes themselves, not the coalescing window
+        'JOB_STATUS_COALESCE_WINDOW': '0',
+    })
+    return node_names
+
+
+def _summarize_ms(samples: List[float]) -> Dict[str, float]:
+    samples_ms = sorted(sample * 1000 for sample in samples)
+    return {
+        'count': len(samples_ms),
+        'mean_ms': round(statistics.mean(samples_ms), 2),
+        'p50_ms': round(samples_ms[len(samples_ms) // 2], 2),
+        'p95_ms': round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 2),
+        'max_ms': round(samples_ms[-1], 2),
+    }
+
+
+def _timed(call: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def _git_version() -> str:
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def bench_launch_latency(fakes, node_counts: List[int], repeats: int) -> List[Dict[str, Any]]:
+    """register_task_and_run_all (register, launch, task records) per node count"""
+    from file_manager import FileManager
+    from task_manager import TaskManager
+
+    task_manager = TaskManager()
+    task_def = task_manager.get_ecs_task_def()
+    container_def = task_manager.get_training_container_def()
+    container_def['portMappings'][0]['containerPort'] = 29500
+    container_def['portMappings'][0]['hostPort'] = 29500
+    container_def['command'] = ['/workspace/bench/training-rdzv.sh']
+    task_def['containerDefinitions'] = [container_def]
+    task_def_path = os.path.join('bench', 'task_def_rdzv.json')
+    FileManager.save_json(task_def_path, task_def)
+
+    results = []
+    for num_nodes in node_counts:
+        samples = []
+        errors = []
+        fakes.injector.reset_stats()
+        for repeat in range(repeats):
+            job_id = f"bench-launch-{num_nodes}-{repeat}"
+            try:
+                samples.append(_timed(lambda: TaskManager.register_task_and_run_all(
+                    job_id, datetime.now().strftime("%Y%m%d-%H%M%S"), num_nodes, task_def_path,
+                    os.path.join('bench', job_id)
+                )))
+            except Exception as e:
+                errors.append(str(e))
+            fakes.ecs.clear_tasks()
+        results.append({'num_nodes': num_nodes, **(_summarize_ms(samples) if samples else {'count': 0}),
+                        'errors': errors, 'aws_calls': fakes.injector.get_stats()})
+    return results
+
+
+def bench_concurrent_submissions(fakes, submission_counts: List[int], nodes_per_job: int) -> List[Dict[str, Any]]:
+    """Jobs submitted at once through the launch pipeline, until all are launched"""
+    from launch_pipeline import LaunchPipeline, LaunchRequest, LaunchState
+
+    pipeline = LaunchPipeline()
+    results = []
+    for submissions in submission_counts:
+        fakes.injector.reset_stats()
+        start = time.perf_counter()
+        jobs = [pipeline.submit(LaunchRequest(f"bench-submit-{submissions}-{i}", nodes_per_job,
+                                              '29500', 'bench/train.sh'))
+                for i in range(submissions)]
+        accept_latencies = []
+        for job in jobs:
+            try:
+                job.accepted.result()
+            except Exception:
+                pass
+            accept_latencies.append(time.perf_counter() - start)
+        for job in jobs:
+            job.done.result()
+        wall_seconds = time.perf_counter() - start
+
+        results.append({
+            'submissions': submissions,
+            'nodes_per_job': nodes_per_job,
+            'wall_ms': round(wall_seconds * 1000, 2),
+            'launched': sum(1 for job in jobs if job.state == LaunchState.LAUNCHED),
+            'failed': [job.error for job in jobs if job.state != LaunchState.LAUNCHED],
+            'accept_latency': _summarize_ms(accept_latencies),
+            'aws_calls': fakes.injector.get_stats(),
+        })
+        fakes.ecs.clear_tasks()
+    return results
+
+
+def bench_job_refresh(fakes, session_counts: List[int], refreshes_per_session: int,
+                      num_jobs: int) -> List[Dict[str, Any]]:
+    """JobManager.get_jobs_data from concurrent sessions over a table of num_jobs jobs"""
+    from ddb_cache import DynamoDBReadCache
+    from ddb_metrics import StorageMetrics
+    from job_manager import JobManager
+
+    for i in range(num_jobs):
+        JobManager.gather_task_and_record_job(
+            f"bench-job-{i:05d}", datetime.now().strftime("%Y%m%d-%H%M%S"), 1,
+            [f"bench-node-{i:04d}"], [f"inst-{i}"], [f"task-{i}"], 'SUCCESS'
+        )
+
+    results = []
+    for sessions in session_counts:
+        DynamoDBReadCache.clear()
+        StorageMetrics.reset()
+        fakes.injector.reset_stats()
+        samples = []
+        samples_lock = threading.Lock()
+
+        def _session():
+            for _ in range(refreshes_per_session):
+                elapsed = _timed(JobManager.get_jobs_data)
+                with samples_lock:
+                    samples.append(elapsed)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            for future in [executor.submit(_session) for _ in range(sessions)]:
+                future.result()
+        wall_seconds = time.perf_counter() - start
+
+        results.append({
+            'sessions': sessions,
+            'refreshes_per_session': refreshes_per_session,
+            'jobs_in_table': num_jobs,
+            'refreshes_per_second': round(len(samples) / wall_seconds, 2),
+            **_summarize_ms(samples),
+            'cache': DynamoDBReadCache.get_stats(),
+            'aws_calls': fakes.injector.get_stats(),
+        })
+    return results
+
+
+def bench_log_fetch(fakes, event_counts: List[int], message_bytes: int, repeats: int) -> List[Dict[str, Any]]:
+    """CloudWatchManager.get_task_logs for log streams of growing size"""
+    from cloudwatch_manager import CloudWatchManager
+
+    cloudwatch_manager = CloudWatchManager()
+    log_group = '/ecs/bench'
+    results = []
+    for event_count in event_counts:
+        task_id = f"bench-logs-{event_count}"
+        fakes.logs.put_messages(log_group, f"ecs/TrainingContainer/{task_id}",
+                                [f"{i:08d} " + 'x' * max(0, message_bytes - 9) for i in range(event_count)])
+        output = ''
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output = cloudwatch_manager.get_task_logs(task_id, log_group, 'TrainingContainer')
+            samples.append(time.perf_counter() - start)
+        results.append({
+            'events_in_stream': event_count,
+            'message_bytes': message_bytes,
+            'returned_lines': output.count('\n') + 1 if output else 0,
+            'returned_bytes': len(output.encode()),
+            **_summarize_ms(samples),
+        })
+    return results
+
+
+def check_fractional_packing(fakes, gpus_per_node: int = 4) -> Dict[str, Any]:
+    """
+    Two single-node jobs of gpus_per_node GPUs each, on the shipped training
+    container definition and different master ports, through the launch
+    pipeline; packed if both run on the same node.
+    """
+    from launch_pipeline import LaunchPipeline, LaunchRequest, LaunchState
+    from node_manager import NodeManager
+
+    fakes.ecs.clear_tasks()
+    NodeManager().refresh_all_node_status(force=True)
+    pipeline = LaunchPipeline()
+    jobs = []
+    for i, master_port in enumerate(('10000', '10002')):
+        job = pipeline.submit(LaunchRequest(f"bench-pack-{i}", 1, master_port, 'bench/train.sh',
+                                            gpus_per_node=gpus_per_node))
+        job.done.result()
+        jobs.append(job)
+
+    launched = all(job.state == LaunchState.LAUNCHED for job in jobs)
+    inst_ids = [inst_id for job in jobs if job.lease for inst_id in job.lease.container_inst_ids]
+    fakes.ecs.clear_tasks()
+    return {
+        'gpus_per_node': gpus_per_node,
+        'packed': launched and len(set(inst_ids)) == 1,
+        'container_inst_ids': inst_ids,
+        'failed': [job.error for job in jobs if job.state != LaunchState.LAUNCHED],
+    }
+
+
+def _parse_int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', default='control_plane_bench.json', help="JSON results file")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="Injected latency per AWS call")
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Injected failure probability per call")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--node-counts', type=_parse_int_list, default=[1, 4, 16, 64])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--submissions', type=_parse_int_list, default=[1, 4, 16])
+    parser.add_argument('--nodes-per-job', type=int, default=4)
+    parser.add_argument('--sessions', type=_parse_int_list, default=[1, 8, 32])
+    parser.add_argument('--refreshes-per-session', type=int, default=10)
+    parser.add_argument('--jobs-in-table', type=int, default=500)
+    parser.add_argument('--log-events', type=_parse_int_list, default=[100, 1000, 10000, 50000])
+    parser.add_argument('--log-message-bytes', type=int, default=120)
+    args = parser.parse_args()
+
+    num_nodes = max(max(args.node_counts), max(args.submissions) * args.nodes_per_job)
+    node_names = _configure_environment(num_nodes)
+    output_path = os.path.abspath(args.output)
+
+    sys.path.insert(0, GUI_DIR)
+    from fake_aws import FaultInjector, install_fakes
+
+    # Failures are injected once setup is done
+    injector = FaultInjector(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    fakes = install_fakes(BENCH_CLUSTER_NAME, node_names, injector=injector)
+
+    from job_manager import JobManager
+    from node_manager import NodeManager
+    from task_manager import TaskManager
+
+    with tempfile.TemporaryDirectory(prefix='control-plane-bench-') as work_dir:
+        # Launch scripts and histories are written relative to the working directory
+        os.chdir(work_dir)
+        JobManager.create_job_table_if_not_exists()
+        TaskManager.create_task_table_if_not_exists()
+        JobManager.configure_read_cache()
+        NodeManager()
+        injector.defaults['failure_rate'] = args.failure_rate
+
+        report = {
+            'version': _git_version(),
+            'timestamp': datetime.now().isoformat(),
+            'config': {key: value for key, value in vars(args).items() if key != 'output'},
+            'results': {
+                'launch_latency': bench_launch_latency(fakes, args.node_counts, args.repeats),
+                'concurrent_submissions': bench_concurrent_submissions(fakes, args.submissions,
+                                                                       args.nodes_per_job),
+                'job_refresh': bench_job_refresh(fakes, args.sessions, args.refreshes_per_session,
+                                                 args.jobs_in_table),
+                'log_fetch': bench_log_fetch(fakes, args.log_events, args.log_message_bytes, args.repeats),
+            },
+        }
+        injector.defaults['failure_rate'] = 0.0
+        report['checks'] = {'fractional_packing': check_fractional_packing(fakes)}
+
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results written to {output_path}")
+    packing = report['checks']['fractional_packing']
+    if not packing['packed']:
+        print(f"Fractional jobs were not packed onto one node: {packing}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
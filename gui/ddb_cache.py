@@ -0,0 +1,145 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            stale_keys = [key for key in self._entries if predicate(key)]
+            for key in stale_keys:
+                del self._entries[key]
+            return len(stale_keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DynamoDBReadCache:
+    """
+    Process-wide read-through cache in front of DynamoDBHandler reads.
+
+    Caching is opt-in per table through set_table_ttl, tables without a TTL
+    are always read from DynamoDB. Every DynamoDBHandler write invalidates
+    the cached reads of the written table, so state transitions are never
+    served stale from this process. Cached values are deep-copied on the way
+    in and out so callers can't mutate shared entries.
+    """
+
+    _cache = TTLCache(int(os.environ.get('DDB_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)))
+    _table_ttls: Dict[str, float] = {}
+    _table_generations: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def set_table_ttl(cls, table_name: str, ttl_seconds: float) -> None:
+        """Enable caching for a table, a TTL of 0 disables it."""
+        with cls._lock:
+            if ttl_seconds and ttl_seconds > 0:
+                cls._table_ttls[table_name] = ttl_seconds
+            else:
+                cls._table_ttls.pop(table_name, None)
+        cls.invalidate_table(table_name)
+
+    @classmethod
+    def get_table_ttl(cls, table_name: str) -> Optional[float]:
+        return cls._table_ttls.get(table_name)
+
+    @classmethod
+    def get_or_load(cls, table_name: str, operation: str,
+                    params: Dict[str, Any], loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached result of a read, or calls loader and caches it.
+        None results (read errors) are never cached.
+
+        Args:
+            table_name: Table the read targets
+            operation: Read operation name, e.g. 'get_item'
+            params: Read parameters, part of the cache key
+            loader: Performs the read against DynamoDB on a miss
+        """
+        ttl = cls._table_ttls.get(table_name)
+        if not ttl:
+            return loader()
+
+        key = (table_name, operation, json.dumps(params, sort_keys=True, default=str))
+        hit, value = cls._cache.get(key)
+        if hit:
+            return copy.deepcopy(value)
+
+        generation = cls._table_generations.get(table_name, 0)
+        value = loader()
+        if value is not None:
+            with cls._lock:
+                # Skip the store if a write invalidated the table meanwhile
+                if cls._table_generations.get(table_name, 0) == generation:
+                    cls._cache.put(key, copy.deepcopy(value), ttl)
+        return value
+
+    @classmethod
+    def invalidate_table(cls, table_name: str) -> None:
+        with cls._lock:
+            cls._table_generations[table_name] = cls._table_generations.get(table_name, 0) + 1
+            cls._cache.invalidate(lambda key: key[0] == table_name)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            for table_name in list(cls._table_generations):
+                cls._table_generations[table_name] += 1
+            cls._cache.clear()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        return {
+            'entries': len(cls._cache),
+            'hits': cls._cache.hits,
+            'misses': cls._cache.misses,
+            'table_ttls': dict(cls._table_ttls)
+        }
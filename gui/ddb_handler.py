@@ -1,56 +1,55 @@
-import boto3
-from botocore.exceptions import ClientError
-from typing import Dict, List, Any, Optional
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from ddb_cache import DynamoDBReadCache
+from ddb_metrics import StorageMetrics
+from storage_backend import StorageBackend, get_storage_backend, BATCH_WRITE_MAX_ITEMS, TRANSACT_WRITE_MAX_ITEMS
 
 
 class DynamoDBHandler:
     """
     A handler class for DynamoDB operations.
+
+    Calls are served by the storage backend selected with STORAGE_BACKEND
+    (DynamoDB by default, or an embedded SQLite file), see storage_backend.
+    Reads called with use_cache=True go through DynamoDBReadCache, and every
+    write invalidates the cached reads of the tables it touches. Reads take
+    an optional projection so only the listed attributes are returned, and
+    the latency of every backend call is recorded in StorageMetrics.
     """
+
+    @staticmethod
+    def _backend() -> StorageBackend:
+        return get_storage_backend()
     
     @staticmethod
-    def create_table_if_not_exists(table_name: str, primary_key: str) -> bool:
+    def create_table_if_not_exists(table_name: str, primary_key: str,
+                                   global_secondary_indexes: Optional[Dict[str, Tuple[str, str]]] = None,
+                                   billing_mode: Optional[str] = None) -> bool:
         """
         Creates a DynamoDB table if it doesn't already exist.
+        If the table exists, any missing global secondary index is added.
         
         Args:
             table_name: Name of the table to create
+            primary_key: Name of the string hash key
+            global_secondary_indexes: Optional {index_name: (hash_key, range_key)},
+                all key attributes are strings and all attributes are projected
+            billing_mode: 'PAY_PER_REQUEST' or 'PROVISIONED', defaults to
+                DDB_BILLING_MODE env or 'PROVISIONED'
             
         Returns:
             bool: True if table exists or was created successfully, False otherwise
         """
-        dynamodb = boto3.client('dynamodb')
-        
-        try:
-            response = dynamodb.create_table(
-                TableName=table_name,
-                KeySchema=[
-                    {
-                        'AttributeName': primary_key,
-                        'KeyType': 'HASH'
-                    }
-                ],
-                AttributeDefinitions=[
-                    {
-                        'AttributeName': primary_key,
-                        'AttributeType': 'S'
-                    }
-                ],
-                ProvisionedThroughput={
-                    'ReadCapacityUnits': 5,
-                    'WriteCapacityUnits': 5
-                }
+        return StorageMetrics.measure(
+            table_name, 'create_table',
+            lambda: DynamoDBHandler._backend().create_table_if_not_exists(
+                table_name, primary_key, global_secondary_indexes, billing_mode
             )
-            print(f"Creating table {table_name}...")
-            return True
-            
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'ResourceInUseException':
-                print(f"Table {table_name} already exists")
-                return True
-            else:
-                print(f"Error creating table: {e}")
-                return False
+        )
     
 
     @staticmethod
@@ -65,37 +64,88 @@ class DynamoDBHandler:
         Returns:
             bool: True if write was successful, False otherwise
         """
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
+        try:
+            return StorageMetrics.measure(
+                table_name, 'write_item',
+                lambda: DynamoDBHandler._backend().write_item(table_name, item)
+            )
+        finally:
+            DynamoDBReadCache.invalidate_table(table_name)
+    
+    @staticmethod
+    def batch_write_items(items_by_table: Dict[str, List[Dict[str, Any]]],
+                          max_retries: int = 8) -> bool:
+        """
+        Writes items to one or more tables with BatchWriteItem.
+        Requests are sent in chunks of 25 and UnprocessedItems are retried
+        with exponential backoff. Writes are not atomic across chunks.
         
+        Args:
+            items_by_table: Dictionary of table name to list of items to put
+            max_retries: Retries of unprocessed items per chunk
+            
+        Returns:
+            bool: True if every item was written, False otherwise
+        """
         try:
-            response = table.put_item(Item=item)
-            return True
-        except ClientError as e:
-            print(f"Error writing to table: {e}")
-            return False
+            return StorageMetrics.measure(
+                list(items_by_table), 'batch_write_items',
+                lambda: DynamoDBHandler._backend().batch_write_items(items_by_table, max_retries)
+            )
+        finally:
+            for table_name in items_by_table:
+                DynamoDBReadCache.invalidate_table(table_name)
+
+    @staticmethod
+    def transact_write_items(items_by_table: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """
+        Writes items to one or more tables atomically with TransactWriteItems.
+        Either every item is written or none is.
+        
+        Args:
+            items_by_table: Dictionary of table name to list of items to put,
+                at most 100 items in total
+            
+        Returns:
+            bool: True if the transaction committed, False otherwise
+        """
+        try:
+            return StorageMetrics.measure(
+                list(items_by_table), 'transact_write_items',
+                lambda: DynamoDBHandler._backend().transact_write_items(items_by_table)
+            )
+        finally:
+            for table_name in items_by_table:
+                DynamoDBReadCache.invalidate_table(table_name)
     
     @staticmethod
-    def get_item(table_name: str, key: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    def get_item(table_name: str, key: Dict[str, str],
+                 use_cache: bool = False,
+                 projection: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Retrieves an item from the specified DynamoDB table.
         
         Args:
             table_name: Name of the table to read from
             key: Dictionary containing the primary key
+            use_cache: Serve from DynamoDBReadCache if the table has a TTL
+            projection: Optional list of attribute names to return
             
         Returns:
             Optional[Dict]: The item if found, None otherwise
         """
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
-        
-        try:
-            response = table.get_item(Key=key)
-            return response.get('Item')
-        except ClientError as e:
-            print(f"Error retrieving item: {e}")
-            return None
+        if use_cache:
+            return DynamoDBReadCache.get_or_load(
+                table_name, 'get_item', {'key': key, 'projection': projection},
+                lambda: DynamoDBHandler.get_item(table_name, key, projection=projection)
+            )
+
+        # None also means "not found", so failed reads are not told apart here
+        return StorageMetrics.measure(
+            table_name, 'get_item',
+            lambda: DynamoDBHandler._backend().get_item(table_name, key, projection),
+            error_result=...
+        )
     
     @staticmethod
     def delete_item(table_name: str, key: Dict[str, str]) -> bool:
@@ -109,28 +159,17 @@ class DynamoDBHandler:
         Returns:
             bool: True if deletion was successful, False otherwise
         """
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
-        
-        try:
-            response = table.delete_item(Key=key)
-            return True
-        except ClientError as e:
-            print(f"Error deleting item: {e}")
-            return False
-    
-    def item_exist(table_name: str, primary_key: str):
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
         try:
-            response = table.get_item(
-                Key={
-                    'partition_key': primary_key,
-                }
+            return StorageMetrics.measure(
+                table_name, 'delete_item',
+                lambda: DynamoDBHandler._backend().delete_item(table_name, key)
             )
-            item_exists = 'Item' in response
-        except Exception as e:
-            print(f"Error: {e}")
+        finally:
+            DynamoDBReadCache.invalidate_table(table_name)
+    
+    @staticmethod
+    def item_exist(table_name: str, primary_key: str) -> bool:
+        return DynamoDBHandler.get_item(table_name, {'partition_key': primary_key}) is not None
 
 
     @staticmethod
@@ -149,51 +188,238 @@ class DynamoDBHandler:
         Returns:
             bool: True if update was successful, False otherwise
         """
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
-        
         try:
-            response = table.update_item(
-                Key=key,
-                UpdateExpression=update_expression,
-                ExpressionAttributeValues=expression_values,
-                ReturnValues="UPDATED_NEW"
+            return StorageMetrics.measure(
+                table_name, 'update_item',
+                lambda: DynamoDBHandler._backend().update_item(
+                    table_name, key, update_expression, expression_values
+                )
             )
-            return True
-        except ClientError as e:
-            print(f"Error updating item: {e}")
-            return False
+        finally:
+            DynamoDBReadCache.invalidate_table(table_name)
     
     @staticmethod
     def scan_table(table_name: str, filter_expression: Optional[str] = None,
-                  expression_values: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+                  expression_values: Optional[Dict[str, Any]] = None,
+                  use_cache: bool = False,
+                  projection: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Scans a DynamoDB table, optionally with a filter.
+        Follows LastEvaluatedKey so every page is returned. Prefer iter_scan
+        for large tables, this collects all items into one list.
         
         Args:
             table_name: Name of the table to scan
             filter_expression: Optional filter expression
             expression_values: Optional expression attribute values
+            use_cache: Serve from DynamoDBReadCache if the table has a TTL
+            projection: Optional list of attribute names to return
             
         Returns:
             List[Dict]: List of items matching the scan
+
+        Raises:
+            Exception: The backend's error if any page fails to load, rather
+                than returning the items read so far
+        """
+        if use_cache:
+            return DynamoDBReadCache.get_or_load(
+                table_name, 'scan',
+                {'filter_expression': filter_expression, 'expression_values': expression_values,
+                 'projection': projection},
+                lambda: DynamoDBHandler.scan_table(table_name, filter_expression, expression_values,
+                                                   projection=projection)
+            )
+
+        return list(DynamoDBHandler.iter_scan(table_name, filter_expression, expression_values,
+                                              projection=projection))
+
+    @staticmethod
+    def iter_scan_pages(table_name: str, filter_expression: Optional[str] = None,
+                        expression_values: Optional[Dict[str, Any]] = None,
+                        page_size: Optional[int] = None,
+                        segment: Optional[int] = None,
+                        total_segments: Optional[int] = None,
+                        projection: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
         """
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
+        Lazily scans a DynamoDB table page by page, following LastEvaluatedKey.
         
-        try:
-            if filter_expression and expression_values:
-                response = table.scan(
-                    FilterExpression=filter_expression,
-                    ExpressionAttributeValues=expression_values
-                )
-            else:
-                response = table.scan()
-                
-            return response.get('Items', [])
-        except ClientError as e:
-            print(f"Error scanning table: {e}")
-            return []
+        Args:
+            table_name: Name of the table to scan
+            filter_expression: Optional filter expression
+            expression_values: Optional expression attribute values
+            page_size: Optional maximum number of items evaluated per page
+            segment: Optional segment number for a parallel scan
+            total_segments: Total number of segments for a parallel scan
+            projection: Optional list of attribute names to return
+            
+        Yields:
+            List[Dict]: Items of each scan page
+
+        Raises:
+            Exception: The backend's error if a page fails to load
+        """
+        pages = DynamoDBHandler._backend().iter_scan_pages(
+            table_name, filter_expression, expression_values, page_size,
+            segment, total_segments, projection
+        )
+        # Each page fetch is timed separately, time spent by the consumer is not counted
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                return
+            StorageMetrics.observe_latency(table_name, 'scan', time.perf_counter() - start)
+            yield page
+
+    @staticmethod
+    def iter_scan(table_name: str, filter_expression: Optional[str] = None,
+                  expression_values: Optional[Dict[str, Any]] = None,
+                  page_size: Optional[int] = None,
+                  projection: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily scans a DynamoDB table, yielding one item at a time.
+        Only one page is held in memory at any moment.
+        
+        Args:
+            table_name: Name of the table to scan
+            filter_expression: Optional filter expression
+            expression_values: Optional expression attribute values
+            page_size: Optional maximum number of items evaluated per page
+            projection: Optional list of attribute names to return
+            
+        Yields:
+            Dict: Items matching the scan
+        """
+        for page in DynamoDBHandler.iter_scan_pages(table_name, filter_expression,
+                                                    expression_values, page_size,
+                                                    projection=projection):
+            yield from page
+
+    @staticmethod
+    def parallel_scan(table_name: str, total_segments: int = 4,
+                      filter_expression: Optional[str] = None,
+                      expression_values: Optional[Dict[str, Any]] = None,
+                      page_size: Optional[int] = None,
+                      projection: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Scans a DynamoDB table with Segment/TotalSegments across a thread pool.
+        Intended for full-table analytics; item order is not preserved.
+        Pages are handed over through a bounded queue, so at most about two
+        pages per segment are held in memory.
+        
+        Args:
+            table_name: Name of the table to scan
+            total_segments: Number of segments scanned concurrently
+            filter_expression: Optional filter expression
+            expression_values: Optional expression attribute values
+            page_size: Optional maximum number of items evaluated per page
+            projection: Optional list of attribute names to return
+            
+        Yields:
+            Dict: Items matching the scan
+
+        Raises:
+            Exception: The error of the first segment that fails to load a page
+        """
+        if total_segments <= 1:
+            yield from DynamoDBHandler.iter_scan(table_name, filter_expression,
+                                                 expression_values, page_size, projection)
+            return
+
+        pages = queue.Queue(maxsize=total_segments * 2)
+        stop_event = threading.Event()
+        segment_done = object()
+
+        def _put(page) -> bool:
+            while not stop_event.is_set():
+                try:
+                    pages.put(page, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _scan_segment(segment: int) -> None:
+            try:
+                for page in DynamoDBHandler.iter_scan_pages(table_name, filter_expression,
+                                                            expression_values, page_size,
+                                                            segment, total_segments, projection):
+                    if not _put(page):
+                        return
+            except Exception as e:
+                # Hand the error to the consumer, a failed segment must not pass for an empty one
+                _put(e)
+            finally:
+                _put(segment_done)
+
+        with ThreadPoolExecutor(max_workers=total_segments,
+                                thread_name_prefix='ddb-parallel-scan') as executor:
+            for segment in range(total_segments):
+                executor.submit(_scan_segment, segment)
+
+            try:
+                remaining = total_segments
+                while remaining:
+                    page = pages.get()
+                    if page is segment_done:
+                        remaining -= 1
+                        continue
+                    if isinstance(page, Exception):
+                        raise page
+                    yield from page
+            finally:
+                # Consumer stopped early or finished, let blocked workers exit
+                stop_event.set()
+    
+    @staticmethod
+    def query(table_name: str, key_condition_expression: str,
+              expression_values: Dict[str, Any],
+              index_name: Optional[str] = None,
+              scan_index_forward: bool = True,
+              limit: Optional[int] = None,
+              use_cache: bool = False,
+              projection: Optional[List[str]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Queries a DynamoDB table or one of its indexes.
+        When limit is given, pages are followed only until limit items are read.
+        
+        Args:
+            table_name: Name of the table to query
+            key_condition_expression: Key condition expression
+            expression_values: Expression attribute values
+            index_name: Optional secondary index to query
+            scan_index_forward: False to return items in descending sort key order
+            limit: Optional maximum number of items to return
+            use_cache: Serve from DynamoDBReadCache if the table has a TTL
+            projection: Optional list of attribute names to return
+            
+        Returns:
+            Optional[List[Dict]]: Matching items, or None if the query failed
+            (e.g. the index does not exist or is still being created)
+        """
+        if use_cache:
+            return DynamoDBReadCache.get_or_load(
+                table_name, 'query',
+                {'key_condition_expression': key_condition_expression,
+                 'expression_values': expression_values,
+                 'index_name': index_name,
+                 'scan_index_forward': scan_index_forward,
+                 'limit': limit,
+                 'projection': projection},
+                lambda: DynamoDBHandler.query(table_name, key_condition_expression, expression_values,
+                                              index_name, scan_index_forward, limit,
+                                              projection=projection)
+            )
+
+        return StorageMetrics.measure(
+            table_name, 'query',
+            lambda: DynamoDBHandler._backend().query(
+                table_name, key_condition_expression, expression_values,
+                index_name, scan_index_forward, limit, projection
+            ),
+            error_result=None
+        )
     
     @staticmethod
     def delete_table(table_name: str) -> bool:
@@ -206,15 +432,13 @@ class DynamoDBHandler:
         Returns:
             bool: True if deletion was successful, False otherwise
         """
-        dynamodb = boto3.client('dynamodb')
-        
         try:
-            response = dynamodb.delete_table(TableName=table_name)
-            print(f"Deleting table {table_name}...")
-            return True
-        except ClientError as e:
-            print(f"Error deleting table: {e}")
-            return False
+            return StorageMetrics.measure(
+                table_name, 'delete_table',
+                lambda: DynamoDBHandler._backend().delete_table(table_name)
+            )
+        finally:
+            DynamoDBReadCache.invalidate_table(table_name)
 
 
 
@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+# Upper bounds (ms) of the latency histogram buckets, the last bucket is open
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+READ_OPERATIONS = ('get_item', 'scan', 'query')
+
+
+class _OperationStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.capacity_units = 0.0
+        self.latency_sum_ms = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, latency_ms: float, success: bool) -> None:
+        self.calls += 1
+        if not success:
+            self.errors += 1
+        self.latency_sum_ms += latency_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.latency_buckets[i] += 1
+                return
+        self.latency_buckets[-1] += 1
+
+    def percentile_ms(self, p: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding the p-th percentile"""
+        total = sum(self.latency_buckets)
+        if not total:
+            return None
+        rank = p * total
+        seen = 0
+        for i, count in enumerate(self.latency_buckets):
+            seen += count
+            if seen >= rank:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else float('inf')
+        return float('inf')
+
+
+class StorageMetrics:
+    """
+    Process-wide counters for storage operations, keyed by (table, operation).
+
+    DynamoDBHandler records the latency of every call. The DynamoDB backend
+    requests ReturnConsumedCapacity=TOTAL and records the consumed units, so
+    the console can show which tables and UI actions burn capacity.
+    """
+
+    _lock = threading.Lock()
+    _stats: Dict[Tuple[str, str], _OperationStats] = {}
+
+    @classmethod
+    def _get(cls, table_name: str, operation: str) -> _OperationStats:
+        key = (table_name, operation)
+        stats = cls._stats.get(key)
+        if stats is None:
+            stats = cls._stats[key] = _OperationStats()
+        return stats
+
+    @classmethod
+    def observe_latency(cls, table_name: str, operation: str,
+                        latency_seconds: float, success: bool = True) -> None:
+        with cls._lock:
+            cls._get(table_name, operation).observe(latency_seconds * 1000, success)
+
+    @classmethod
+    def measure(cls, table_names: Union[str, List[str]], operation: str,
+                call: Callable[[], Any], error_result: Any = False) -> Any:
+        """
+        Runs call() and records its latency against every given table.
+
+        Args:
+            table_names: Table or tables the call touches
+            operation: Operation name, e.g. 'query'
+            call: The storage call
+            error_result: Return value meaning the call failed (backends
+                return False or None instead of raising)
+
+        Returns:
+            The result of call()
+        """
+        if isinstance(table_names, str):
+            table_names = [table_names]
+        start = time.perf_counter()
+        success = False
+        try:
+            result = call()
+            success = result is not error_result
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            for table_name in table_names:
+                cls.observe_latency(table_name, operation, elapsed, success)
+
+    @classmethod
+    def record_consumed_capacity(cls, operation: str,
+                                 consumed_capacity: Union[Dict[str, Any], List[Dict[str, Any]], None]) -> None:
+        """
+        Add the ConsumedCapacity of a DynamoDB response, which is a dict for
+        single-table calls and a list for batch and transaction calls.
+        """
+        if not consumed_capacity:
+            return
+        if isinstance(consumed_capacity, dict):
+            consumed_capacity = [consumed_capacity]
+
+        with cls._lock:
+            for entry in consumed_capacity:
+                units = entry.get('CapacityUnits')
+                if units is not None and entry.get('TableName'):
+                    cls._get(entry['TableName'], operation).capacity_units += float(units)
+
+    @classmethod
+    def snapshot(cls) -> List[Dict[str, Any]]:
+        """Per table/operation counters, sorted by consumed capacity."""
+        with cls._lock:
+            rows = [
+                {
+                    'table': table_name,
+                    'operation': operation,
+                    'kind': 'read' if operation in READ_OPERATIONS else 'write',
+                    'calls': stats.calls,
+                    'errors': stats.errors,
+                    'capacity_units': round(stats.capacity_units, 2),
+                    'mean_ms': round(stats.latency_sum_ms / stats.calls, 2) if stats.calls else None,
+                    'p50_ms': stats.percentile_ms(0.50),
+                    'p95_ms': stats.percentile_ms(0.95),
+                    'p99_ms': stats.percentile_ms(0.99),
+                    'latency_histogram': dict(zip(
+                        [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"],
+                        stats.latency_buckets
+                    )),
+                }
+                for (table_name, operation), stats in cls._stats.items()
+            ]
+        return sorted(rows, key=lambda row: (-row['capacity_units'], row['table'], row['operation']))
+
+    @classmethod
+    def totals_by_table(cls) -> Dict[str, Dict[str, float]]:
+        totals: Dict[str, Dict[str, float]] = {}
+        for row in cls.snapshot():
+            table_totals = totals.setdefault(row['table'], {'read_units': 0.0, 'write_units': 0.0, 'calls': 0})
+            table_totals[f"{row['kind']}_units"] += row['capacity_units']
+            table_totals['calls'] += row['calls']
+        return totals
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._stats = {}
@@ -57,7 +57,8 @@ fi
                                     master_port: str,
                                     entry_script_path: str,
                                     submit_history_path: str,
-                                    health_check: bool
+                                    health_check: bool,
+                                    gpus_per_node: int = None
                                 ):
 
         dist_vars = self.generate_dist_setting(
@@ -80,6 +81,7 @@ fi
             # f"export ECS_NODE_RANK={node_rank}",
             f"export ECS_MASTER_ADDR=$MASTER_NODE_IP",
             f"export ECS_MASTER_PORT={master_port}",
+            *([f"export ECS_GPUS_PER_NODE={gpus_per_node}"] if gpus_per_node else []),
             f"/workspace/{entry_script_path}"
         ]
 
@@ -0,0 +1,327 @@
+import os
+import time
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeSerializer
+
+from aws_client_pool import AWSClientPool
+from ddb_metrics import StorageMetrics
+from storage_backend import StorageBackend, BATCH_WRITE_MAX_ITEMS, TRANSACT_WRITE_MAX_ITEMS
+
+
+DEFAULT_PROVISIONED_THROUGHPUT = {
+    'ReadCapacityUnits': 5,
+    'WriteCapacityUnits': 5
+}
+
+
+def _projection_kwargs(projection: Optional[List[str]]) -> Dict[str, Any]:
+    # Placeholders keep reserved words such as "status" usable in projections
+    if not projection:
+        return {}
+    names = {f"#p{i}": attribute_name for i, attribute_name in enumerate(projection)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+
+
+class DynamoDBBackend(StorageBackend):
+    """
+    Storage backend on Amazon DynamoDB.
+
+    Clients and tables come from AWSClientPool, so every call reuses the
+    process-wide session and its keep-alive connection pool. Item calls ask
+    for ReturnConsumedCapacity=TOTAL and report it to StorageMetrics.
+    """
+
+    def create_table_if_not_exists(self, table_name: str, primary_key: str,
+                                   global_secondary_indexes: Optional[Dict[str, Tuple[str, str]]] = None,
+                                   billing_mode: Optional[str] = None) -> bool:
+        dynamodb = AWSClientPool.get_client('dynamodb')
+        billing_mode = billing_mode or os.environ.get('DDB_BILLING_MODE', 'PROVISIONED')
+        global_secondary_indexes = global_secondary_indexes or {}
+
+        key_attributes = {primary_key}
+        for hash_key, range_key in global_secondary_indexes.values():
+            key_attributes.update([hash_key, range_key])
+
+        create_kwargs = {
+            'TableName': table_name,
+            'KeySchema': [
+                {
+                    'AttributeName': primary_key,
+                    'KeyType': 'HASH'
+                }
+            ],
+            'AttributeDefinitions': [
+                {
+                    'AttributeName': attribute_name,
+                    'AttributeType': 'S'
+                }
+                for attribute_name in sorted(key_attributes)
+            ],
+            'BillingMode': billing_mode
+        }
+
+        if billing_mode == 'PROVISIONED':
+            create_kwargs['ProvisionedThroughput'] = dict(DEFAULT_PROVISIONED_THROUGHPUT)
+
+        if global_secondary_indexes:
+            create_kwargs['GlobalSecondaryIndexes'] = [
+                self._gsi_definition(index_name, hash_key, range_key, billing_mode)
+                for index_name, (hash_key, range_key) in global_secondary_indexes.items()
+            ]
+
+        try:
+            response = dynamodb.create_table(**create_kwargs)
+            print(f"Creating table {table_name}...")
+            return True
+
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceInUseException':
+                print(f"Table {table_name} already exists")
+                return self._add_missing_indexes(table_name, global_secondary_indexes)
+            else:
+                print(f"Error creating table: {e}")
+                return False
+
+    @staticmethod
+    def _gsi_definition(index_name: str, hash_key: str, range_key: str,
+                        billing_mode: str) -> Dict[str, Any]:
+        index_def = {
+            'IndexName': index_name,
+            'KeySchema': [
+                {'AttributeName': hash_key, 'KeyType': 'HASH'},
+                {'AttributeName': range_key, 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+        if billing_mode == 'PROVISIONED':
+            index_def['ProvisionedThroughput'] = dict(DEFAULT_PROVISIONED_THROUGHPUT)
+        return index_def
+
+    def _add_missing_indexes(self, table_name: str,
+                             global_secondary_indexes: Dict[str, Tuple[str, str]]) -> bool:
+        if not global_secondary_indexes:
+            return True
+
+        dynamodb = AWSClientPool.get_client('dynamodb')
+        try:
+            table_desc = dynamodb.describe_table(TableName=table_name)['Table']
+            existing = {index['IndexName'] for index in table_desc.get('GlobalSecondaryIndexes', [])}
+            billing_mode = table_desc.get('BillingModeSummary', {}).get('BillingMode', 'PROVISIONED')
+
+            for index_name, (hash_key, range_key) in global_secondary_indexes.items():
+                if index_name in existing:
+                    continue
+                # DynamoDB accepts a single index creation per update_table call
+                dynamodb.update_table(
+                    TableName=table_name,
+                    AttributeDefinitions=[
+                        {'AttributeName': hash_key, 'AttributeType': 'S'},
+                        {'AttributeName': range_key, 'AttributeType': 'S'}
+                    ],
+                    GlobalSecondaryIndexUpdates=[
+                        {'Create': self._gsi_definition(index_name, hash_key, range_key, billing_mode)}
+                    ]
+                )
+                print(f"Creating index {index_name} on table {table_name}...")
+            return True
+        except ClientError as e:
+            print(f"Error adding indexes to table: {e}")
+            return False
+
+    def write_item(self, table_name: str, item: Dict[str, Any]) -> bool:
+        table = AWSClientPool.get_dynamodb_table(table_name)
+
+        try:
+            response = table.put_item(Item=item, ReturnConsumedCapacity='TOTAL')
+            StorageMetrics.record_consumed_capacity('write_item', response.get('ConsumedCapacity'))
+            return True
+        except ClientError as e:
+            print(f"Error writing to table: {e}")
+            return False
+
+    def batch_write_items(self, items_by_table: Dict[str, List[Dict[str, Any]]],
+                          max_retries: int = 8) -> bool:
+        dynamodb = AWSClientPool.get_resource('dynamodb')
+
+        put_requests = [
+            (table_name, {'PutRequest': {'Item': item}})
+            for table_name, items in items_by_table.items()
+            for item in items
+        ]
+
+        for start in range(0, len(put_requests), BATCH_WRITE_MAX_ITEMS):
+            request_items = {}
+            for table_name, request in put_requests[start:start + BATCH_WRITE_MAX_ITEMS]:
+                request_items.setdefault(table_name, []).append(request)
+
+            try:
+                for attempt in range(max_retries + 1):
+                    response = dynamodb.batch_write_item(RequestItems=request_items,
+                                                         ReturnConsumedCapacity='TOTAL')
+                    StorageMetrics.record_consumed_capacity('batch_write_items',
+                                                            response.get('ConsumedCapacity'))
+                    request_items = response.get('UnprocessedItems') or {}
+                    if not request_items:
+                        break
+                    time.sleep(min(0.05 * (2 ** attempt), 2.0))
+                else:
+                    unprocessed = sum(len(requests) for requests in request_items.values())
+                    print(f"Error batch writing: {unprocessed} items left unprocessed")
+                    return False
+            except ClientError as e:
+                print(f"Error batch writing to tables: {e}")
+                return False
+
+        return True
+
+    def transact_write_items(self, items_by_table: Dict[str, List[Dict[str, Any]]]) -> bool:
+        serializer = TypeSerializer()
+        transact_items = [
+            {
+                'Put': {
+                    'TableName': table_name,
+                    'Item': {k: serializer.serialize(v) for k, v in item.items()}
+                }
+            }
+            for table_name, items in items_by_table.items()
+            for item in items
+        ]
+
+        if len(transact_items) > TRANSACT_WRITE_MAX_ITEMS:
+            print(f"Error transact writing: {len(transact_items)} items exceed limit of {TRANSACT_WRITE_MAX_ITEMS}")
+            return False
+
+        dynamodb = AWSClientPool.get_client('dynamodb')
+        try:
+            response = dynamodb.transact_write_items(TransactItems=transact_items,
+                                                     ReturnConsumedCapacity='TOTAL')
+            StorageMetrics.record_consumed_capacity('transact_write_items',
+                                                    response.get('ConsumedCapacity'))
+            return True
+        except ClientError as e:
+            print(f"Error transact writing to tables: {e}")
+            return False
+
+    def get_item(self, table_name: str, key: Dict[str, str],
+                 projection: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        table = AWSClientPool.get_dynamodb_table(table_name)
+
+        try:
+            response = table.get_item(Key=key, ReturnConsumedCapacity='TOTAL',
+                                      **_projection_kwargs(projection))
+            StorageMetrics.record_consumed_capacity('get_item', response.get('ConsumedCapacity'))
+            return response.get('Item')
+        except ClientError as e:
+            print(f"Error retrieving item: {e}")
+            return None
+
+    def delete_item(self, table_name: str, key: Dict[str, str]) -> bool:
+        table = AWSClientPool.get_dynamodb_table(table_name)
+
+        try:
+            response = table.delete_item(Key=key, ReturnConsumedCapacity='TOTAL')
+            StorageMetrics.record_consumed_capacity('delete_item', response.get('ConsumedCapacity'))
+            return True
+        except ClientError as e:
+            print(f"Error deleting item: {e}")
+            return False
+
+    def update_item(self, table_name: str, key: Dict[str, str],
+                    update_expression: str,
+                    expression_values: Dict[str, Any]) -> bool:
+        table = AWSClientPool.get_dynamodb_table(table_name)
+
+        try:
+            response = table.update_item(
+                Key=key,
+                UpdateExpression=update_expression,
+                ExpressionAttributeValues=expression_values,
+                ReturnValues="UPDATED_NEW",
+                ReturnConsumedCapacity='TOTAL'
+            )
+            StorageMetrics.record_consumed_capacity('update_item', response.get('ConsumedCapacity'))
+            return True
+        except ClientError as e:
+            print(f"Error updating item: {e}")
+            return False
+
+    def iter_scan_pages(self, table_name: str, filter_expression: Optional[str] = None,
+                        expression_values: Optional[Dict[str, Any]] = None,
+                        page_size: Optional[int] = None,
+                        segment: Optional[int] = None,
+                        total_segments: Optional[int] = None,
+                        projection: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        table = AWSClientPool.get_dynamodb_table(table_name)
+        scan_kwargs = {'ReturnConsumedCapacity': 'TOTAL', **_projection_kwargs(projection)}
+        if filter_expression and expression_values:
+            scan_kwargs['FilterExpression'] = filter_expression
+            scan_kwargs['ExpressionAttributeValues'] = expression_values
+        if page_size:
+            scan_kwargs['Limit'] = page_size
+        if total_segments:
+            scan_kwargs['Segment'] = segment
+            scan_kwargs['TotalSegments'] = total_segments
+
+        try:
+            while True:
+                response = table.scan(**scan_kwargs)
+                StorageMetrics.record_consumed_capacity('scan', response.get('ConsumedCapacity'))
+                yield response.get('Items', [])
+
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    return
+                scan_kwargs['ExclusiveStartKey'] = last_key
+        except ClientError as e:
+            print(f"Error scanning table: {e}")
+            raise
+
+    def query(self, table_name: str, key_condition_expression: str,
+              expression_values: Dict[str, Any],
+              index_name: Optional[str] = None,
+              scan_index_forward: bool = True,
+              limit: Optional[int] = None,
+              projection: Optional[List[str]] = None) -> Optional[List[Dict[str, Any]]]:
+        table = AWSClientPool.get_dynamodb_table(table_name)
+        query_kwargs = {
+            'KeyConditionExpression': key_condition_expression,
+            'ExpressionAttributeValues': expression_values,
+            'ScanIndexForward': scan_index_forward,
+            'ReturnConsumedCapacity': 'TOTAL',
+            **_projection_kwargs(projection)
+        }
+        if index_name:
+            query_kwargs['IndexName'] = index_name
+
+        items = []
+        try:
+            while True:
+                if limit:
+                    query_kwargs['Limit'] = limit - len(items)
+                response = table.query(**query_kwargs)
+                StorageMetrics.record_consumed_capacity('query', response.get('ConsumedCapacity'))
+                items.extend(response.get('Items', []))
+
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key or (limit and len(items) >= limit):
+                    return items
+                query_kwargs['ExclusiveStartKey'] = last_key
+        except ClientError as e:
+            print(f"Error querying table: {e}")
+            return None
+
+    def delete_table(self, table_name: str) -> bool:
+        dynamodb = AWSClientPool.get_client('dynamodb')
+
+        try:
+            response = dynamodb.delete_table(TableName=table_name)
+            print(f"Deleting table {table_name}...")
+            return True
+        except ClientError as e:
+            print(f"Error deleting table: {e}")
+            return False
@@ -0,0 +1,584 @@
+import copy
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from aws_client_pool import AWSClientPool
+from storage_backend import StorageBackend, set_storage_backend
+
+
+# Service limits mirrored by the fakes
+DESCRIBE_MAX_ITEMS = 100
+LIST_MAX_RESULTS = 100
+LOG_EVENTS_MAX_COUNT = 10000
+LOG_EVENTS_MAX_BYTES = 1048576
+# CloudWatch counts 26 bytes of overhead per log event
+LOG_EVENT_OVERHEAD_BYTES = 26
+# Host ports the ECS agent reserves on every container instance
+ECS_AGENT_RESERVED_PORTS = (22, 2375, 2376, 51678, 51679)
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+class FaultInjector:
+    """
+    Latency and failure injection for the fake AWS services.
+
+    Every fake call sleeps latency_ms +/- jitter_ms and then fails with
+    probability failure_rate, raising a ClientError with failure_code.
+    operations overrides any of these settings per 'service' or
+    'service.operation', e.g. {'ecs.run_task': {'latency_ms': 300}}.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 failure_rate: float = 0.0, failure_code: str = 'ThrottlingException',
+                 operations: Optional[Dict[str, Dict[str, Any]]] = None,
+                 seed: Optional[int] = None):
+        self.defaults = {
+            'latency_ms': latency_ms,
+            'jitter_ms': jitter_ms,
+            'failure_rate': failure_rate,
+            'failure_code': failure_code,
+        }
+        self.operations = operations or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calls = Counter()
+        self._failures = Counter()
+
+    def _settings(self, service: str, operation: str) -> Dict[str, Any]:
+        settings = dict(self.defaults)
+        settings.update(self.operations.get(service, {}))
+        settings.update(self.operations.get(f"{service}.{operation}", {}))
+        return settings
+
+    def inject(self, service: str, operation: str) -> None:
+        settings = self._settings(service, operation)
+        with self._lock:
+            jitter = self._random.uniform(-settings['jitter_ms'], settings['jitter_ms'])
+            fail = self._random.random() < settings['failure_rate']
+            self._calls[f"{service}.{operation}"] += 1
+            if fail:
+                self._failures[f"{service}.{operation}"] += 1
+
+        delay_ms = max(0.0, settings['latency_ms'] + jitter)
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        if fail:
+            raise _client_error(settings['failure_code'], f"Injected {settings['failure_code']}", operation)
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """'service.operation' -> {'calls', 'failures'}"""
+        with self._lock:
+            return {name: {'calls': calls, 'failures': self._failures[name]}
+                    for name, calls in sorted(self._calls.items())}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._calls = Counter()
+            self._failures = Counter()
+
+
+class _FakePaginator:
+    def __init__(self, method: Callable, token_key: str = 'nextToken'):
+        self.method = method
+        self.token_key = token_key
+
+    def paginate(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        while True:
+            page = self.method(**kwargs)
+            yield page
+            if not page.get(self.token_key):
+                return
+            kwargs = dict(kwargs, **{self.token_key: page[self.token_key]})
+
+
+class FakeECSClient:
+    """
+    In-process stand-in for the ECS client calls of TaskManager and NodeManager.
+
+    Keeps container instances, task definitions and tasks of one cluster in
+    memory. Tasks are placed on instances with enough free GPUs, as taken
+    from the GPU resourceRequirements of the task definition, and none of
+    the task's host ports in use (the task definitions use host
+    networking), and hold both until stopped or finished. Responses follow the boto3 shapes, including
+    the `failures` list and the ECS page and batch size limits.
+    """
+
+    def __init__(self, cluster_name: str, node_names: List[str], gpus_per_node: int = 8,
+                 injector: Optional[FaultInjector] = None,
+                 region: str = 'us-east-1', account_id: str = '000000000000'):
+        self.cluster_name = cluster_name
+        self.injector = injector or FaultInjector()
+        self._arn_prefix = f"arn:aws:ecs:{region}:{account_id}"
+        self._lock = threading.RLock()
+        self._instances: Dict[str, Dict[str, Any]] = {}
+        self._task_defs: Dict[str, List[Dict[str, Any]]] = {}
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+
+        for node_name in node_names:
+            self.add_container_instance(node_name, gpus_per_node)
+
+    # Test helpers, not part of the ECS API
+
+    def add_container_instance(self, node_name: str, num_gpus: int = 8, status: str = 'ACTIVE') -> str:
+        inst_id = uuid.uuid4().hex
+        gpu_ids = [f"GPU-{inst_id[:8]}-{i}" for i in range(num_gpus)]
+        with self._lock:
+            self._instances[inst_id] = {
+                'id': inst_id,
+                'arn': f"{self._arn_prefix}:container-instance/{self.cluster_name}/{inst_id}",
+                'node_name': node_name,
+                'status': status,
+                'gpu_ids': gpu_ids,
+                'free_gpu_ids': list(gpu_ids),
+                'used_ports': set(ECS_AGENT_RESERVED_PORTS),
+            }
+        return inst_id
+
+    def set_instance_status(self, inst_id: str, status: str) -> None:
+        with self._lock:
+            self._instances[inst_id]['status'] = status
+
+    def finish_task(self, task_id: str, exit_code: int = 0) -> None:
+        """Stop a task as if its essential container exited with exit_code"""
+        with self._lock:
+            self._stop(self._tasks[task_id], 'EssentialContainerExited', exit_code, None)
+
+    def stop_all_tasks(self) -> None:
+        with self._lock:
+            for task in self._tasks.values():
+                if task['lastStatus'] != 'STOPPED':
+                    self._stop(task, 'UserInitiated', 137, None)
+
+    def clear_tasks(self) -> None:
+        with self._lock:
+            self.stop_all_tasks()
+            self._tasks = {}
+
+    # ECS API
+
+    def get_paginator(self, operation_name: str) -> _FakePaginator:
+        if operation_name == 'list_container_instances':
+            return _FakePaginator(self.list_container_instances)
+        if operation_name == 'list_tasks':
+            return _FakePaginator(self.list_tasks)
+        raise NotImplementedError(f"No fake paginator for {operation_name}")
+
+    def register_task_definition(self, **task_def) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'register_task_definition')
+        family = task_def['family']
+        with self._lock:
+            revisions = self._task_defs.setdefault(family, [])
+            registered = copy.deepcopy(task_def)
+            registered.update({
+                'taskDefinitionArn': f"{self._arn_prefix}:task-definition/{family}:{len(revisions) + 1}",
+                'revision': len(revisions) + 1,
+                'status': 'ACTIVE',
+                'registeredAt': time.time(),
+            })
+            revisions.append(registered)
+            return {'taskDefinition': copy.deepcopy(registered)}
+
+    def describe_task_definition(self, taskDefinition: str, **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'describe_task_definition')
+        with self._lock:
+            return {'taskDefinition': copy.deepcopy(self._resolve_task_def(taskDefinition, 'DescribeTaskDefinition'))}
+
+    def run_task(self, cluster: str, taskDefinition: str, count: int = 1,
+                 overrides: Optional[Dict[str, Any]] = None, **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'run_task')
+        if count > 10:
+            raise _client_error('InvalidParameterException', "count must be at most 10", 'RunTask')
+
+        with self._lock:
+            task_def = self._resolve_task_def(taskDefinition, 'RunTask')
+            gpus = self._gpus_required(task_def, overrides)
+            tasks, failures = [], []
+            for _ in range(count):
+                reasons = [self._placement_failure(inst, task_def, gpus) for inst in self._instances.values()]
+                instance = next((inst for inst, reason in zip(self._instances.values(), reasons)
+                                 if reason is None), None)
+                if instance is None:
+                    failures.append({'arn': None,
+                                     'reason': 'RESOURCE:PORTS' if 'RESOURCE:PORTS' in reasons else 'RESOURCE:GPU'})
+                    continue
+                tasks.append(self._new_task(task_def, instance, gpus, overrides))
+            return {'tasks': tasks, 'failures': failures}
+
+    def start_task(self, cluster: str, taskDefinition: str, containerInstances: List[str],
+                   overrides: Optional[Dict[str, Any]] = None, **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'start_task')
+        if len(containerInstances) > 10:
+            raise _client_error('InvalidParameterException',
+                                "containerInstances must have at most 10 items", 'StartTask')
+
+        with self._lock:
+            task_def = self._resolve_task_def(taskDefinition, 'StartTask')
+            gpus = self._gpus_required(task_def, overrides)
+            tasks, failures = [], []
+            for inst_ref in containerInstances:
+                instance = self._instances.get(inst_ref.split('/')[-1])
+                if instance is None:
+                    failures.append({'arn': inst_ref, 'reason': 'MISSING'})
+                    continue
+                reason = self._placement_failure(instance, task_def, gpus)
+                if reason is not None:
+                    failures.append({'arn': instance['arn'], 'reason': reason})
+                else:
+                    tasks.append(self._new_task(task_def, instance, gpus, overrides))
+            return {'tasks': tasks, 'failures': failures}
+
+    def stop_task(self, cluster: str, task: str, reason: Optional[str] = None, **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'stop_task')
+        with self._lock:
+            stored = self._tasks.get(task.split('/')[-1])
+            if stored is None:
+                raise _client_error('InvalidParameterException', "The referenced task was not found.", 'StopTask')
+            if stored['lastStatus'] != 'STOPPED':
+                self._stop(stored, 'UserInitiated', 137, reason)
+            return {'task': copy.deepcopy(stored)}
+
+    def describe_tasks(self, cluster: str, tasks: List[str], **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'describe_tasks')
+        if len(tasks) > DESCRIBE_MAX_ITEMS:
+            raise _client_error('InvalidParameterException',
+                                f"tasks can have at most {DESCRIBE_MAX_ITEMS} items", 'DescribeTasks')
+        with self._lock:
+            found, failures = [], []
+            for task_ref in tasks:
+                stored = self._tasks.get(task_ref.split('/')[-1])
+                if stored is None:
+                    failures.append({'arn': task_ref, 'reason': 'MISSING'})
+                else:
+                    found.append(copy.deepcopy(stored))
+            return {'tasks': found, 'failures': failures}
+
+    def list_tasks(self, cluster: str, desiredStatus: str = 'RUNNING',
+                   nextToken: Optional[str] = None, maxResults: int = LIST_MAX_RESULTS, **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'list_tasks')
+        with self._lock:
+            arns = [task['taskArn'] for task in self._tasks.values() if task['desiredStatus'] == desiredStatus]
+        return self._page('taskArns', arns, nextToken, maxResults)
+
+    def list_container_instances(self, cluster: str, nextToken: Optional[str] = None,
+                                 maxResults: int = LIST_MAX_RESULTS, **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'list_container_instances')
+        with self._lock:
+            arns = [instance['arn'] for instance in self._instances.values()]
+        return self._page('containerInstanceArns', arns, nextToken, maxResults)
+
+    def describe_container_instances(self, cluster: str, containerInstances: List[str], **_) -> Dict[str, Any]:
+        self.injector.inject('ecs', 'describe_container_instances')
+        if len(containerInstances) > DESCRIBE_MAX_ITEMS:
+            raise _client_error('InvalidParameterException',
+                                f"containerInstances can have at most {DESCRIBE_MAX_ITEMS} items",
+                                'DescribeContainerInstances')
+        with self._lock:
+            described, failures = [], []
+            for inst_ref in containerInstances:
+                instance = self._instances.get(inst_ref.split('/')[-1])
+                if instance is None:
+                    failures.append({'arn': inst_ref, 'reason': 'MISSING'})
+                    continue
+                described.append({
+                    'containerInstanceArn': instance['arn'],
+                    'status': instance['status'],
+                    'attributes': [{'name': 'Node', 'value': instance['node_name']}],
+                    'registeredResources': [
+                        {'name': 'GPU', 'type': 'STRINGSET', 'stringSetValue': list(instance['gpu_ids'])},
+                        {'name': 'PORTS', 'type': 'STRINGSET',
+                         'stringSetValue': [str(port) for port in ECS_AGENT_RESERVED_PORTS]}
+                    ],
+                    # Like ECS, PORTS lists the host ports in use, not the free ones
+                    'remainingResources': [
+                        {'name': 'GPU', 'type': 'STRINGSET', 'stringSetValue': list(instance['free_gpu_ids'])},
+                        {'name': 'PORTS', 'type': 'STRINGSET',
+                         'stringSetValue': [str(port) for port in sorted(instance['used_ports'])]}
+                    ],
+                    'runningTasksCount': sum(1 for task in self._tasks.values()
+                                             if task['containerInstanceArn'] == instance['arn']
+                                             and task['lastStatus'] != 'STOPPED'),
+                })
+            return {'containerInstances': described, 'failures': failures}
+
+    # Internals
+
+    @staticmethod
+    def _page(key: str, items: List[str], next_token: Optional[str], max_results: int) -> Dict[str, Any]:
+        start = int(next_token) if next_token else 0
+        end = start + min(max_results, LIST_MAX_RESULTS)
+        page = {key: items[start:end]}
+        if end < len(items):
+            page['nextToken'] = str(end)
+        return page
+
+    def _resolve_task_def(self, ref: str, operation: str) -> Dict[str, Any]:
+        family_revision = ref.split('/')[-1]
+        family, _, revision = family_revision.partition(':')
+        revisions = self._task_defs.get(family)
+        if revisions:
+            if not revision:
+                return revisions[-1]
+            if revision.isdigit() and 0 < int(revision) <= len(revisions):
+                return revisions[int(revision) - 1]
+        raise _client_error('ClientException', "Unable to describe task definition.", operation)
+
+    @staticmethod
+    def _gpus_required(task_def: Dict[str, Any], overrides: Optional[Dict[str, Any]]) -> int:
+        container_overrides = {override.get('name'): override
+                               for override in (overrides or {}).get('containerOverrides', [])}
+        gpus = 0
+        for container in task_def.get('containerDefinitions', []):
+            requirements = container_overrides.get(container.get('name'), {}).get('resourceRequirements') \
+                or container.get('resourceRequirements', [])
+            gpus += sum(int(req['value']) for req in requirements if req.get('type') == 'GPU')
+        return gpus
+
+    @staticmethod
+    def _host_ports(container: Dict[str, Any]) -> List[int]:
+        # Host networking binds hostPort, which defaults to containerPort
+        return [int(mapping.get('hostPort') or mapping['containerPort'])
+                for mapping in container.get('portMappings', [])
+                if mapping.get('hostPort') or mapping.get('containerPort')]
+
+    def _placement_failure(self, instance: Dict[str, Any], task_def: Dict[str, Any], gpus: int) -> Optional[str]:
+        """ECS failure reason of placing a task on the instance, None if it fits"""
+        if instance['status'] != 'ACTIVE':
+            return 'INACTIVE'
+        if len(instance['free_gpu_ids']) < gpus:
+            return 'RESOURCE:GPU'
+        ports = [port for container in task_def.get('containerDefinitions', [])
+                 for port in self._host_ports(container)]
+        if len(set(ports)) < len(ports) or instance['used_ports'] & set(ports):
+            return 'RESOURCE:PORTS'
+        return None
+
+    def _new_task(self, task_def: Dict[str, Any], instance: Dict[str, Any],
+                  gpus: int, overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        task_id = uuid.uuid4().hex
+        gpu_ids = instance['free_gpu_ids'][:gpus]
+        del instance['free_gpu_ids'][:gpus]
+        task_arn = f"{self._arn_prefix}:task/{self.cluster_name}/{task_id}"
+        task = {
+            'taskArn': task_arn,
+            'clusterArn': f"{self._arn_prefix}:cluster/{self.cluster_name}",
+            'containerInstanceArn': instance['arn'],
+            'taskDefinitionArn': task_def['taskDefinitionArn'],
+            'lastStatus': 'RUNNING',
+            'desiredStatus': 'RUNNING',
+            'createdAt': time.time(),
+            'overrides': copy.deepcopy(overrides or {'containerOverrides': []}),
+            'containers': [
+                {
+                    'taskArn': task_arn,
+                    'name': container.get('name'),
+                    'lastStatus': 'RUNNING',
+                    'gpuIds': gpu_ids,
+                    'networkBindings': [{'bindIP': '0.0.0.0', 'containerPort': port, 'hostPort': port,
+                                         'protocol': 'tcp'}
+                                        for port in self._host_ports(container)],
+                }
+                for container in task_def.get('containerDefinitions', [])
+            ],
+        }
+        instance['used_ports'].update(binding['hostPort'] for container in task['containers']
+                                      for binding in container['networkBindings'])
+        self._tasks[task_id] = task
+        return copy.deepcopy(task)
+
+    def _stop(self, task: Dict[str, Any], stop_code: str, exit_code: int, reason: Optional[str]) -> None:
+        task.update({
+            'lastStatus': 'STOPPED',
+            'desiredStatus': 'STOPPED',
+            'stopCode': stop_code,
+            'stoppedReason': reason or stop_code,
+            'stoppedAt': time.time(),
+        })
+        for container in task['containers']:
+            container.update({'lastStatus': 'STOPPED', 'exitCode': exit_code})
+
+        instance = self._instances.get(task['containerInstanceArn'].split('/')[-1])
+        if instance is not None:
+            released = [gpu_id for container in task['containers'] for gpu_id in container.get('gpuIds', [])]
+            instance['free_gpu_ids'].extend(gpu_id for gpu_id in dict.fromkeys(released)
+                                            if gpu_id not in instance['free_gpu_ids'])
+            instance['used_ports'].difference_update(binding['hostPort'] for container in task['containers']
+                                                     for binding in container.get('networkBindings', []))
+
+
+class FakeLogsClient:
+    """
+    In-process stand-in for CloudWatch Logs get-log-events.
+
+    Pages follow the service limits (10,000 events or 1 MB). Without a
+    token the newest events are returned, like the real call.
+    """
+
+    def __init__(self, injector: Optional[FaultInjector] = None):
+        self.injector = injector or FaultInjector()
+        self._lock = threading.Lock()
+        self._streams: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+
+    def put_messages(self, log_group: str, log_stream: str, messages: List[str]) -> None:
+        """Test helper: append messages to a log stream"""
+        now = int(time.time() * 1000)
+        with self._lock:
+            events = self._streams.setdefault((log_group, log_stream), [])
+            events.extend({'timestamp': now, 'message': message, 'ingestionTime': now}
+                          for message in messages)
+
+    def get_log_events(self, logGroupName: str, logStreamName: str,
+                       startFromHead: bool = False, nextToken: Optional[str] = None,
+                       limit: int = LOG_EVENTS_MAX_COUNT, **_) -> Dict[str, Any]:
+        self.injector.inject('logs', 'get_log_events')
+        with self._lock:
+            events = self._streams.get((logGroupName, logStreamName))
+            if events is None:
+                raise _client_error('ResourceNotFoundException',
+                                    "The specified log stream does not exist.", 'GetLogEvents')
+            events = list(events)
+
+        max_count = min(limit, LOG_EVENTS_MAX_COUNT)
+        direction, _, position = (nextToken or ('f/0' if startFromHead else f'b/{len(events)}')).partition('/')
+        position = int(position)
+
+        if direction == 'f':
+            start, end, size = position, position, 0
+            while end < len(events) and end - start < max_count:
+                size += len(events[end]['message'].encode()) + LOG_EVENT_OVERHEAD_BYTES
+                if size > LOG_EVENTS_MAX_BYTES:
+                    break
+                end += 1
+        else:
+            start, end, size = position, position, 0
+            while start > 0 and end - start < max_count:
+                size += len(events[start - 1]['message'].encode()) + LOG_EVENT_OVERHEAD_BYTES
+                if size > LOG_EVENTS_MAX_BYTES:
+                    break
+                start -= 1
+
+        return {
+            'events': copy.deepcopy(events[start:end]),
+            'nextForwardToken': f"f/{end}",
+            'nextBackwardToken': f"b/{start}",
+        }
+
+
+class FaultInjectingBackend(StorageBackend):
+    """
+    Storage backend wrapper that injects latency and failures before each
+    call of the wrapped backend, as the 'dynamodb' service. Injected
+    failures follow the backend contract: writes return False, reads None.
+    """
+
+    def __init__(self, backend: StorageBackend, injector: Optional[FaultInjector] = None):
+        self.backend = backend
+        self.injector = injector or FaultInjector()
+
+    def _call(self, operation: str, error_result: Any, call: Callable[[], Any]) -> Any:
+        try:
+            self.injector.inject('dynamodb', operation)
+        except ClientError as e:
+            print(f"Error in {operation}: {str(e)}")
+            return error_result
+        return call()
+
+    def create_table_if_not_exists(self, table_name, primary_key, global_secondary_indexes=None, billing_mode=None):
+        return self._call('create_table', False, lambda: self.backend.create_table_if_not_exists(
+            table_name, primary_key, global_secondary_indexes, billing_mode))
+
+    def write_item(self, table_name, item):
+        return self._call('put_item', False, lambda: self.backend.write_item(table_name, item))
+
+    def batch_write_items(self, items_by_table, max_retries=8):
+        return self._call('batch_write_item', False,
+                          lambda: self.backend.batch_write_items(items_by_table, max_retries))
+
+    def transact_write_items(self, items_by_table):
+        return self._call('transact_write_items', False,
+                          lambda: self.backend.transact_write_items(items_by_table))
+
+    def get_item(self, table_name, key, projection=None):
+        return self._call('get_item', None, lambda: self.backend.get_item(table_name, key, projection))
+
+    def delete_item(self, table_name, key):
+        return self._call('delete_item', False, lambda: self.backend.delete_item(table_name, key))
+
+    def update_item(self, table_name, key, update_expression, expression_values):
+        return self._call('update_item', False, lambda: self.backend.update_item(
+            table_name, key, update_expression, expression_values))
+
+    def iter_scan_pages(self, table_name, filter_expression=None, expression_values=None,
+                        page_size=None, segment=None, total_segments=None, projection=None):
+        pages = self.backend.iter_scan_pages(table_name, filter_expression, expression_values,
+                                             page_size, segment, total_segments, projection)
+        while True:
+            # Each page is one Scan call, a failing one raises like the real backend
+            self.injector.inject('dynamodb', 'scan')
+            page = next(pages, None)
+            if page is None:
+                return
+            yield page
+
+    def query(self, table_name, key_condition_expression, expression_values, index_name=None,
+              scan_index_forward=True, limit=None, projection=None):
+        return self._call('query', None, lambda: self.backend.query(
+            table_name, key_condition_expression, expression_values, index_name,
+            scan_index_forward, limit, projection))
+
+    def delete_table(self, table_name):
+        return self._call('delete_table', False, lambda: self.backend.delete_table(table_name))
+
+
+class FakeAWS:
+    """Handles of the installed fakes, see install_fakes"""
+
+    def __init__(self, ecs: FakeECSClient, logs: FakeLogsClient,
+                 storage: Optional[FaultInjectingBackend], injector: FaultInjector):
+        self.ecs = ecs
+        self.logs = logs
+        self.storage = storage
+        self.injector = injector
+
+    def uninstall(self) -> None:
+        AWSClientPool.set_client_override('ecs', None)
+        AWSClientPool.set_client_override('logs', None)
+        if self.storage is not None:
+            set_storage_backend(None)
+
+
+def install_fakes(cluster_name: str, node_names: List[str], gpus_per_node: int = 8,
+                  injector: Optional[FaultInjector] = None,
+                  storage_backend: Optional[StorageBackend] = None,
+                  fake_storage: bool = True) -> FakeAWS:
+    """
+    Route the console's ECS, CloudWatch Logs and job/task storage calls to
+    in-process fakes sharing one FaultInjector.
+
+    Storage goes to storage_backend, an in-memory SQLite backend by default,
+    wrapped in FaultInjectingBackend. Install before the first NodeManager()
+    call, since NodeManager keeps the ECS client it was created with.
+    """
+    injector = injector or FaultInjector()
+    ecs = FakeECSClient(cluster_name, node_names, gpus_per_node, injector)
+    logs = FakeLogsClient(injector)
+    AWSClientPool.set_client_override('ecs', ecs)
+    AWSClientPool.set_client_override('logs', logs)
+
+    storage = None
+    if fake_storage:
+        if storage_backend is None:
+            from sqlite_backend import SQLiteBackend
+            storage_backend = SQLiteBackend(':memory:')
+        storage = FaultInjectingBackend(storage_backend, injector)
+        set_storage_backend(storage)
+
+    return FakeAWS(ecs, logs, storage, injector)
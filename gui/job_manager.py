@@ -3,11 +3,28 @@ from datetime import datetime
 from typing import List, Dict, Optional
 
 import boto3, os
+import atexit
+import heapq
+import threading
+import time
 from datetime import datetime
-from ddb_handler import DynamoDBHandler
-from task_manager import TaskManager
+from ddb_handler import DynamoDBHandler, TRANSACT_WRITE_MAX_ITEMS
+from ddb_cache import DynamoDBReadCache
+from job_status_buffer import JobStatusWriteBuffer
+from task_manager import TaskManager, STOP_WAIT_TIMEOUT
+from launch_tracer import launch_span
 
 
+# GSI used to read the latest jobs of a cluster without a full-table scan
+JOBS_BY_CLUSTER_INDEX = 'cluster_name-created_at-index'
+LATEST_JOBS_LIMIT = 5
+# Attributes rendered in the job table, created_at orders the scan fallback
+JOB_DISPLAY_ATTRIBUTES = ['job_id', 'job_timestamp', 'job_status', 'num_nodes',
+                          'submittd_ecs_task_ids', 'created_at']
+
+_status_buffer: Optional[JobStatusWriteBuffer] = None
+_status_buffer_lock = threading.Lock()
+
 
 @dataclass
 class Job:
@@ -18,6 +35,26 @@ class Job:
     task_ids: List[str] = None  # List to store task IDs for each node
 
 
+@dataclass
+class TaskCancelResult:
+    task_id: str
+    node_name: str
+    was_running: bool
+    stop_requested: bool = False
+    # lastStatus after waiting, None if not waited for or unknown to ECS
+    last_status: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class JobCancelResult:
+    job_id: str
+    tasks: List[TaskCancelResult]
+    elapsed_seconds: float
+    # Whether every stopped task reported STOPPED, None if not waited for
+    all_stopped: Optional[bool] = None
+
+
 # def singleton(cls):
 #     instances = {}
 #     def get_instance(*args, **kwargs):
@@ -36,8 +73,85 @@ class JobManager:
     #     self.jobs.append(job)
 
     @staticmethod
-    def update_job_status(job_id: str, job_status: str) -> bool:
-        """Update node status in DynamoDB"""
+    def create_job_table_if_not_exists() -> bool:
+        """Create the job table with its cluster_name + created_at index"""
+        return DynamoDBHandler.create_table_if_not_exists(
+            os.environ['JOB_MANAGE_TABLE'],
+            'job_id',
+            global_secondary_indexes={
+                JOBS_BY_CLUSTER_INDEX: ('cluster_name', 'created_at')
+            }
+        )
+
+    @staticmethod
+    def configure_read_cache() -> None:
+        """
+        Enable the read-through cache for job and task lookups.
+        Job rows change only on state transitions written by this console,
+        which invalidate the cache, so the TTL only bounds staleness from
+        writers outside this process.
+        """
+        DynamoDBReadCache.set_table_ttl(os.environ['JOB_MANAGE_TABLE'],
+                                        float(os.environ.get('DDB_CACHE_TTL_JOBS', 10)))
+        DynamoDBReadCache.set_table_ttl(os.environ['TASK_MANAGE_TABLE'],
+                                        float(os.environ.get('DDB_CACHE_TTL_TASKS', 300)))
+
+    @staticmethod
+    def _get_status_buffer() -> Optional[JobStatusWriteBuffer]:
+        """
+        Lazily create the process-wide write-behind buffer for job status.
+        JOB_STATUS_COALESCE_WINDOW (seconds) sets the window, 0 writes through.
+        """
+        global _status_buffer
+        window = float(os.environ.get('JOB_STATUS_COALESCE_WINDOW', 0.5))
+        if window <= 0:
+            return None
+
+        if _status_buffer is None:
+            with _status_buffer_lock:
+                if _status_buffer is None:
+                    _status_buffer = JobStatusWriteBuffer(JobManager._write_job_status, window)
+                    atexit.register(_status_buffer.shutdown)
+        return _status_buffer
+
+    @staticmethod
+    def update_job_status(job_id: str, job_status: str) -> Optional[bool]:
+        """
+        Update job status in DynamoDB.
+        Writes go through the write-behind buffer, so repeated updates of
+        the same job within the coalescing window become one update_item.
+
+        Returns:
+            Optional[bool]: Whether the write succeeded when written through,
+            None when buffered, as the write has not happened yet; failed
+            flushes are logged and counted in get_status_write_metrics
+        """
+        status_buffer = JobManager._get_status_buffer()
+        if status_buffer is None:
+            return JobManager._write_job_status(job_id, job_status, datetime.now().isoformat())
+
+        try:
+            status_buffer.enqueue(job_id, job_status)
+            return None
+        except RuntimeError:
+            # Buffer already shut down, e.g. during interpreter exit
+            return JobManager._write_job_status(job_id, job_status, datetime.now().isoformat())
+
+    @staticmethod
+    def flush_job_status_updates() -> None:
+        """Write all buffered job status updates now"""
+        status_buffer = JobManager._get_status_buffer()
+        if status_buffer is not None:
+            status_buffer.flush()
+
+    @staticmethod
+    def get_status_write_metrics() -> Dict:
+        """Coalescing counters and flush latency of job status writes"""
+        status_buffer = JobManager._get_status_buffer()
+        return status_buffer.get_metrics() if status_buffer is not None else {}
+
+    @staticmethod
+    def _write_job_status(job_id: str, job_status: str, updated_at: str) -> bool:
         try:
             success = DynamoDBHandler.update_item(
                 table_name=os.environ['JOB_MANAGE_TABLE'],
@@ -45,7 +159,7 @@ class JobManager:
                 update_expression="SET job_status = :s, updated_at = :t",
                 expression_values={
                     ':s': job_status,
-                    ':t': datetime.now().isoformat()
+                    ':t': updated_at
                 }
             )
             if success:
@@ -58,88 +172,192 @@ class JobManager:
 
 
     @staticmethod
-    def gather_task_and_record_job(job_id, job_timestamp, num_nodes, assigned_nodes, container_inst_ids, ecs_task_ids, JOB_STATUS):
-        
-        DynamoDBHandler.write_item(table_name = os.environ['JOB_MANAGE_TABLE'], 
-                                    item = {
-                                        'job_id': job_id,
-                                        'job_timestamp': job_timestamp,
-                                        'cluster_name': os.environ['CLUSTER_NAME'],
-                                        'num_nodes': num_nodes,
-                                        'assigned_nodes': assigned_nodes,
-                                        'submittd_container_inst_ids': container_inst_ids,
-                                        'submittd_ecs_task_ids': ecs_task_ids,
-                                        'updated_at': datetime.now().isoformat(),
-                                        'created_at': datetime.now().isoformat(),
-                                        'retry': 0,
-                                        # 'job_status': 'IN_PROGRESS',
-                                        'job_status': JOB_STATUS
-                                    }
-                                )
+    def build_job_item(job_id, job_timestamp, num_nodes, assigned_nodes, container_inst_ids, ecs_task_ids, JOB_STATUS):
+        return {
+                'job_id': job_id,
+                'job_timestamp': job_timestamp,
+                'cluster_name': os.environ['CLUSTER_NAME'],
+                'num_nodes': num_nodes,
+                'assigned_nodes': assigned_nodes,
+                'submittd_container_inst_ids': container_inst_ids,
+                'submittd_ecs_task_ids': ecs_task_ids,
+                'updated_at': datetime.now().isoformat(),
+                'created_at': datetime.now().isoformat(),
+                'retry': 0,
+                # 'job_status': 'IN_PROGRESS',
+                'job_status': JOB_STATUS
+            }
+
+
+    @staticmethod
+    def transactional_writes_enabled() -> bool:
+        return os.environ.get('DDB_TRANSACTIONAL_WRITES', 'false').lower() == 'true'
+
+
+    @staticmethod
+    def gather_task_and_record_job(job_id, job_timestamp, num_nodes, assigned_nodes, container_inst_ids, ecs_task_ids, JOB_STATUS, task_items=None):
+        """
+        Write the job row, together with its task rows when task_items is given.
+        With DDB_TRANSACTIONAL_WRITES=true the job and all tasks are committed
+        atomically in one TransactWriteItems call, otherwise they go through
+        batched BatchWriteItem calls with the job row last.
+        """
+        with launch_span('ddb.record_job'):
+            job_table = os.environ['JOB_MANAGE_TABLE']
+            job_item = JobManager.build_job_item(
+                job_id, job_timestamp, num_nodes, assigned_nodes, container_inst_ids, ecs_task_ids, JOB_STATUS
+            )
+
+            if not task_items:
+                return DynamoDBHandler.write_item(table_name = job_table, item = job_item)
 
-        return
+            task_table = os.environ['TASK_MANAGE_TABLE']
+            if JobManager.transactional_writes_enabled():
+                if len(task_items) + 1 <= TRANSACT_WRITE_MAX_ITEMS:
+                    return DynamoDBHandler.transact_write_items({
+                        task_table: task_items,
+                        job_table: [job_item]
+                    })
+                print(f"Job {job_id} has too many tasks for one transaction, using batch writes")
 
+            if not DynamoDBHandler.batch_write_items({task_table: task_items}):
+                return False
+            return DynamoDBHandler.write_item(table_name = job_table, item = job_item)
+
+
+    @staticmethod
+    def record_launch_timeline(job_id: str, timeline: Dict) -> bool:
+        """Store the launch span timeline (see launch_tracer) on an existing job record"""
+        try:
+            return DynamoDBHandler.update_item(
+                table_name=os.environ['JOB_MANAGE_TABLE'],
+                key={'job_id': job_id},
+                update_expression="SET launch_timeline = :t",
+                expression_values={':t': timeline}
+            )
+        except Exception as e:
+            print(f"Error recording launch timeline of job {job_id}: {str(e)}")
+            return False
 
+    @staticmethod
+    def get_launch_timeline(job_id: str) -> Optional[Dict]:
+        resp = DynamoDBHandler.get_item(os.environ['JOB_MANAGE_TABLE'],
+                                        {'job_id': job_id},
+                                        projection=['launch_timeline'])
+        return resp.get('launch_timeline') if resp else None
 
     @staticmethod
     def get_job_associated_tasks_from_ddb(job_id: str):
         resp = DynamoDBHandler.get_item(os.environ['JOB_MANAGE_TABLE'], 
-                                        {'job_id': job_id})
+                                        {'job_id': job_id},
+                                        use_cache=True,
+                                        projection=['submittd_ecs_task_ids', 'assigned_nodes'])
         
         return dict(zip(resp['submittd_ecs_task_ids'], resp['assigned_nodes']))
 
     @staticmethod
-    def stop_job(job_id: str) -> bool:
+    def cancel_job(job_id: str, wait: bool = False,
+                   wait_timeout: float = STOP_WAIT_TIMEOUT) -> JobCancelResult:
+        """
+        Stop all running tasks of a job: one bulk describe, concurrent
+        stop-task calls and a single USER_STOPPED status write.
+
+        Args:
+            job_id: Job to cancel
+            wait: Also wait until every stopped task reports STOPPED
+            wait_timeout: Seconds to wait when wait is set
+
+        Returns:
+            JobCancelResult: Per-task results and the total time to cancel
+        """
+        start = time.perf_counter()
         job_tasks = JobManager.get_job_associated_tasks_from_ddb(job_id)
-        
-        for taskid in job_tasks.keys():
-            try:
-                if TaskManager.is_task_running(taskid):
-                    resp = TaskManager.stop_ecs_task(taskid)
-
-                    # if resp['task']['stopCode'] == "EssentialContainerExited":
-                    #     NodeManager().update_node_status(job_tasks[taskid], UserNodeStatus.AVAILABLE.value)
-                    # else:
-                    #     NodeManager().update_node_status(job_tasks[taskid], UserNodeStatus.UNKNOWN.value)
-
-                    # print('STOP RESP: ', resp)
-
-                    JobManager.update_job_status(job_id, 'USER_STOPPED')
-                else:
-                    print(f"Task {taskid} is not running")
-
-            except Exception as e:
-                # Keep stop other tasks
-                print(f"Error stopping tasks {taskid}: {str(e)}")
-                # NodeManager().update_node_status(job_tasks[taskid], UserNodeStatus.UNKNOWN.value)
-            
-        
+        running_tasks = TaskManager.get_running_tasks(list(job_tasks.keys()))
+
+        tasks = {
+            taskid: TaskCancelResult(task_id=taskid,
+                                     node_name=node_name,
+                                     was_running=running_tasks[taskid])
+            for taskid, node_name in job_tasks.items()
+        }
+        for taskid, task in tasks.items():
+            if not task.was_running:
+                print(f"Task {taskid} is not running")
+
+        stop_errors = TaskManager.stop_tasks_bulk(
+            [taskid for taskid, task in tasks.items() if task.was_running],
+            reason=f"Job {job_id} stopped by user"
+        )
+        for taskid, error in stop_errors.items():
+            tasks[taskid].stop_requested = error is None
+            tasks[taskid].error = error
+
+        stopped_ids = [taskid for taskid, task in tasks.items() if task.stop_requested]
+        if stopped_ids:
+            JobManager.update_job_status(job_id, 'USER_STOPPED')
+            # Make the new status visible to the refresh that follows the stop
+            JobManager.flush_job_status_updates()
+
+        all_stopped = None
+        if wait and stopped_ids:
+            last_statuses = TaskManager.wait_tasks_stopped(stopped_ids, timeout=wait_timeout)
+            for taskid, last_status in last_statuses.items():
+                tasks[taskid].last_status = last_status
+            all_stopped = all(last_status in (None, 'STOPPED') for last_status in last_statuses.values())
+
+        result = JobCancelResult(job_id=job_id,
+                                 tasks=list(tasks.values()),
+                                 elapsed_seconds=round(time.perf_counter() - start, 3),
+                                 all_stopped=all_stopped)
+        print(f"Cancelled job {job_id}: {len(stopped_ids)} of {len(tasks)} tasks stopped "
+              f"in {result.elapsed_seconds}s")
+        return result
 
+    @staticmethod
+    def stop_job(job_id: str) -> bool:
+        JobManager.cancel_job(job_id)
         return True
 
+    @staticmethod
+    def get_latest_jobs(limit: int = LATEST_JOBS_LIMIT,
+                        projection: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Query the latest jobs of this cluster through the created_at index.
+        Falls back to a streamed scan while the index is missing or backfilling.
+        A projection, if given, must include created_at for the fallback order.
+        """
+        latest_jobs = DynamoDBHandler.query(
+            os.environ['JOB_MANAGE_TABLE'],
+            key_condition_expression="cluster_name = :c",
+            expression_values={':c': os.environ['CLUSTER_NAME']},
+            index_name=JOBS_BY_CLUSTER_INDEX,
+            scan_index_forward=False,
+            limit=limit,
+            use_cache=True,
+            projection=projection
+        )
+        if latest_jobs is not None:
+            return latest_jobs
+
+        print(f"Index {JOBS_BY_CLUSTER_INDEX} unavailable, scanning job table")
+        # Use created_at if available, otherwise fall back to job_timestamp
+        return heapq.nlargest(
+            limit,
+            DynamoDBHandler.iter_scan(os.environ['JOB_MANAGE_TABLE'], projection=projection),
+            key=lambda job: job.get('created_at', job.get('job_timestamp', ''))
+        )
+
     @staticmethod
     def get_jobs_data() -> List[List[str]]:
         """
-        Retrieves the latest 10 jobs data from DynamoDB table using job_id as primary key and status as a key field.
+        Retrieves the latest jobs data from DynamoDB, newest first.
         Returns formatted job data for display.
         """
         try:
-            # Get all jobs from DynamoDB table
-            jobs_data = DynamoDBHandler.scan_table(os.environ['JOB_MANAGE_TABLE'])
-            
-            if not jobs_data:
+            latest_jobs = JobManager.get_latest_jobs(projection=JOB_DISPLAY_ATTRIBUTES)
+
+            if not latest_jobs:
                 return []
-            
-            # Sort jobs by timestamp (most recent first)
-            # Use created_at if available, otherwise fall back to job_timestamp
-            sorted_jobs = sorted(
-                jobs_data,
-                key=lambda job: job.get('created_at', job.get('job_timestamp', '')),
-                reverse=True
-            )
-            
-            # Take only the latest N jobs
-            latest_jobs = sorted_jobs[:5]
 
             # Format the data for display
             return [
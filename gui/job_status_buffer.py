@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Any, Tuple
+
+
+LATENCY_SAMPLES = 1024
+
+
+class JobStatusWriteBuffer:
+    """
+    Write-behind buffer that coalesces job status updates.
+
+    Updates for the same job_id arriving within `window_seconds` of the
+    first pending one collapse into a single write carrying the latest
+    status and updated_at. A daemon thread flushes entries once their
+    window has elapsed; flush() writes everything immediately and is called
+    on shutdown so no update is lost.
+
+    Args:
+        writer: Callable(job_id, job_status, updated_at) -> bool doing the write
+        window_seconds: Coalescing window per job
+    """
+
+    def __init__(self, writer: Callable[[str, str, str], bool], window_seconds: float = 0.5):
+        self.writer = writer
+        self.window_seconds = window_seconds
+
+        # job_id -> (job_status, updated_at, first enqueue time)
+        self._pending: Dict[str, Tuple[str, str, float]] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+        self._metrics = {
+            'enqueued': 0,
+            'coalesced': 0,
+            'writes': 0,
+            'failed_writes': 0,
+        }
+        # Seconds from first enqueue to write completion, and write durations
+        self._flush_latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._write_durations = deque(maxlen=LATENCY_SAMPLES)
+
+    def enqueue(self, job_id: str, job_status: str) -> None:
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Job status buffer is shut down")
+
+            pending = self._pending.get(job_id)
+            first_enqueued = pending[2] if pending else time.monotonic()
+            self._pending[job_id] = (job_status, datetime.now().isoformat(), first_enqueued)
+
+            self._metrics['enqueued'] += 1
+            if pending:
+                self._metrics['coalesced'] += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='job-status-flusher', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _take_due(self, now: float, force: bool) -> Dict[str, Tuple[str, str, float]]:
+        due = {
+            job_id: entry for job_id, entry in self._pending.items()
+            if force or now - entry[2] >= self.window_seconds
+        }
+        for job_id in due:
+            del self._pending[job_id]
+        return due
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._pending:
+                        oldest = min(entry[2] for entry in self._pending.values())
+                        wait = oldest + self.window_seconds - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._stopped:
+                    return
+            self._flush_pending(force=False)
+
+    def _flush_pending(self, force: bool) -> None:
+        # Taking and writing under one lock keeps concurrent flushes ordered,
+        # so an older status never overwrites a newer one
+        with self._flush_lock:
+            with self._cond:
+                due = self._take_due(time.monotonic(), force)
+
+            for job_id, (job_status, updated_at, first_enqueued) in due.items():
+                start = time.monotonic()
+                try:
+                    success = self.writer(job_id, job_status, updated_at)
+                except Exception as e:
+                    print(f"Error flushing job {job_id} status: {str(e)}")
+                    success = False
+                end = time.monotonic()
+                if not success:
+                    # The caller was not told about the write, make the loss visible here
+                    print(f"Failed to write buffered status {job_status} of job {job_id}")
+
+                with self._cond:
+                    self._metrics['writes' if success else 'failed_writes'] += 1
+                    self._write_durations.append(end - start)
+                    self._flush_latencies.append(end - first_enqueued)
+
+    def flush(self) -> None:
+        """Write all pending updates now, without waiting for their window."""
+        self._flush_pending(force=True)
+
+    def shutdown(self) -> None:
+        """Flush pending updates and stop the flusher thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._flush_pending(force=True)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics['pending'] = len(self._pending)
+            flush_latencies = sorted(self._flush_latencies)
+            write_durations = list(self._write_durations)
+
+        metrics['flush_latency_ms'] = _summarize(flush_latencies)
+        metrics['write_duration_ms'] = _summarize(sorted(write_durations))
+        return metrics
+
+
+def _summarize(sorted_samples) -> Dict[str, float]:
+    if not sorted_samples:
+        return {'count': 0}
+
+    def _pct(p):
+        return round(sorted_samples[min(len(sorted_samples) - 1, int(p * len(sorted_samples)))] * 1000, 2)
+
+    return {
+        'count': len(sorted_samples),
+        'mean': round(sum(sorted_samples) / len(sorted_samples) * 1000, 2),
+        'p50': _pct(0.50),
+        'p95': _pct(0.95),
+        'max': round(sorted_samples[-1] * 1000, 2),
+    }
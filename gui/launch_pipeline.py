@@ -0,0 +1,358 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum, unique
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from job_manager import JobManager
+from launch_tracer import LaunchTrace, launch_span, use_trace
+from node_manager import NodeLease, NodeManager, singleton
+from task_manager import TaskManager
+from task_state_watcher import TaskStateWatcher
+from training_manager import TrainingManager
+
+
+DEFAULT_MAX_CONCURRENT_AWS_CALLS = 8
+DEFAULT_PIPELINE_WORKERS = 16
+PRECHECK_TIMEOUT = 600
+# Seconds a job's node lease outlives a crashed submission, and the longest
+# wait for its training tasks to stop before the lease is given back
+LAUNCH_LEASE_TTL = PRECHECK_TIMEOUT + 300
+# Finished jobs kept for display
+MAX_FINISHED_JOBS = 200
+
+
+@unique
+class LaunchState(Enum):
+    SUBMITTED = "SUBMITTED"
+    RESERVING = "RESERVING"
+    GENERATING_PRECHECK = "GENERATING_PRECHECK"
+    LAUNCHING_PRECHECK = "LAUNCHING_PRECHECK"
+    PRECHECKING = "PRECHECKING"
+    PRECHECK_FAILED = "PRECHECK_FAILED"
+    GENERATING = "GENERATING"
+    LAUNCHING = "LAUNCHING"
+    RECORDING = "RECORDING"
+    LAUNCHED = "LAUNCHED"
+    FAILED = "FAILED"
+
+
+FINAL_STATES = (LaunchState.LAUNCHED, LaunchState.PRECHECK_FAILED, LaunchState.FAILED)
+
+
+@dataclass
+class LaunchRequest:
+    base_job_name: str
+    num_nodes: int
+    master_port: str
+    user_script_path: str
+    health_check: bool = False
+    # GPUs per task, None for the training container definition's
+    gpus_per_node: Optional[int] = None
+
+
+@dataclass
+class LaunchJob:
+    """
+    Per-job state of the launch pipeline.
+
+    `accepted` resolves with the submission summary once the UI can answer:
+    after the training tasks are launched, or after the precheck tasks are
+    launched when a health check runs first. `done` resolves when the job
+    reaches a final state.
+    """
+    request: LaunchRequest
+    state: LaunchState = LaunchState.SUBMITTED
+    job_id: Optional[str] = None
+    job_timestamp: Optional[str] = None
+    exec_history_save_dir: Optional[str] = None
+    lease: Optional[NodeLease] = None
+    error: Optional[str] = None
+    # (state, ISO timestamp) of every transition
+    transitions: List[Tuple[str, str]] = field(default_factory=list)
+    trace: LaunchTrace = field(default_factory=LaunchTrace)
+    accepted: Future = field(default_factory=Future)
+    done: Optional[Future] = None
+
+
+@singleton
+class LaunchPipeline:
+    """
+    Asyncio state machine for the submit -> precheck -> train -> record flow.
+
+    Jobs run as coroutines on one event loop in a background thread, so many
+    submissions progress concurrently without a lock or a thread per job.
+    Blocking AWS calls run on a worker pool and at most
+    LAUNCH_MAX_CONCURRENT_AWS_CALLS of them are in flight at once; prechecks
+    wait on TaskStateWatcher futures instead of polling.
+
+    Each job first leases its nodes from NodeManager, so concurrent jobs
+    launch on disjoint instances. The lease is released when the training
+    tasks stop, right away when the job does not launch, and by expiry if
+    the console dies mid-launch.
+    """
+
+    def __init__(self):
+        self.node_manager = NodeManager()
+        self._max_aws_calls = int(os.environ.get('LAUNCH_MAX_CONCURRENT_AWS_CALLS', DEFAULT_MAX_CONCURRENT_AWS_CALLS))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('LAUNCH_PIPELINE_WORKERS', DEFAULT_PIPELINE_WORKERS)),
+            thread_name_prefix='launch-pipeline'
+        )
+        self._jobs: List[LaunchJob] = []
+        self._jobs_lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        self._aws_semaphore = None
+        self._thread = threading.Thread(target=self._run_loop, name='launch-pipeline-loop', daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._init_loop_state(), self._loop).result()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _init_loop_state(self) -> None:
+        # Created on the loop it is used from
+        self._aws_semaphore = asyncio.Semaphore(self._max_aws_calls)
+
+    def submit(self, request: LaunchRequest) -> LaunchJob:
+        job = LaunchJob(request=request)
+        self._set_state(job, LaunchState.SUBMITTED)
+        with self._jobs_lock:
+            self._jobs.append(job)
+            self._prune_jobs()
+        job.done = asyncio.run_coroutine_threadsafe(self._run_job(job), self._loop)
+        return job
+
+    def get_jobs(self) -> List[LaunchJob]:
+        with self._jobs_lock:
+            return list(self._jobs)
+
+    def get_job(self, job_id: str) -> Optional[LaunchJob]:
+        with self._jobs_lock:
+            for job in self._jobs:
+                if job.job_id == job_id:
+                    return job
+        return None
+
+    def _prune_jobs(self) -> None:
+        finished = [job for job in self._jobs if job.state in FINAL_STATES]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.remove(job)
+
+    @staticmethod
+    def _set_state(job: LaunchJob, state: LaunchState) -> None:
+        job.state = state
+        job.transitions.append((state.value, datetime.now().isoformat()))
+        print(f"Launch pipeline job {job.job_id or job.request.base_job_name}: {state.value}")
+
+    async def _run_blocking(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run local blocking work (file generation) on the worker pool."""
+        # run_in_executor does not carry the context, copy it for launch spans
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await self._loop.run_in_executor(None, call)
+
+    async def _aws_call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking AWS call on the worker pool, bounded by the semaphore."""
+        async with self._aws_semaphore:
+            call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+            return await self._loop.run_in_executor(None, call)
+
+    async def _run_job(self, job: LaunchJob) -> LaunchJob:
+        with use_trace(job.trace):
+            try:
+                with launch_span('training_manager.init'):
+                    training_manager = await self._run_blocking(TrainingManager)
+                with launch_span('job_id.generate'):
+                    job.job_id, job.exec_history_save_dir, job.job_timestamp = \
+                        training_manager.generate_job_id(job.request.base_job_name)
+                job.trace.job_id = job.job_id
+
+                self._set_state(job, LaunchState.RESERVING)
+                gpus_per_node = training_manager.training_gpus_per_node(job.request.gpus_per_node)
+                host_ports = training_manager.launch_host_ports(job.request.master_port, job.request.health_check)
+                with launch_span('nodes.reserve'):
+                    job.lease = await self._aws_call(
+                        self.node_manager.acquire_lease,
+                        job.job_id, job.request.num_nodes, gpus_per_node, LAUNCH_LEASE_TTL, host_ports
+                    )
+
+                container_inst_ids = None
+                if job.request.health_check:
+                    with launch_span('precheck'):
+                        container_inst_ids = await self._run_precheck(job, training_manager)
+                    if container_inst_ids is None:
+                        return job
+
+                with launch_span('training'):
+                    await self._run_training(job, training_manager, container_inst_ids)
+
+            except Exception as e:
+                failed_in = job.state.value
+                job.error = f"Failed in {failed_in}: {str(e)}"
+                print(f"Launch pipeline job {job.job_id} failed in {failed_in}: {str(e)}")
+                self._set_state(job, LaunchState.FAILED)
+                if not job.accepted.done():
+                    job.accepted.set_exception(RuntimeError(job.error))
+            finally:
+                if job.lease is not None and job.state != LaunchState.LAUNCHED:
+                    self.node_manager.release_lease(job.lease.lease_id)
+                await self._save_trace(job)
+        return job
+
+    async def _save_trace(self, job: LaunchJob) -> None:
+        """Persist the timeline next to execution_history.sh and in the job record"""
+        job.trace.finish()
+        timeline = job.trace.to_dict()
+        try:
+            if job.exec_history_save_dir:
+                await self._run_blocking(job.trace.save, job.exec_history_save_dir)
+            # Only a launched job has its own record, do not create one
+            if job.state == LaunchState.LAUNCHED:
+                await self._aws_call(JobManager.record_launch_timeline, job.job_id, timeline)
+        except Exception as e:
+            print(f"Error saving launch timeline of job {job.job_id}: {str(e)}")
+
+    async def _run_precheck(self, job: LaunchJob, training_manager: TrainingManager) -> Optional[List[str]]:
+        """
+        Launch and await the health check tasks.
+
+        Returns:
+            Optional[List[str]]: Container instances that passed, None if a
+            precheck task failed (a timeout raises)
+        """
+        request = job.request
+        precheck_job_id = job.job_id + '-precheck'
+
+        self._set_state(job, LaunchState.GENERATING_PRECHECK)
+        with launch_span('precheck.generate_scripts'):
+            precheck_task_def_path = await self._run_blocking(
+                training_manager.health_manager.generate_precheck_scripts,
+                request.num_nodes, job.exec_history_save_dir, True
+            )
+
+        self._set_state(job, LaunchState.LAUNCHING_PRECHECK)
+        precheck_task_ids, orch_node_names, container_inst_ids, _, precheck_task_items = await self._aws_call(
+            TaskManager.register_task_and_run_all,
+            precheck_job_id, job.job_timestamp, request.num_nodes, precheck_task_def_path,
+            job.exec_history_save_dir, None, record_tasks=False, lease=job.lease
+        )
+        await self._record_job(job, precheck_job_id, precheck_task_ids, orch_node_names,
+                               container_inst_ids, 'PRE_CHECKING', precheck_task_items)
+
+        ## The lease keeps the instances for the following training
+        with launch_span('node_status.refresh'):
+            await self._aws_call(self.node_manager.refresh_all_node_status, force=True)
+
+        job.accepted.set_result({
+            'job_id': precheck_job_id,
+            'node_names': orch_node_names,
+            'task_def_path': precheck_task_def_path,
+            'task_ids': precheck_task_ids,
+            'history_file_path': job.exec_history_save_dir
+        })
+
+        self._set_state(job, LaunchState.PRECHECKING)
+        try:
+            with launch_span('precheck.wait'):
+                task_statuses = await asyncio.wrap_future(
+                    TaskStateWatcher().when_all_stopped(precheck_task_ids, fail_fast=True, timeout=PRECHECK_TIMEOUT)
+                )
+        except TimeoutError as e:
+            raise RuntimeError(f"Pre Health Check did not finish: {str(e)}")
+
+        failed_task_ids = [taskid for taskid, taskstatus in task_statuses.items() if taskstatus == 'FAIL']
+        if failed_task_ids:
+            ## TODO keep leasing healthcheck failed instance
+            await self._aws_call(JobManager.update_job_status, precheck_job_id, 'PRE_CHECKING_FAIL')
+            job.error = f"Pre Health Check failed on task - {failed_task_ids[0]}"
+            print(f"Find Pre Health Check Failed on task - {failed_task_ids[0]}. Stop Launching Training Job.")
+            self._set_state(job, LaunchState.PRECHECK_FAILED)
+            return None
+
+        return container_inst_ids
+
+    async def _run_training(self, job: LaunchJob, training_manager: TrainingManager,
+                            container_inst_ids: Optional[List[str]]) -> None:
+        request = job.request
+
+        self._set_state(job, LaunchState.GENERATING)
+        task_def_path = await self._run_blocking(
+            training_manager.generate_nodes_script,
+            request.num_nodes, request.master_port, request.user_script_path,
+            job.exec_history_save_dir, request.health_check, job.lease.gpus_per_task
+        )
+
+        self._set_state(job, LaunchState.LAUNCHING)
+        training_task_ids, orch_node_names, launched_inst_ids, history_file_path, task_items = await self._aws_call(
+            TaskManager.register_task_and_run_all,
+            job.job_id, job.job_timestamp, request.num_nodes, task_def_path,
+            job.exec_history_save_dir, None, record_tasks=False, lease=job.lease
+        )
+
+        if container_inst_ids is not None:
+            ## Change health check job to Done
+            with launch_span('ddb.update_job_status'):
+                await self._aws_call(JobManager.update_job_status, job.job_id + '-precheck', 'PRE_CHECKING_DONE')
+
+        await self._record_job(job, job.job_id, training_task_ids, orch_node_names,
+                               launched_inst_ids, 'IN_PROGRESS', task_items)
+
+        ## ECS accounts for the running tasks' GPUs from here on; give the
+        ## instances back for re-assign once the training tasks stop
+        lease_id = job.lease.lease_id
+        self.node_manager.mark_lease_launched(lease_id)
+        TaskStateWatcher().when_all_stopped(
+            training_task_ids, fail_fast=False, timeout=LAUNCH_LEASE_TTL
+        ).add_done_callback(lambda _: self.node_manager.release_lease(lease_id))
+        with launch_span('node_status.refresh'):
+            await self._aws_call(self.node_manager.refresh_all_node_status, force=True)
+
+        self._set_state(job, LaunchState.LAUNCHED)
+        if not job.accepted.done():
+            job.accepted.set_result({
+                'job_id': job.job_id,
+                'node_names': orch_node_names,
+                'task_def_path': task_def_path,
+                'task_ids': training_task_ids,
+                'history_file_path': history_file_path
+            })
+
+    def get_launch_timeline(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Timeline of a job submitted in this process, None if unknown"""
+        job = self.get_job(job_id)
+        return job.trace.to_dict() if job is not None else None
+
+    async def _record_job(self, job: LaunchJob, record_job_id: str, ecs_task_ids: List[str],
+                          orch_node_names: List[str], container_inst_ids: List[str],
+                          job_status: str, task_items: List[Dict[str, Any]]) -> None:
+        """
+        Write the job row with its task rows.
+
+        Raises:
+            RuntimeError: If fewer than num_nodes tasks launched; the launched
+                tasks are stopped and the job is recorded as LAUNCH_FAILED
+        """
+        self._set_state(job, LaunchState.RECORDING)
+        num_nodes = job.request.num_nodes
+        if len(ecs_task_ids) < num_nodes:
+            # A job missing nodes cannot run, free the launched ones and keep the record
+            print(f"Only {len(ecs_task_ids)} of {num_nodes} tasks of job {record_job_id} launched, stopping them")
+            await self._aws_call(TaskManager.stop_tasks_bulk, ecs_task_ids, 'Job launched on too few nodes')
+            job_status = 'LAUNCH_FAILED'
+
+        await self._aws_call(
+            JobManager.gather_task_and_record_job,
+            record_job_id, job.job_timestamp, num_nodes, orch_node_names,
+            container_inst_ids, ecs_task_ids, job_status, task_items
+        )
+        if len(ecs_task_ids) < num_nodes:
+            raise RuntimeError(f"Only {len(ecs_task_ids)} of {num_nodes} tasks of job {record_job_id} launched")
+
@@ -0,0 +1,146 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from file_manager import FileManager
+
+
+# Written next to execution_history.sh
+TIMELINE_FILE_NAME = 'launch_timeline.json'
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('launch_trace', default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar('launch_span', default=None)
+
+
+class LaunchTrace:
+    """
+    Span timings of one job submission, keyed by job_id.
+
+    The trace is bound to the current context with use_trace(); code along
+    the launch path (TrainingManager, TaskManager, JobManager) records spans
+    with launch_span(), which is a no-op outside a traced launch. Spans nest
+    by context, so work run on other threads through
+    contextvars.copy_context() is attributed to the enclosing span.
+    """
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self._end = None
+        self._lock = threading.Lock()
+        # (exact start, span) so spans sort by start, parents first
+        self._spans: List[Tuple[float, Dict[str, Any]]] = []
+
+    def _offset_ms(self, perf_counter: float) -> int:
+        return int(round((perf_counter - self._start) * 1000))
+
+    def add_span(self, name: str, start: float, end: float,
+                 parent: Optional[str] = None, error: Optional[str] = None) -> None:
+        span = {
+            'name': name,
+            'parent': parent,
+            'start_ms': self._offset_ms(start),
+            'duration_ms': int(round((end - start) * 1000)),
+            'thread': threading.current_thread().name,
+        }
+        if error:
+            span['error'] = error
+        with self._lock:
+            self._spans.append((start, span))
+
+    def finish(self) -> None:
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Timeline as stored in the job record and the timeline file; times in ms"""
+        end = self._end if self._end is not None else time.perf_counter()
+        with self._lock:
+            spans = [span for _, span in sorted(self._spans, key=lambda entry: entry[0])]
+        return {
+            'job_id': self.job_id,
+            'started_at': self.started_at,
+            'total_ms': self._offset_ms(end),
+            'spans': spans,
+        }
+
+    def save(self, output_dir: str) -> str:
+        timeline_path = os.path.join(output_dir, TIMELINE_FILE_NAME)
+        FileManager.save_json(timeline_path, self.to_dict())
+        return timeline_path
+
+
+def current_trace() -> Optional[LaunchTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def use_trace(trace: LaunchTrace):
+    """Record launch_span() calls of the current context into trace"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def launch_span(name: str):
+    """
+    Time the enclosed block as a span of the current launch trace.
+    Exceptions are recorded on the span and re-raised.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add_span(name, start, time.perf_counter(), parent, error)
+
+
+def load_timeline(output_dir: str) -> Optional[Dict[str, Any]]:
+    timeline_path = os.path.join(output_dir, TIMELINE_FILE_NAME)
+    if not os.path.exists(timeline_path):
+        return None
+    return FileManager.load_json(timeline_path)
+
+
+def render_timeline(timeline: Dict[str, Any], width: int = 40) -> str:
+    """Markdown timeline with one bar per span, scaled to the total launch time"""
+    total_ms = max(1, timeline.get('total_ms') or 1)
+    lines = [
+        f"**Job {timeline.get('job_id')}**: launched in {total_ms / 1000:.2f}s "
+        f"(started {timeline.get('started_at')})",
+        "",
+        "| Span | Start ms | Duration ms | Timeline |",
+        "|---|---|---|---|"
+    ]
+
+    depths: Dict[str, int] = {}
+    for span in timeline.get('spans', []):
+        depth = depths.get(span.get('parent'), -1) + 1 if span.get('parent') else 0
+        depths[span['name']] = depth
+
+        offset = min(width - 1, int(span['start_ms'] * width / total_ms))
+        length = max(1, int(span['duration_ms'] * width / total_ms))
+        bar = '·' * offset + '█' * min(length, width - offset)
+        name = '&nbsp;&nbsp;' * depth + span['name'] + (' ⚠️' if span.get('error') else '')
+        lines.append(f"| {name} | {span['start_ms']} | {span['duration_ms']} | `{bar}` |")
+
+    return "\n".join(lines)
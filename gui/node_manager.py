@@ -1,14 +1,27 @@
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 import copy
 from file_manager import FileManager
 import os
 import datetime
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import boto3
 from ddb_handler import DynamoDBHandler
+from aws_client_pool import AWSClientPool
+from node_topology import ClusterTopology
 
 from enum import Enum, unique
 
+
+# ECS limit of container instances per describe-container-instances call
+DESCRIBE_CONTAINER_INSTANCES_MAX = 100
+DEFAULT_NODE_STATUS_TTL = 5
+DEFAULT_REFRESH_WORKERS = 8
+# Seconds a node lease is held unless released or renewed
+DEFAULT_LEASE_TTL = 900
+
 @unique
 class UserNodeStatus(Enum):
     AVAILABLE = "AVAILABLE"
@@ -26,6 +39,29 @@ class NodeInfo:
     num_gpus: int = 8
     status: bool = False
     container_inst_id: str = ""
+    # ECS status and remaining GPUs from the last refresh, minus claimed GPUs
+    physical_status: str = ""
+    free_gpus: int = 0
+    # IDs of the GPUs ECS reported as remaining in the last refresh
+    free_gpu_ids: List[str] = field(default_factory=list)
+    # Host ports ECS reported as in use in the last refresh, and those plus claimed ports
+    reported_ports: Set[int] = field(default_factory=set)
+    used_ports: Set[int] = field(default_factory=set)
+
+
+@dataclass
+class NodeLease:
+    """GPUs on container instances reserved for one job, see NodeManager.acquire_lease"""
+    lease_id: str
+    job_id: str
+    container_inst_ids: List[str]
+    gpus_per_task: int
+    expires_at: float
+    # Host ports every task of the job binds on its instance
+    host_ports: Tuple[int, ...] = ()
+    # Once the job's tasks run, ECS accounts for their GPUs and the lease
+    # no longer holds any back
+    launched: bool = False
 
 
 def singleton(cls):
@@ -45,7 +81,7 @@ class NodeManager:
         self.node_ibdev_str = os.environ.get('IB_DEV_LIST', "mlx5_10,mlx5_11,mlx5_12,mlx5_13")
         self.node_names = os.environ.get('NODE_NAME_LIST', "A800_node001,A800_node002").split(',')
         self.cluster_name = os.environ.get('CLUSTER_NAME', 'default-cluster')
-        self.ecs_client = boto3.client('ecs')
+        self.ecs_client = AWSClientPool.get_client('ecs')
         
         # Initialize STATIC node information from config
         self.nodes = {
@@ -58,140 +94,492 @@ class NodeManager:
             # for name, info in self.node_config.items()
         }
 
+        # Switch group / NIC set of each node, see ClusterTopology
+        self.topology = ClusterTopology.from_env(self.node_names)
+
+        # Lookup indexes, kept in sync by _apply_container_instance
+        self.sorted_node_names = sorted(self.nodes)
+        self.node_addresses = {name: self.topology.nodes[name].ip for name in self.nodes}
+        self.inst_to_node: Dict[str, str] = {}
+        self.nodes_by_status: Dict[str, Set[str]] = {
+            UserNodeStatus.AVAILABLE.value: set(),
+            UserNodeStatus.UNAVAILABLE.value: set(self.nodes),
+        }
+
+        # Guards free_gpus and used_ports between refreshes and launch
+        # claims, the node leases and the spare/assigned node sets
+        self.capacity_lock = threading.Lock()
+        self.leases: Dict[str, NodeLease] = {}
+        # container_inst_id -> GPUs and host ports held back by leases not launched yet
+        self.reserved_gpus: Dict[str, int] = {}
+        self.reserved_ports: Dict[str, Set[int]] = {}
+
+        # Status snapshot freshness and the single in-flight refresh
+        self.status_ttl = float(os.environ.get('NODE_STATUS_TTL', DEFAULT_NODE_STATUS_TTL))
+        self.refresh_workers = int(os.environ.get('NODE_REFRESH_WORKERS', DEFAULT_REFRESH_WORKERS))
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = None
+        self._refresh_started_at = None
+        self._inflight_refresh = None
+
         # self.refresh_all_node_status()
         self.assigned_nodes = set()
         self.spare_nodes = set()
         physical_available_node_names = self.get_physical_available_node_names()
-        self.spare_nodes.update(physical_available_node_names)
-
-        self.healthcheck_locked_instances = set()
-
-
-    def lock_healthcheck_instances(self, container_inst_ids):
-        self.healthcheck_locked_instances.update(container_inst_ids)
-
-    def unlock_healthcheck_instances(self, container_inst_ids):
-        self.healthcheck_locked_instances.difference_update(container_inst_ids)
-
-    def clear_healthcheck_instances(self):
-        # self.healthcheck_locked_instances.difference_update(container_inst_ids)
-        self.healthcheck_locked_instances.clear()
+        with self.capacity_lock:
+            self.spare_nodes.update(physical_available_node_names)
 
     
     def get_physical_available_node_names(self) -> List[str]:
         self.refresh_all_node_status()
-        physical_available_node_names = list(filter(lambda key: self.nodes[key].status == True, self.nodes.keys()))
+        available = self.nodes_by_status[UserNodeStatus.AVAILABLE.value]
+        physical_available_node_names = [node_name for node_name in self.nodes if node_name in available]
         return physical_available_node_names
 
 
-    def refresh_all_node_status(self):
+    def refresh_all_node_status(self, force: bool = False):
+        """
+        Refresh node status from ECS, at most once per NODE_STATUS_TTL seconds.
+
+        Concurrent callers share one in-flight refresh. With force, the view
+        is re-read unless a refresh started after this call has finished,
+        e.g. after launching tasks.
+        """
+        requested_at = time.monotonic()
+        while True:
+            with self._refresh_lock:
+                if self._refreshed_at is not None:
+                    if not force and requested_at - self._refreshed_at < self.status_ttl:
+                        return
+                    if force and self._refresh_started_at >= requested_at:
+                        return
+                inflight = self._inflight_refresh
+                leader = inflight is None
+                if leader:
+                    inflight = self._inflight_refresh = (Future(), time.monotonic())
+
+            future, started_at = inflight
+            if not leader:
+                future.result()
+                if not force or started_at >= requested_at:
+                    return
+                continue
+
+            try:
+                self._refresh_from_ecs()
+                with self._refresh_lock:
+                    self._refreshed_at = time.monotonic()
+                    self._refresh_started_at = started_at
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._refresh_lock:
+                    self._inflight_refresh = None
+            return
+
+
+    def _refresh_from_ecs(self):
         container_instance_arns = []
         paginator = self.ecs_client.get_paginator('list_container_instances')
 
         for page in paginator.paginate(cluster=self.cluster_name):
             container_instance_arns.extend(page['containerInstanceArns'])
 
-        if container_instance_arns:
-            desp_response = self.ecs_client.describe_container_instances(
+        # describe-container-instances takes at most 100 instances per call
+        chunks = [container_instance_arns[start:start + DESCRIBE_CONTAINER_INSTANCES_MAX]
+                  for start in range(0, len(container_instance_arns), DESCRIBE_CONTAINER_INSTANCES_MAX)]
+        if not chunks:
+            return
+
+        def _describe_chunk(chunk):
+            return self.ecs_client.describe_container_instances(
                     cluster=self.cluster_name,
-                    containerInstances=container_instance_arns,
+                    containerInstances=chunk,
                     # include=['TAGS']  # Include tags in the response
-                )
+                )['containerInstances']
+
+        if len(chunks) == 1:
+            described_chunks = [_describe_chunk(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.refresh_workers, len(chunks)),
+                                    thread_name_prefix='ecs-describe-instances') as executor:
+                futures = [executor.submit(_describe_chunk, chunk) for chunk in chunks]
+            described_chunks = []
+            for future in futures:
+                try:
+                    described_chunks.append(future.result())
+                except Exception as e:
+                    # Nodes of this chunk keep their last known status
+                    print(f"Error describing container instances: {str(e)}")
+
+        for described in described_chunks:
+            for container_instance in described:
+                self._apply_container_instance(container_instance)
+
+
+    def _apply_container_instance(self, container_instance):
+        container_instance_id = container_instance['containerInstanceArn'].split('/')[-1]
+        node_name = None
+        
+        # 首先找到Node属性和对应的节点名称
+        for attrdict in container_instance['attributes']:
+            if attrdict['name'] == 'Node':
+                node_name = attrdict['value']
+                break
+        
+        # 只有当节点名称在self.nodes中存在时才继续处理
+        # print(node_name)
+        if node_name and node_name in self.nodes.keys():
+            # 更新container_instance_id
+            previous_inst_id = self.nodes[node_name].container_inst_id
+            if previous_inst_id != container_instance_id:
+                if self.inst_to_node.get(previous_inst_id) == node_name:
+                    del self.inst_to_node[previous_inst_id]
+                self.inst_to_node[container_instance_id] = node_name
+            self.nodes[node_name].container_inst_id = container_instance_id
+            
+            # 获取物理状态
+            node_physical_status = container_instance['status']
+            
+            # 初始化GPU数量
+            registered_gpu = 0
+            remain_gpu = 0
+            
+            # 获取注册的GPU数量
+            for item in container_instance['registeredResources']:
+                if item['name'] == 'GPU':
+                    registered_gpu = len(item['stringSetValue'])
+                    self.nodes[node_name].num_gpus = registered_gpu
+                    break
+            
+            # 获取剩余的GPU数量, 以及已占用的主机端口
+            remain_gpu_ids = []
+            used_ports = set()
+            for item in container_instance['remainingResources']:
+                if item['name'] == 'GPU':
+                    remain_gpu_ids = sorted(item['stringSetValue'])
+                    remain_gpu = len(remain_gpu_ids)
+                elif item['name'] == 'PORTS':
+                    used_ports = {int(port) for port in item.get('stringSetValue', [])}
+            
+            # 判断节点是否可用
+            node_usable = registered_gpu == remain_gpu and node_physical_status == 'ACTIVE'
+            self.nodes[node_name].status = node_usable
+            self._index_node_status(node_name, node_usable)
+            with self.capacity_lock:
+                self.nodes[node_name].physical_status = node_physical_status
+                self.nodes[node_name].free_gpu_ids = remain_gpu_ids
+                self.nodes[node_name].reported_ports = used_ports
+                self._apply_reservations(self.nodes[node_name])
+
+                # 如果节点不可用，从spare_nodes中移除
+                if not node_usable:
+                    self.spare_nodes.discard(node_name)
+            
+            print(container_instance_id, node_name, node_physical_status, registered_gpu, remain_gpu, node_usable)
 
-            for i, inst_arn in enumerate(container_instance_arns):
-                container_instance_id = inst_arn.split('/')[-1]
-                node_name = None
-                
-                # 首先找到Node属性和对应的节点名称
-                for attrdict in desp_response['containerInstances'][i]['attributes']:
-                    if attrdict['name'] == 'Node':
-                        node_name = attrdict['value']
-                        break
-                
-                # 只有当节点名称在self.nodes中存在时才继续处理
-                # print(node_name)
-                if node_name and node_name in self.nodes.keys():
-                    # 更新container_instance_id
-                    self.nodes[node_name].container_inst_id = container_instance_id
-                    
-                    # 获取物理状态
-                    node_physical_status = desp_response['containerInstances'][i]['status']
-                    
-                    # 初始化GPU数量
-                    registered_gpu = 0
-                    remain_gpu = 0
-                    
-                    # 获取注册的GPU数量
-                    for item in desp_response['containerInstances'][i]['registeredResources']:
-                        if item['name'] == 'GPU':
-                            registered_gpu = len(item['stringSetValue'])
-                            self.nodes[node_name].num_gpus = registered_gpu
-                            break
-                    
-                    # 获取剩余的GPU数量
-                    for item in desp_response['containerInstances'][i]['remainingResources']:
-                        if item['name'] == 'GPU':
-                            remain_gpu = len(item['stringSetValue'])
-                            break
-                    
-                    # 判断节点是否可用
-                    node_usable = registered_gpu == remain_gpu and node_physical_status == 'ACTIVE'
-                    self.nodes[node_name].status = node_usable
-                    
-                    # 如果节点不可用，从spare_nodes中移除
-                    if not node_usable and node_name in self.spare_nodes:
-                        self.spare_nodes.remove(node_name)
-                    
-                    print(container_instance_id, node_name, node_physical_status, registered_gpu, remain_gpu, node_usable)
 
-        return
 
+    def _index_node_status(self, node_name: str, node_usable: bool) -> None:
+        available = self.nodes_by_status[UserNodeStatus.AVAILABLE.value]
+        unavailable = self.nodes_by_status[UserNodeStatus.UNAVAILABLE.value]
+        if node_usable:
+            unavailable.discard(node_name)
+            available.add(node_name)
+        else:
+            available.discard(node_name)
+            unavailable.add(node_name)
 
 
     ## Node assignment during node assignment
     ## release above temperary status
     def release_all_node_names(self) -> None:
-        self.assigned_nodes.clear()
-        self.healthcheck_lock_nodes.clear()
-        self.spare_nodes.clear()
-        # self.refresh_all_node_status()
-        # physical_available_node_names = self.get_physical_available_node_names()
-        self.spare_nodes.update(self.nodes.keys())
+        """
+        Reset the spare/assigned node sets and drop expired and launched
+        leases. Leases of launches still in flight keep their GPUs and ports
+        reserved; everything else claimed is given back and the free-GPU view
+        is rebuilt from the last refresh.
+        """
+        with self.capacity_lock:
+            self.assigned_nodes.clear()
+            self._expire_leases()
+            for lease in [lease for lease in self.leases.values() if lease.launched]:
+                self._drop_lease(lease.lease_id)
+            self.reserved_gpus.clear()
+            self.reserved_ports.clear()
+            for lease in self.leases.values():
+                self._reserve_capacity(lease.container_inst_ids, lease)
+            for node in self.nodes.values():
+                self._apply_reservations(node)
+            self.spare_nodes.clear()
+            # self.refresh_all_node_status()
+            # physical_available_node_names = self.get_physical_available_node_names()
+            self.spare_nodes.update(self.nodes.keys())
         return
 
 
     def assign_a_node_name(self) -> str:
-        node_name = self.spare_nodes.pop()
-        self.assigned_nodes.add(node_name)
+        with self.capacity_lock:
+            node_name = self.spare_nodes.pop()
+            self.assigned_nodes.add(node_name)
         # self.update_node_status(node_name, UserNodeStatus.ASSIGNED.value)
         return node_name
 
 
+    ## Node leases: GPUs reserved for a job across its launch phases
+    def acquire_lease(self, job_id: str, count: int, gpus_per_task: int,
+                      ttl: float = DEFAULT_LEASE_TTL, host_ports=()) -> NodeLease:
+        """
+        Atomically reserve gpus_per_task GPUs and the host_ports on each of
+        count container instances for job_id, bin-packed onto partially used
+        instances first (see _claim_free_instances). The reservation stays
+        deducted from the free-GPU and port view across refreshes until the
+        lease is launched, released or expires, so concurrent submissions
+        never get the same GPUs or ports. The status view is refreshed once
+        if it does not hold enough capacity.
+
+        Returns:
+            NodeLease: The lease, holding exactly count instances
+
+        Raises:
+            RuntimeError: If fewer than count instances have the free GPUs,
+                in which case nothing is reserved
+        """
+        for attempt in range(2):
+            with self.capacity_lock:
+                self._expire_leases()
+                inst_ids = self._claim_free_instances(count, gpus_per_task, host_ports=host_ports)
+                if len(inst_ids) == count:
+                    lease = NodeLease(
+                        lease_id=f"{job_id}-{os.urandom(4).hex()}",
+                        job_id=job_id,
+                        container_inst_ids=inst_ids,
+                        gpus_per_task=gpus_per_task,
+                        expires_at=time.time() + ttl,
+                        host_ports=tuple(sorted(set(host_ports)))
+                    )
+                    self.leases[lease.lease_id] = lease
+                    self._reserve_capacity(inst_ids, lease)
+                    print(f"Lease {lease.lease_id} acquired {gpus_per_task} GPUs and ports "
+                          f"{list(lease.host_ports)} on {inst_ids}")
+                    return lease
+                self._release_claimed_instances(inst_ids, gpus_per_task, host_ports)
+
+            if attempt == 0:
+                # The cached view may be stale, check ECS once before giving up
+                self.refresh_all_node_status(force=True)
+
+        raise RuntimeError(f"Only {len(inst_ids)} of {count} container instances "
+                           f"have {gpus_per_task} free GPUs and free host ports {sorted(set(host_ports))}")
+
+    def replace_lease_instances(self, lease: NodeLease, container_inst_ids: List[str]) -> List[str]:
+        """
+        Swap instances ECS rejected out of the lease for other free ones.
+        The rejected instances are treated as full until the next refresh.
+
+        Returns:
+            List[str]: The replacement instances, fewer than replaced if the
+            cluster has no more free capacity
+        """
+        with self.capacity_lock:
+            rejected = [inst_id for inst_id in container_inst_ids if inst_id in lease.container_inst_ids]
+            for container_inst_id in rejected:
+                lease.container_inst_ids.remove(container_inst_id)
+            for container_inst_id in container_inst_ids:
+                self._mark_instance_full(container_inst_id)
+
+            if lease.lease_id not in self.leases:
+                return []
+            if not lease.launched:
+                self._unreserve_capacity(rejected, lease)
+            # One task of a job per instance, close to the job's other instances
+            replacements = self._claim_free_instances(len(container_inst_ids), lease.gpus_per_task,
+                                                      exclude=set(container_inst_ids) | set(lease.container_inst_ids),
+                                                      near=lease.container_inst_ids, host_ports=lease.host_ports)
+            if not lease.launched:
+                self._reserve_capacity(replacements, lease)
+            lease.container_inst_ids.extend(replacements)
+        return replacements
+
+    def mark_lease_launched(self, lease_id: str) -> None:
+        """The lease's tasks run, stop holding their GPUs and ports back from refreshed views"""
+        with self.capacity_lock:
+            lease = self.leases.get(lease_id)
+            if lease is not None and not lease.launched:
+                self._unreserve_capacity(lease.container_inst_ids, lease)
+                lease.launched = True
+
+    def renew_lease(self, lease_id: str, ttl: float = DEFAULT_LEASE_TTL) -> bool:
+        with self.capacity_lock:
+            lease = self.leases.get(lease_id)
+            if lease is None:
+                return False
+            lease.expires_at = time.time() + ttl
+            return True
+
+    def release_lease(self, lease_id: str) -> None:
+        """Give the lease's GPUs back; a no-op for released or expired leases"""
+        with self.capacity_lock:
+            self._drop_lease(lease_id)
+
+    def release_job_leases(self, job_id: str) -> None:
+        with self.capacity_lock:
+            for lease in [lease for lease in self.leases.values() if lease.job_id == job_id]:
+                self._drop_lease(lease.lease_id)
+
+    def get_leases(self) -> List[NodeLease]:
+        with self.capacity_lock:
+            self._expire_leases()
+            return [copy.deepcopy(lease) for lease in self.leases.values()]
+
+    # The helpers below expect capacity_lock to be held
+    def _apply_reservations(self, node: NodeInfo) -> None:
+        # GPUs and ports of leases whose tasks are not running are not deducted by ECS yet
+        node.free_gpus = max(0, len(node.free_gpu_ids) - self.reserved_gpus.get(node.container_inst_id, 0))
+        node.used_ports = node.reported_ports | self.reserved_ports.get(node.container_inst_id, set())
+
+    def _reserve_capacity(self, container_inst_ids: List[str], lease: NodeLease) -> None:
+        for container_inst_id in container_inst_ids:
+            self.reserved_gpus[container_inst_id] = self.reserved_gpus.get(container_inst_id, 0) + lease.gpus_per_task
+            if lease.host_ports:
+                self.reserved_ports.setdefault(container_inst_id, set()).update(lease.host_ports)
+
+    def _unreserve_capacity(self, container_inst_ids: List[str], lease: NodeLease) -> None:
+        for container_inst_id in container_inst_ids:
+            remaining = self.reserved_gpus.get(container_inst_id, 0) - lease.gpus_per_task
+            if remaining > 0:
+                self.reserved_gpus[container_inst_id] = remaining
+            else:
+                self.reserved_gpus.pop(container_inst_id, None)
+            # Claims never overlap on an instance's ports, these are the lease's own
+            ports = self.reserved_ports.get(container_inst_id)
+            if ports is not None:
+                ports.difference_update(lease.host_ports)
+                if not ports:
+                    del self.reserved_ports[container_inst_id]
+
+    def _drop_lease(self, lease_id: str) -> None:
+        lease = self.leases.pop(lease_id, None)
+        if lease is None:
+            return
+        if not lease.launched:
+            # Nothing runs on the GPUs and ports, they are free again right away
+            self._unreserve_capacity(lease.container_inst_ids, lease)
+            self._release_claimed_instances(lease.container_inst_ids, lease.gpus_per_task, lease.host_ports)
+        print(f"Lease {lease_id} released")
+
+    def _expire_leases(self) -> None:
+        now = time.time()
+        for lease in [lease for lease in self.leases.values() if lease.expires_at <= now]:
+            print(f"Lease {lease.lease_id} of job {lease.job_id} expired")
+            self._drop_lease(lease.lease_id)
+
+
+    def claim_free_instances(self, count: int, gpus_per_task: int, exclude=(), near=(),
+                             host_ports=()) -> List[str]:
+        """
+        Pick up to count ACTIVE container instances with at least gpus_per_task
+        free GPUs and none of host_ports in use, from the view of the last
+        refresh, and deduct the GPUs and ports so concurrent launches pick
+        other capacity until the next refresh. Tasks use host networking, so
+        a task binding the same host port as one already on the instance
+        would be rejected by ECS (RESOURCE:PORTS); jobs only share a node
+        when their ports differ.
+        Instances are bin-packed: the ones with the fewest free GPUs that
+        still fit come first, in node name order among equals, so small jobs
+        fill partially used nodes and leave whole nodes for large ones.
+        Multi-node claims are kept within one switch group when possible,
+        preferring the groups of the near instances, see
+        ClusterTopology.select. Excluded instances are skipped.
+
+        Returns:
+            List[str]: Claimed container instance IDs, fewer than count if the
+            cluster has no more free capacity
+        """
+        with self.capacity_lock:
+            self._expire_leases()
+            return self._claim_free_instances(count, gpus_per_task, exclude, near, host_ports)
+
+    def release_claimed_instances(self, container_inst_ids: List[str], gpus_per_task: int,
+                                  host_ports=()) -> None:
+        """Give back GPUs and ports claimed for tasks that were not started"""
+        with self.capacity_lock:
+            self._release_claimed_instances(container_inst_ids, gpus_per_task, host_ports)
+
+    def mark_instance_full(self, container_inst_id: str) -> None:
+        """ECS rejected a placement, treat the instance as full until the next refresh"""
+        with self.capacity_lock:
+            self._mark_instance_full(container_inst_id)
+
+    # The helpers below expect capacity_lock to be held
+    def _claim_free_instances(self, count: int, gpus_per_task: int, exclude=(), near=(),
+                              host_ports=()) -> List[str]:
+        candidates = [
+            node for node in (self.nodes[node_name] for node_name in self.sorted_node_names)
+            if (node.container_inst_id
+                and node.physical_status == 'ACTIVE'
+                and node.free_gpus >= gpus_per_task
+                and node.used_ports.isdisjoint(host_ports)
+                and node.container_inst_id not in exclude)
+        ]
+        # Best fit, the sort is stable so name order breaks ties
+        candidates.sort(key=lambda node: node.free_gpus)
+        selected = self.topology.select(
+            [node.name for node in candidates], count,
+            near=[self.inst_to_node[inst_id] for inst_id in near if inst_id in self.inst_to_node]
+        )
+
+        claimed = []
+        for node_name in selected:
+            node = self.nodes[node_name]
+            node.free_gpus -= gpus_per_task
+            node.used_ports.update(host_ports)
+            claimed.append(node.container_inst_id)
+        return claimed
+
+    def _release_claimed_instances(self, container_inst_ids: List[str], gpus_per_task: int,
+                                   host_ports=()) -> None:
+        for container_inst_id in container_inst_ids:
+            node_name = self.inst_to_node.get(container_inst_id)
+            if node_name is not None:
+                node = self.nodes[node_name]
+                node.free_gpus = min(node.num_gpus, node.free_gpus + gpus_per_task)
+                node.used_ports.difference_update(host_ports)
+
+    def _mark_instance_full(self, container_inst_id: str) -> None:
+        node_name = self.inst_to_node.get(container_inst_id)
+        if node_name is not None:
+            self.nodes[node_name].free_gpus = 0
+
     def get_node_address(self, node_name):
-        return '.'.join(self.nodes.get(node_name).name.split('-')[1:5])
+        return self.node_addresses[node_name]
 
     def fetch_node_name(self, container_inst_id: str):
-        for node_name in self.nodes.keys():
-            if self.nodes[node_name].container_inst_id == container_inst_id:
-                return node_name
-        return None
+        return self.inst_to_node.get(container_inst_id)
 
     def get_node_status_display(self) -> List[List[str]]:
         """Get node status data for UI display, fetching from DDB"""
     
         data = []
-        physical_available_node_names = self.get_physical_available_node_names()
+        self.refresh_all_node_status()
+        physical_available_node_names = self.nodes_by_status[UserNodeStatus.AVAILABLE.value]
 
         for node_name in self.nodes.keys():
-            is_avl = False
+            node = self.nodes[node_name]
             if node_name in physical_available_node_names:
-                is_avl = True
-            
+                status = f"✅ AVAILABLE"
+            elif node.physical_status == 'ACTIVE' and node.free_gpu_ids:
+                status = f"🟨 PARTIAL ({len(node.free_gpu_ids)}/{node.num_gpus} GPUs free)"
+            else:
+                status = f"⬜ UNAVAILABLE"
+
             data.append([
                 node_name,
-                self.nodes[node_name].container_inst_id,
+                node.container_inst_id,
                 self.get_node_address(node_name),
-                f"✅ AVAILABLE" if is_avl else f"⬜ UNAVAILABLE"
+                status
             ])
 
         return data
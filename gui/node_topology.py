@@ -0,0 +1,140 @@
+import ipaddress
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from file_manager import FileManager
+
+
+DEFAULT_SUBNET_PREFIX = 24
+
+
+@dataclass(frozen=True)
+class NodeTopology:
+    name: str
+    ip: str
+    # Explicit 'group' label of the node mapping file, else the IP's subnet;
+    # None when neither is known
+    group: Optional[str]
+    nics: Tuple[str, ...]
+
+    @property
+    def group_key(self) -> Tuple[Optional[str], Tuple[str, ...]]:
+        """Nodes are tightly connected when they share the group and the NIC set"""
+        return self.group, self.nics
+
+
+def _address_from_name(node_name: str) -> str:
+    # e.g. A800-10-204-9-8 -> 10.204.9.8
+    return '.'.join(node_name.split('-')[1:5])
+
+
+def _subnet(ip: str, prefix: int) -> Optional[str]:
+    try:
+        return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+    except ValueError:
+        return None
+
+
+class ClusterTopology:
+    """
+    Network placement of the cluster's nodes.
+
+    Per-node entries of the node mapping file (NODE_MAPPING_PATH) give the
+    node's ip, ibdev list and an optional explicit group label, e.g. the
+    leaf switch:
+
+        A800_node001:
+          ip: 10.11.141.120
+          ibdev: [mlx5_10, mlx5_11]
+          group: leaf-03
+
+    Nodes missing from the file fall back to the IP encoded in the node name
+    and the IB_DEV_LIST NICs. Without a label, nodes are grouped by their
+    /TOPOLOGY_SUBNET_PREFIX subnet.
+    """
+
+    def __init__(self, nodes: Dict[str, NodeTopology]):
+        self.nodes = nodes
+
+    @classmethod
+    def load(cls, node_names: Iterable[str], mapping_path: Optional[str] = None,
+             default_nics: Iterable[str] = (), subnet_prefix: int = DEFAULT_SUBNET_PREFIX) -> 'ClusterTopology':
+        mapping = {}
+        if mapping_path and os.path.exists(mapping_path):
+            try:
+                mapping = FileManager.load_yaml(mapping_path) or {}
+            except Exception as e:
+                print(f"Error loading node mapping {mapping_path}, deriving topology from node names: {str(e)}")
+        if not isinstance(mapping, dict):
+            mapping = {}
+
+        nodes = {}
+        for node_name in node_names:
+            info = mapping.get(node_name) or {}
+            ip = str(info.get('ip') or _address_from_name(node_name)).strip()
+            group = info.get('group')
+            nodes[node_name] = NodeTopology(
+                name=node_name,
+                ip=ip,
+                group=str(group) if group is not None else _subnet(ip, subnet_prefix),
+                nics=tuple(info.get('ibdev') or default_nics)
+            )
+        return cls(nodes)
+
+    @classmethod
+    def from_env(cls, node_names: Iterable[str]) -> 'ClusterTopology':
+        return cls.load(
+            node_names,
+            mapping_path=os.environ.get('NODE_MAPPING_PATH'),
+            default_nics=[nic for nic in os.environ.get('IB_DEV_LIST', '').split(',') if nic],
+            subnet_prefix=int(os.environ.get('TOPOLOGY_SUBNET_PREFIX', DEFAULT_SUBNET_PREFIX))
+        )
+
+    def group_key(self, node_name: str):
+        node = self.nodes.get(node_name)
+        return node.group_key if node is not None else (None, ())
+
+    def select(self, candidates: List[str], count: int, near: Iterable[str] = ()) -> List[str]:
+        """
+        Pick count of the candidate nodes, as tightly connected as possible.
+
+        The candidates come in preference order (e.g. best fit first) and
+        keep that order within a group. The job goes to a single group when
+        one can hold it, preferring the groups of the near nodes, then the
+        group with the fewest candidates, leaving larger groups for larger
+        jobs. Otherwise it spans the fewest groups, largest first.
+
+        Returns:
+            List[str]: Up to count node names, fewer only if there are fewer
+            candidates
+        """
+        if count <= 0:
+            return []
+
+        groups: Dict[tuple, List[str]] = {}
+        for node_name in candidates:
+            groups.setdefault(self.group_key(node_name), []).append(node_name)
+        near_keys = {self.group_key(node_name) for node_name in near}
+
+        # A single node is as connected as it gets anywhere, keep the candidate order
+        if len(groups) <= 1 or (count == 1 and not near_keys & groups.keys()):
+            return candidates[:count]
+
+        # Ties go to the group whose first candidate comes first
+        positions = {node_name: index for index, node_name in enumerate(candidates)}
+        first_index = {key: positions[members[0]] for key, members in groups.items()}
+
+        fitting = [key for key, members in groups.items() if len(members) >= count]
+        if fitting:
+            best = min(fitting, key=lambda key: (key not in near_keys, len(groups[key]), first_index[key]))
+            return groups[best][:count]
+
+        selected = []
+        for key in sorted(groups, key=lambda key: (key not in near_keys, -len(groups[key]), first_index[key])):
+            selected.extend(groups[key][:count - len(selected)])
+            if len(selected) == count:
+                break
+        print(f"No single node group can hold {count} nodes, spanning groups: "
+              f"{sorted({str(self.group_key(node_name)[0]) for node_name in selected})}")
+        return selected
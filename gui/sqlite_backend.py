@@ -0,0 +1,374 @@
+import json
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from storage_backend import StorageBackend, TRANSACT_WRITE_MAX_ITEMS
+
+
+# Attributes indexed on every table, in addition to the declared GSIs
+INDEXED_ATTRIBUTES = ('job_id', 'created_at', 'job_status')
+SCAN_PAGE_SIZE = 1000
+
+_ATTRIBUTE_RE = re.compile(r'^[A-Za-z0-9_.\-]+$')
+_COMPARISON_RE = re.compile(r'^\s*([A-Za-z0-9_.\-]+)\s*(=|<>|<=|>=|<|>)\s*(:[A-Za-z0-9_]+)\s*$')
+_BEGINS_WITH_RE = re.compile(r'^\s*begins_with\s*\(\s*([A-Za-z0-9_.\-]+)\s*,\s*(:[A-Za-z0-9_]+)\s*\)\s*$', re.IGNORECASE)
+_AND_RE = re.compile(r'\s+AND\s+', re.IGNORECASE)
+_SET_RE = re.compile(r'^\s*SET\s+(.+)$', re.IGNORECASE | re.DOTALL)
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _attr_sql(attribute_name: str) -> str:
+    # Literal JSON path so the expression matches the expression indexes
+    if not _ATTRIBUTE_RE.match(attribute_name):
+        raise ValueError(f"Unsupported attribute name: {attribute_name}")
+    return f"json_extract(item, '$.\"{attribute_name}\"')"
+
+
+def _parse_conditions(expression: Optional[str],
+                      expression_values: Optional[Dict[str, Any]]) -> Tuple[List[str], List[Any], List[str]]:
+    """
+    Translates 'a = :x AND begins_with(b, :y)' into SQL clauses and parameters.
+    Also returns the attribute names in order of appearance.
+    """
+    if not expression:
+        return [], [], []
+
+    clauses, params, attributes = [], [], []
+    for term in _AND_RE.split(expression.strip()):
+        match = _COMPARISON_RE.match(term)
+        if match:
+            attribute_name, operator, placeholder = match.groups()
+            clauses.append(f"{_attr_sql(attribute_name)} {operator} ?")
+            params.append(_json_value(expression_values[placeholder]))
+            attributes.append(attribute_name)
+            continue
+
+        match = _BEGINS_WITH_RE.match(term)
+        if match:
+            attribute_name, placeholder = match.groups()
+            clauses.append(f"substr({_attr_sql(attribute_name)}, 1, ?) = ?")
+            prefix = _json_value(expression_values[placeholder])
+            params.extend([len(prefix), prefix])
+            attributes.append(attribute_name)
+            continue
+
+        raise ValueError(f"Unsupported condition for SQLite backend: {term}")
+
+    return clauses, params, attributes
+
+
+def _parse_set_expression(update_expression: str,
+                          expression_values: Dict[str, Any]) -> Dict[str, Any]:
+    match = _SET_RE.match(update_expression)
+    if not match:
+        raise ValueError(f"Unsupported update expression for SQLite backend: {update_expression}")
+
+    assignments = {}
+    for assignment in match.group(1).split(','):
+        attribute_name, _, placeholder = assignment.partition('=')
+        attribute_name, placeholder = attribute_name.strip(), placeholder.strip()
+        if not _ATTRIBUTE_RE.match(attribute_name) or placeholder not in expression_values:
+            raise ValueError(f"Unsupported SET assignment for SQLite backend: {assignment}")
+        assignments[attribute_name] = expression_values[placeholder]
+    return assignments
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return _json_default(value)
+    return value
+
+
+def _load_item(item_json: str, projection: Optional[List[str]]) -> Dict[str, Any]:
+    item = json.loads(item_json)
+    if projection:
+        return {name: item[name] for name in projection if name in item}
+    return item
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded storage backend on a local SQLite file.
+
+    Each logical table is a SQLite table of (pk, item JSON). The database
+    runs in WAL mode with one connection per thread, so readers never block
+    on the writer. Expression indexes cover job_id, created_at, job_status
+    and every declared GSI, and Query on a GSI becomes an indexed
+    ORDER BY ... LIMIT. Meant for single-site deployments and for running
+    or load-testing the console without AWS.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._in_memory = db_path == ':memory:'
+        self._local = threading.local()
+        self._memory_lock = threading.RLock()
+        self._memory_conn = None
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._tables_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS _console_tables "
+                "(name TEXT PRIMARY KEY, primary_key TEXT NOT NULL, indexes TEXT NOT NULL)"
+            )
+
+    def _new_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                               check_same_thread=not self._in_memory)
+        if not self._in_memory:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if self._in_memory:
+            # An in-memory database lives in a single connection, serialize access
+            with self._memory_lock:
+                if self._memory_conn is None:
+                    self._memory_conn = self._new_connection()
+                yield self._memory_conn
+            return
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._new_connection()
+        yield conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _table_meta(self, table_name: str) -> Optional[Dict[str, Any]]:
+        meta = self._tables.get(table_name)
+        if meta is not None:
+            return meta
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT primary_key, indexes FROM _console_tables WHERE name = ?", (table_name,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        meta = {'primary_key': row[0], 'indexes': json.loads(row[1])}
+        with self._tables_lock:
+            self._tables[table_name] = meta
+        return meta
+
+    def _require_table(self, table_name: str) -> Dict[str, Any]:
+        meta = self._table_meta(table_name)
+        if meta is None:
+            raise KeyError(f"Table {table_name} does not exist")
+        return meta
+
+    def create_table_if_not_exists(self, table_name: str, primary_key: str,
+                                   global_secondary_indexes: Optional[Dict[str, Tuple[str, str]]] = None,
+                                   billing_mode: Optional[str] = None) -> bool:
+        try:
+            existing = self._table_meta(table_name)
+            indexes = dict(existing['indexes']) if existing else {}
+            indexes.update({name: list(keys) for name, keys in (global_secondary_indexes or {}).items()})
+            primary_key = existing['primary_key'] if existing else primary_key
+
+            with self._transaction() as conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table_name)} "
+                             "(pk TEXT PRIMARY KEY, item TEXT NOT NULL)")
+                for attribute_name in INDEXED_ATTRIBUTES:
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(table_name + '__' + attribute_name)} "
+                                 f"ON {_quote(table_name)} ({_attr_sql(attribute_name)})")
+                for index_name, (hash_key, range_key) in indexes.items():
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(table_name + '__' + index_name)} "
+                                 f"ON {_quote(table_name)} ({_attr_sql(hash_key)}, {_attr_sql(range_key)})")
+                conn.execute("INSERT OR REPLACE INTO _console_tables (name, primary_key, indexes) VALUES (?, ?, ?)",
+                             (table_name, primary_key, json.dumps(indexes)))
+
+            with self._tables_lock:
+                self._tables[table_name] = {'primary_key': primary_key, 'indexes': indexes}
+            print(f"Table {table_name} ready in {self.db_path}")
+            return True
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error creating table: {e}")
+            return False
+
+    def _upsert(self, conn: sqlite3.Connection, table_name: str, item: Dict[str, Any]) -> None:
+        meta = self._require_table(table_name)
+        conn.execute(f"INSERT OR REPLACE INTO {_quote(table_name)} (pk, item) VALUES (?, ?)",
+                     (str(item[meta['primary_key']]), json.dumps(item, default=_json_default)))
+
+    def write_item(self, table_name: str, item: Dict[str, Any]) -> bool:
+        try:
+            with self._transaction() as conn:
+                self._upsert(conn, table_name, item)
+            return True
+        except (sqlite3.Error, KeyError, TypeError) as e:
+            print(f"Error writing to table: {e}")
+            return False
+
+    def batch_write_items(self, items_by_table: Dict[str, List[Dict[str, Any]]],
+                          max_retries: int = 8) -> bool:
+        # A local transaction has no unprocessed items, write everything at once
+        return self._write_all(items_by_table, "Error batch writing to tables")
+
+    def transact_write_items(self, items_by_table: Dict[str, List[Dict[str, Any]]]) -> bool:
+        total_items = sum(len(items) for items in items_by_table.values())
+        if total_items > TRANSACT_WRITE_MAX_ITEMS:
+            print(f"Error transact writing: {total_items} items exceed limit of {TRANSACT_WRITE_MAX_ITEMS}")
+            return False
+        return self._write_all(items_by_table, "Error transact writing to tables")
+
+    def _write_all(self, items_by_table: Dict[str, List[Dict[str, Any]]], error_prefix: str) -> bool:
+        try:
+            with self._transaction() as conn:
+                for table_name, items in items_by_table.items():
+                    for item in items:
+                        self._upsert(conn, table_name, item)
+            return True
+        except (sqlite3.Error, KeyError, TypeError) as e:
+            print(f"{error_prefix}: {e}")
+            return False
+
+    def get_item(self, table_name: str, key: Dict[str, str],
+                 projection: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        try:
+            meta = self._require_table(table_name)
+            with self._connect() as conn:
+                row = conn.execute(f"SELECT item FROM {_quote(table_name)} WHERE pk = ?",
+                                   (str(key[meta['primary_key']]),)).fetchone()
+            return _load_item(row[0], projection) if row else None
+        except (sqlite3.Error, KeyError) as e:
+            print(f"Error retrieving item: {e}")
+            return None
+
+    def delete_item(self, table_name: str, key: Dict[str, str]) -> bool:
+        try:
+            meta = self._require_table(table_name)
+            with self._transaction() as conn:
+                conn.execute(f"DELETE FROM {_quote(table_name)} WHERE pk = ?",
+                             (str(key[meta['primary_key']]),))
+            return True
+        except (sqlite3.Error, KeyError) as e:
+            print(f"Error deleting item: {e}")
+            return False
+
+    def update_item(self, table_name: str, key: Dict[str, str],
+                    update_expression: str,
+                    expression_values: Dict[str, Any]) -> bool:
+        try:
+            assignments = _parse_set_expression(update_expression, expression_values)
+            meta = self._require_table(table_name)
+            pk = str(key[meta['primary_key']])
+
+            with self._transaction() as conn:
+                row = conn.execute(f"SELECT item FROM {_quote(table_name)} WHERE pk = ?", (pk,)).fetchone()
+                # Like DynamoDB, updating a missing key creates the item
+                item = json.loads(row[0]) if row else dict(key)
+                item.update(assignments)
+                self._upsert(conn, table_name, item)
+            return True
+        except (sqlite3.Error, KeyError, ValueError, TypeError) as e:
+            print(f"Error updating item: {e}")
+            return False
+
+    def iter_scan_pages(self, table_name: str, filter_expression: Optional[str] = None,
+                        expression_values: Optional[Dict[str, Any]] = None,
+                        page_size: Optional[int] = None,
+                        segment: Optional[int] = None,
+                        total_segments: Optional[int] = None,
+                        projection: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        try:
+            self._require_table(table_name)
+            clauses, params = [], []
+            if filter_expression and expression_values:
+                clauses, params, _ = _parse_conditions(filter_expression, expression_values)
+            if total_segments:
+                clauses.append("rowid % ? = ?")
+                params.extend([total_segments, segment])
+        except (KeyError, ValueError) as e:
+            print(f"Error scanning table: {e}")
+            raise
+
+        page_size = page_size or SCAN_PAGE_SIZE
+        last_pk = ''
+        while True:
+            where = ' AND '.join(['pk > ?'] + clauses)
+            try:
+                with self._connect() as conn:
+                    rows = conn.execute(
+                        f"SELECT pk, item FROM {_quote(table_name)} WHERE {where} ORDER BY pk LIMIT ?",
+                        [last_pk] + params + [page_size]
+                    ).fetchall()
+            except sqlite3.Error as e:
+                print(f"Error scanning table: {e}")
+                raise
+
+            if rows:
+                yield [_load_item(item, projection) for _, item in rows]
+            if len(rows) < page_size:
+                return
+            last_pk = rows[-1][0]
+
+    def query(self, table_name: str, key_condition_expression: str,
+              expression_values: Dict[str, Any],
+              index_name: Optional[str] = None,
+              scan_index_forward: bool = True,
+              limit: Optional[int] = None,
+              projection: Optional[List[str]] = None) -> Optional[List[Dict[str, Any]]]:
+        try:
+            meta = self._require_table(table_name)
+            if index_name:
+                if index_name not in meta['indexes']:
+                    raise KeyError(f"Index {index_name} does not exist on table {table_name}")
+                sort_key = meta['indexes'][index_name][1]
+            else:
+                sort_key = meta['primary_key']
+
+            clauses, params, _ = _parse_conditions(key_condition_expression, expression_values)
+            sql = (f"SELECT item FROM {_quote(table_name)} WHERE {' AND '.join(clauses)} "
+                   f"ORDER BY {_attr_sql(sort_key)} {'ASC' if scan_index_forward else 'DESC'}")
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
+
+            with self._connect() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            return [_load_item(row[0], projection) for row in rows]
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            print(f"Error querying table: {e}")
+            return None
+
+    def delete_table(self, table_name: str) -> bool:
+        try:
+            with self._transaction() as conn:
+                conn.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+                conn.execute("DELETE FROM _console_tables WHERE name = ?", (table_name,))
+            with self._tables_lock:
+                self._tables.pop(table_name, None)
+            print(f"Deleting table {table_name}...")
+            return True
+        except sqlite3.Error as e:
+            print(f"Error deleting table: {e}")
+            return False
@@ -0,0 +1,115 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+
+# Service limits for BatchWriteItem and TransactWriteItems
+BATCH_WRITE_MAX_ITEMS = 25
+TRANSACT_WRITE_MAX_ITEMS = 100
+
+
+class StorageBackend(ABC):
+    """
+    Interface of the item stores behind DynamoDBHandler.
+
+    Items are plain dictionaries keyed by a single string primary key.
+    Expressions follow DynamoDB syntax; backends other than DynamoDB
+    support the subset used by the console (SET updates and AND-ed
+    comparisons in filter and key conditions).
+    Reads accept a projection, a list of top-level attribute names to return.
+    Read errors return None, write errors return False. A failing scan
+    raises instead, as stopping early would pass a partial table off as
+    the whole one.
+    """
+
+    @abstractmethod
+    def create_table_if_not_exists(self, table_name: str, primary_key: str,
+                                   global_secondary_indexes: Optional[Dict[str, Tuple[str, str]]] = None,
+                                   billing_mode: Optional[str] = None) -> bool:
+        ...
+
+    @abstractmethod
+    def write_item(self, table_name: str, item: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def batch_write_items(self, items_by_table: Dict[str, List[Dict[str, Any]]],
+                          max_retries: int = 8) -> bool:
+        ...
+
+    @abstractmethod
+    def transact_write_items(self, items_by_table: Dict[str, List[Dict[str, Any]]]) -> bool:
+        ...
+
+    @abstractmethod
+    def get_item(self, table_name: str, key: Dict[str, str],
+                 projection: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete_item(self, table_name: str, key: Dict[str, str]) -> bool:
+        ...
+
+    @abstractmethod
+    def update_item(self, table_name: str, key: Dict[str, str],
+                    update_expression: str,
+                    expression_values: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def iter_scan_pages(self, table_name: str, filter_expression: Optional[str] = None,
+                        expression_values: Optional[Dict[str, Any]] = None,
+                        page_size: Optional[int] = None,
+                        segment: Optional[int] = None,
+                        total_segments: Optional[int] = None,
+                        projection: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    def query(self, table_name: str, key_condition_expression: str,
+              expression_values: Dict[str, Any],
+              index_name: Optional[str] = None,
+              scan_index_forward: bool = True,
+              limit: Optional[int] = None,
+              projection: Optional[List[str]] = None) -> Optional[List[Dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    def delete_table(self, table_name: str) -> bool:
+        ...
+
+
+_backend_lock = threading.Lock()
+_backend: Optional[StorageBackend] = None
+
+
+def get_storage_backend() -> StorageBackend:
+    """
+    Returns the process-wide storage backend selected by STORAGE_BACKEND:
+    'dynamodb' (default) or 'sqlite' (file at SQLITE_DB_PATH).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_storage_backend(os.environ.get('STORAGE_BACKEND', 'dynamodb'))
+    return _backend
+
+
+def set_storage_backend(backend: Optional[StorageBackend]) -> None:
+    """Replaces the process-wide backend, None re-reads STORAGE_BACKEND on next use."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _create_storage_backend(backend_name: str) -> StorageBackend:
+    backend_name = backend_name.lower()
+    if backend_name == 'dynamodb':
+        from dynamodb_backend import DynamoDBBackend
+        return DynamoDBBackend()
+    if backend_name == 'sqlite':
+        from sqlite_backend import SQLiteBackend
+        return SQLiteBackend(os.environ.get('SQLITE_DB_PATH', 'hybrid_gpu_console.db'))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend_name}")
@@ -1,26 +1,34 @@
 from typing import Dict, Any, List
-import os
-import subprocess
+import contextvars
+import copy
+import hashlib
 import json
+import os
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from botocore.exceptions import ClientError
+
+from aws_client_pool import AWSClientPool
 from file_manager import FileManager
 from ddb_handler import DynamoDBHandler
 from node_manager import NodeManager
+from launch_tracer import launch_span
 
 from datetime import datetime
 
 
 
-def _run_aws_cli(cmd):
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        check=True  # This will raise CalledProcessError if the command fails
-    )
-    
-    # Parse the JSON output
-    response = json.loads(result.stdout)
+def _ecs_call(operation, **kwargs):
+    """
+    Call an ECS API on the pooled boto3 client.
+    The response has the same shape as the JSON output of the matching
+    `aws ecs` command; ClientError is raised if the call fails.
+    """
+    response = getattr(AWSClientPool.get_client('ecs'), operation)(**kwargs)
+    response.pop('ResponseMetadata', None)
     return response
 
 
@@ -31,6 +39,93 @@ def _get_arn_id(arn):
 LAUNCH_TYPE = 'EC2' # EC2 EXTERNAL
 # LAUNCH_TYPE = 'EXTERNAL' # EC2 EXTERNAL
 
+# ECS limits: run-task --count and start-task --container-instances take at most 10
+RUN_TASK_MAX_COUNT = 10
+START_TASK_MAX_INSTANCES = 10
+# ECS limit of tasks per describe-tasks call
+DESCRIBE_TASKS_MAX = 100
+DEFAULT_LAUNCH_WORKERS = 8
+# Seconds to wait for stopped tasks to report STOPPED, and between polls
+STOP_WAIT_TIMEOUT = 120
+STOP_WAIT_POLL_INTERVAL = 2
+
+
+def _get_launch_workers():
+    return max(1, int(os.environ.get('ECS_LAUNCH_WORKERS', DEFAULT_LAUNCH_WORKERS)))
+
+
+# Container fields that vary per job and travel as containerOverrides
+# when ECS_STABLE_TASK_DEFS is enabled
+OVERRIDE_CONTAINER_FIELDS = ('command', 'environment')
+STABLE_TASK_DEF_HASH_LENGTH = 12
+
+_stable_task_def_arns: Dict[str, str] = {}
+_stable_task_def_lock = threading.Lock()
+
+
+def stable_task_defs_enabled():
+    return os.environ.get('ECS_STABLE_TASK_DEFS', 'false').lower() == 'true'
+
+
+def _overrides_cli_args(overrides):
+    if not overrides:
+        return []
+    return ['--overrides', shlex.quote(json.dumps(overrides, separators=(',', ':')))]
+
+
+def task_def_gpus(task_def):
+    """GPUs one task of the definition needs, summed over its containers"""
+    return sum(
+        int(requirement['value'])
+        for container in task_def.get('containerDefinitions', [])
+        for requirement in container.get('resourceRequirements', [])
+        if requirement.get('type') == 'GPU'
+    )
+
+
+def task_def_host_ports(task_def):
+    """Host ports one task of the definition binds; with host networking hostPort defaults to containerPort"""
+    return sorted({
+        int(mapping.get('hostPort') or mapping['containerPort'])
+        for container in task_def.get('containerDefinitions', [])
+        for mapping in container.get('portMappings', [])
+        if mapping.get('hostPort') or mapping.get('containerPort')
+    })
+
+
+def task_stop_status(task):
+    """'NO_TASK', 'RUNNING', 'FAIL' or 'SUCCESS' of a describe-tasks entry (None if not found)"""
+    if task is None:
+        return "NO_TASK"
+
+    # First check if the task is actually stopped
+    if task.get('lastStatus') != 'STOPPED':
+        return "RUNNING"
+
+    # Check containers for exit codes
+    for container in task.get('containers', []):
+        exit_code = container.get('exitCode')
+        if exit_code is None or exit_code != 0:
+            return 'FAIL'
+
+    return 'SUCCESS'
+
+
+def _task_is_running(task):
+    # Task is running if both lastStatus and desiredStatus are "RUNNING"
+    return task is not None and task.get('lastStatus') == 'RUNNING' and task.get('desiredStatus') == 'RUNNING'
+
+
+def _launched_tasks(exec_result):
+    """(task_id, cluster_name, container_inst_id) of every task in a run/start-task response"""
+    for failure in exec_result.get('failures', []):
+        print(f"Task launch failure on {failure.get('arn', 'N/A')}: {failure.get('reason')} {failure.get('detail', '')}")
+
+    return [
+        (_get_arn_id(task['taskArn']), _get_arn_id(task['clusterArn']), _get_arn_id(task['containerInstanceArn']))
+        for task in exec_result.get('tasks', [])
+    ]
+
 
 class TaskManager:
     def __init__(self):
@@ -50,6 +145,11 @@ class TaskManager:
         return self.healthcheck_container_def.copy()
 
 
+    @staticmethod
+    def create_task_table_if_not_exists() -> bool:
+        return DynamoDBHandler.create_table_if_not_exists(os.environ['TASK_MANAGE_TABLE'], 'ecs_task_id')
+
+
     @staticmethod
     def task_register(task_def_path):
         reg_task_cmd = [
@@ -59,7 +159,7 @@ class TaskManager:
         ]
         
         print(reg_task_cmd)
-        reg_result = _run_aws_cli(reg_task_cmd)
+        reg_result = _ecs_call('register_task_definition', **FileManager.load_json(task_def_path))
         print(reg_result)
 
         return reg_result['taskDefinition']['taskDefinitionArn'], reg_task_cmd
@@ -77,7 +177,11 @@ class TaskManager:
         ]
 
         print(exec_task_cmd)
-        exec_result = _run_aws_cli(exec_task_cmd)
+        exec_result = _ecs_call('run_task',
+                                cluster=os.environ['CLUSTER_NAME'],
+                                taskDefinition=task_def_arn,
+                                count=1,
+                                launchType=LAUNCH_TYPE)
         print(exec_result)
         
         task_id = _get_arn_id(exec_result['tasks'][0]['taskArn'])
@@ -99,7 +203,10 @@ class TaskManager:
         ]
 
         print(exec_task_cmd)
-        exec_result = _run_aws_cli(exec_task_cmd)
+        exec_result = _ecs_call('start_task',
+                                cluster=os.environ['CLUSTER_NAME'],
+                                taskDefinition=task_def_arn,
+                                containerInstances=[container_inst_id])
         print(exec_result)
         
         task_id = _get_arn_id(exec_result['tasks'][0]['taskArn'])
@@ -110,6 +217,243 @@ class TaskManager:
         return task_id, cluster_name, container_inst_id, exec_result, exec_task_cmd
 
 
+    @staticmethod
+    def split_task_def_overrides(task_def):
+        """
+        Split a task definition into a stable template and per-job overrides.
+        The command and environment of each container are moved out of the
+        template into containerOverrides; the family gets a suffix with the
+        content hash of what is left, so identical templates map to one family.
+        Port mappings can't be overridden and stay part of the template.
+
+        Returns:
+            Tuple: (template task definition, overrides for run-task/start-task)
+        """
+        template = copy.deepcopy(task_def)
+        container_overrides = []
+        for container_def in template['containerDefinitions']:
+            container_override = {'name': container_def['name']}
+            for field in OVERRIDE_CONTAINER_FIELDS:
+                if field in container_def:
+                    container_override[field] = container_def.pop(field)
+            container_overrides.append(container_override)
+
+        content = json.dumps(template, sort_keys=True, separators=(',', ':'))
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()[:STABLE_TASK_DEF_HASH_LENGTH]
+        template['family'] = f"{template['family']}-{content_hash}"
+
+        return template, {'containerOverrides': container_overrides}
+
+
+    @staticmethod
+    def resolve_stable_task_def(task_def_path):
+        """
+        Find or register the stable task definition for the template in
+        task_def_path, see split_task_def_overrides. A family already known
+        to this process costs no API call, otherwise describe-task-definition
+        looks it up and it is registered only if it does not exist yet.
+
+        Returns:
+            Tuple: (task_def_arn, overrides, equivalent CLI commands, task definition response)
+        """
+        template, overrides = TaskManager.split_task_def_overrides(FileManager.load_json(task_def_path))
+        family = template['family']
+
+        with _stable_task_def_lock:
+            task_def_arn = _stable_task_def_arns.get(family)
+        if task_def_arn:
+            return task_def_arn, overrides, [], {'taskDefinition': {'taskDefinitionArn': task_def_arn, 'family': family}}
+
+        describe_cmd = [
+            'aws', 'ecs', 'describe-task-definition',
+            '--task-definition', family,
+            '--output', 'json'
+        ]
+        try:
+            reg_result = _ecs_call('describe_task_definition', taskDefinition=family)
+            commands = [describe_cmd]
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('ClientException', 'InvalidParameterException'):
+                raise
+            # Family does not exist yet: register the template once
+            template_path = os.path.splitext(task_def_path)[0] + '_stable.json'
+            FileManager.save_json(template_path, template)
+            reg_task_cmd = [
+                'aws', 'ecs', 'register-task-definition',
+                '--cli-input-json', f'file://{template_path}',
+                '--output', 'json'
+            ]
+            print(reg_task_cmd)
+            reg_result = _ecs_call('register_task_definition', **template)
+            commands = [reg_task_cmd]
+
+        task_def_arn = reg_result['taskDefinition']['taskDefinitionArn']
+        with _stable_task_def_lock:
+            _stable_task_def_arns[family] = task_def_arn
+        print(f"Using stable task definition {task_def_arn}")
+
+        return task_def_arn, overrides, commands, reg_result
+
+
+    @staticmethod
+    def task_exec_batch(task_def_arn, count, overrides=None):
+        """
+        Launch up to RUN_TASK_MAX_COUNT tasks with a single run-task call.
+
+        Returns:
+            Tuple: (launched tasks as (task_id, cluster_name, container_inst_id)
+                ordered by container instance, exec_result, exec_task_cmd)
+        """
+        exec_task_cmd = [
+            'aws', 'ecs', 'run-task',
+            '--cluster', os.environ['CLUSTER_NAME'],
+            '--task-definition', task_def_arn,
+            '--count', str(count),
+            '--launch-type', LAUNCH_TYPE,
+            *_overrides_cli_args(overrides),
+            '--output', 'json'
+        ]
+
+        print(exec_task_cmd)
+        with launch_span('ecs.run_task'):
+            exec_result = _ecs_call('run_task',
+                                    cluster=os.environ['CLUSTER_NAME'],
+                                    taskDefinition=task_def_arn,
+                                    count=count,
+                                    launchType=LAUNCH_TYPE,
+                                    **({'overrides': overrides} if overrides else {}))
+
+        launched = sorted(_launched_tasks(exec_result), key=lambda task: (task[2], task[0]))
+        return launched, exec_result, exec_task_cmd
+
+
+    @staticmethod
+    def task_start_batch(task_def_arn, container_inst_ids, overrides=None):
+        """
+        Start one task on each of up to START_TASK_MAX_INSTANCES container
+        instances with a single start-task call.
+
+        Returns:
+            Tuple: (launched tasks as (task_id, cluster_name, container_inst_id)
+                in the order of container_inst_ids, exec_result, exec_task_cmd)
+        """
+        exec_task_cmd = [
+            'aws', 'ecs', 'start-task',
+            '--cluster', os.environ['CLUSTER_NAME'],
+            '--task-definition', task_def_arn,
+            '--container-instances', *container_inst_ids,
+            *_overrides_cli_args(overrides),
+            '--output', 'json'
+        ]
+
+        print(exec_task_cmd)
+        with launch_span('ecs.start_task'):
+            exec_result = _ecs_call('start_task',
+                                    cluster=os.environ['CLUSTER_NAME'],
+                                    taskDefinition=task_def_arn,
+                                    containerInstances=list(container_inst_ids),
+                                    **({'overrides': overrides} if overrides else {}))
+
+        position = {inst_id: i for i, inst_id in enumerate(container_inst_ids)}
+        launched = sorted(_launched_tasks(exec_result),
+                          key=lambda task: (position.get(task[2], len(position)), task[0]))
+        return launched, exec_result, exec_task_cmd
+
+
+    @staticmethod
+    def launch_tasks(task_def_arn, num_nodes, container_instance_ids=None, overrides=None):
+        """
+        Launch num_nodes tasks concurrently.
+        Without container_instance_ids, run-task calls of up to 10 tasks each
+        are placed by ECS; otherwise start-task calls of up to 10 instances
+        each pin one task per given instance. Calls fan out over a pool of
+        ECS_LAUNCH_WORKERS threads. overrides, if given, apply to every task.
+
+        Returns:
+            Tuple: (launched tasks as (task_id, cluster_name, container_inst_id)
+                in call order, then instance order, launch commands in call order).
+                Fewer than num_nodes tasks are returned if ECS reported failures.
+
+        Raises:
+            RuntimeError: If any launch call raised; the tasks the other calls
+                started are stopped first, so nothing is left running
+        """
+        if container_instance_ids is None:
+            counts = [min(RUN_TASK_MAX_COUNT, num_nodes - start)
+                      for start in range(0, num_nodes, RUN_TASK_MAX_COUNT)]
+            calls = [(TaskManager.task_exec_batch, count) for count in counts]
+        else:
+            inst_ids = list(container_instance_ids[:num_nodes])
+            calls = [(TaskManager.task_start_batch, inst_ids[start:start + START_TASK_MAX_INSTANCES])
+                     for start in range(0, len(inst_ids), START_TASK_MAX_INSTANCES)]
+
+        if not calls:
+            return [], []
+
+        with ThreadPoolExecutor(max_workers=min(_get_launch_workers(), len(calls)),
+                                thread_name_prefix='ecs-launch') as executor:
+            # Copy the context so batch spans land in the caller's launch trace
+            futures = [executor.submit(contextvars.copy_context().run, launch, task_def_arn, arg, overrides)
+                       for launch, arg in calls]
+
+        launched = []
+        commands = []
+        errors = []
+        for future in futures:
+            try:
+                tasks, exec_result, exec_task_cmd = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            launched.extend(tasks)
+            commands.append(exec_task_cmd)
+
+        if errors:
+            launched_ids = [task[0] for task in launched]
+            # The caller never sees these tasks, do not leave them holding instances
+            stop_errors = TaskManager.stop_tasks_bulk(launched_ids, reason='Launch of the job failed')
+            not_stopped = [task_id for task_id, error in stop_errors.items() if error is not None]
+            raise RuntimeError(f"{len(errors)} of {len(calls)} launch calls failed "
+                               f"(stopped launched tasks: {launched_ids}, failed to stop: {not_stopped}): "
+                               f"{errors[0]}")
+
+        return launched, commands
+
+
+    @staticmethod
+    def build_task_item(task_id,
+                        node_name_orchestrated,
+                        node_index,
+                        job_id,
+                        job_timestamp,
+                        nnodes,
+                        task_def_arn,
+                        cluster_name,
+                        container_inst_id,
+                           ):
+        return {
+                'ecs_task_id': task_id,
+                'node_name': node_name_orchestrated,
+                'node_index_in_job': node_index, #Decimal(rank),
+                'job_id': job_id,
+                'job_timestamp': job_timestamp,
+                'job_num_nodes': nnodes, #Decimal(nnodes),
+                'task_def_arn': task_def_arn,
+                'task_def_name': task_def_arn.split(':')[0],
+                'task_def_revision': task_def_arn.split(':')[-1],
+                'cluster_name': cluster_name,
+                'container_inst_id': container_inst_id,
+                # 'retry': 0,
+                # 'task_status': 'IN_PROGRESS',
+                'updated_at': datetime.now().isoformat(),
+                'created_at': datetime.now().isoformat(),
+                # 'metadata': _convert_floats_to_decimal({
+                #     'task_reg_result': reg_result,
+                #     'task_exec_result': exec_result
+                # })
+            }
+
+
     @staticmethod
     def record_task_to_ddb(task_id,
                         node_name_orchestrated,
@@ -125,32 +469,97 @@ class TaskManager:
         task_ddb_table_name = os.environ.get('TASK_MANAGE_TABLE')
 
         resp = DynamoDBHandler.write_item(table_name = task_ddb_table_name,
-                                    item = {
-                                    'ecs_task_id': task_id,
-                                    'node_name': node_name_orchestrated,
-                                    'node_index_in_job': node_index, #Decimal(rank),
-                                    'job_id': job_id,
-                                    'job_timestamp': job_timestamp,
-                                    'job_num_nodes': nnodes, #Decimal(nnodes),
-                                    'task_def_arn': task_def_arn,
-                                    'task_def_name': task_def_arn.split(':')[0],
-                                    'task_def_revision': task_def_arn.split(':')[-1],
-                                    'cluster_name': cluster_name,
-                                    'container_inst_id': container_inst_id,
-                                    # 'retry': 0,
-                                    # 'task_status': 'IN_PROGRESS',
-                                    'updated_at': datetime.now().isoformat(),
-                                    'created_at': datetime.now().isoformat(),
-                                    # 'metadata': _convert_floats_to_decimal({
-                                    #     'task_reg_result': reg_result,
-                                    #     'task_exec_result': exec_result
-                                    # })
-                                }
+                                    item = TaskManager.build_task_item(
+                                        task_id, node_name_orchestrated, node_index, job_id, job_timestamp,
+                                        nnodes, task_def_arn, cluster_name, container_inst_id
+                                    )
                             )
         
         print('record task resp: ', resp)
 
 
+    @staticmethod
+    def place_and_start_tasks(task_def_arn, num_nodes, gpus_per_task, overrides=None, lease=None, host_ports=()):
+        """
+        Start num_nodes tasks with start-task on container instances chosen
+        from NodeManager's free-GPU view, skipping instances that already
+        bind any of host_ports, or on the instances of lease. Instances ECS
+        rejects are replaced by the next free instances right away (swapped
+        within the lease when given). The view is refreshed once if it does
+        not hold enough free instances.
+
+        Returns:
+            Tuple: (launched tasks as (task_id, cluster_name, container_inst_id),
+                launch commands), like launch_tasks. Fewer than num_nodes tasks
+                are returned only if free instances ran out after rejections.
+
+        Raises:
+            RuntimeError: If the cluster does not have num_nodes free instances
+                to begin with, in which case nothing is launched, or if a
+                launch call raised, in which case the launched tasks are stopped
+        """
+        node_manager = NodeManager()
+        launched = []
+        commands = []
+        rejected = set()
+        refreshed = False
+        leased_inst_ids = list(lease.container_inst_ids[:num_nodes]) if lease is not None else None
+
+        while len(launched) < num_nodes:
+            needed = num_nodes - len(launched)
+            if lease is not None:
+                inst_ids = leased_inst_ids
+            else:
+                inst_ids = node_manager.claim_free_instances(needed, gpus_per_task, exclude=rejected,
+                                                             near=[task[2] for task in launched],
+                                                             host_ports=host_ports)
+
+            if lease is None and len(inst_ids) < needed and not launched:
+                node_manager.release_claimed_instances(inst_ids, gpus_per_task, host_ports)
+                if not refreshed:
+                    # The cached view may be stale, check ECS once before giving up
+                    node_manager.refresh_all_node_status(force=True)
+                    refreshed = True
+                    continue
+                raise RuntimeError(f"Only {len(inst_ids)} of {num_nodes} container instances "
+                                   f"have {gpus_per_task} free GPUs and free host ports {list(host_ports)}")
+            if not inst_ids:
+                print(f"No free instances left after rejections {sorted(rejected)}, "
+                      f"launched {len(launched)} of {num_nodes} tasks")
+                break
+
+            try:
+                batch, batch_commands = TaskManager.launch_tasks(task_def_arn, len(inst_ids), inst_ids, overrides)
+            except Exception:
+                # launch_tasks stopped its own tasks, stop those of earlier rounds too
+                TaskManager.stop_tasks_bulk([task[0] for task in launched], reason='Launch of the job failed')
+                raise
+            started_inst_ids = {task[2] for task in batch}
+            batch_rejected = [inst_id for inst_id in inst_ids if inst_id not in started_inst_ids]
+            rejected.update(batch_rejected)
+            if lease is not None:
+                leased_inst_ids = node_manager.replace_lease_instances(lease, batch_rejected) if batch_rejected else []
+            else:
+                for inst_id in batch_rejected:
+                    node_manager.mark_instance_full(inst_id)
+            launched.extend(batch)
+            commands.extend(batch_commands)
+
+        return launched, commands
+
+
+    @staticmethod
+    def record_tasks_to_ddb(task_items):
+        """Write all task items of a job with batched BatchWriteItem calls"""
+        if not task_items:
+            return True
+
+        with launch_span('ddb.record_tasks'):
+            resp = DynamoDBHandler.batch_write_items({os.environ.get('TASK_MANAGE_TABLE'): task_items})
+        print(f'record {len(task_items)} tasks resp: ', resp)
+        return resp
+
+
     @staticmethod
     def register_task_and_run_all(
                       job_id,
@@ -158,8 +567,22 @@ class TaskManager:
                       num_nodes,
                       task_def_path,
                       exec_history_save_dir,
-                      container_instance_ids = None
+                      container_instance_ids = None,
+                      record_tasks = True,
+                      lease = None
                     ):
+        """
+        Register the task definition and launch one task per node, with the
+        launch calls issued concurrently by launch_tasks. Without
+        container_instance_ids the instances are chosen by
+        place_and_start_tasks, from the instances of lease (a NodeLease)
+        when one is given. With
+        ECS_STABLE_TASK_DEFS=true the stable definition of the template is
+        reused and the per-job command is sent as overrides instead.
+        Task records are batch-written at the end when record_tasks is True,
+        otherwise the caller persists the returned task items, e.g. together
+        with the job record in JobManager.gather_task_and_record_job.
+        """
         
         node_manager = NodeManager()
 
@@ -167,20 +590,33 @@ class TaskManager:
         container_inst_ids = []
         ecs_task_ids = []
         orch_node_names = []
+        task_items = []
 
-        task_def_arn, reg_task_cmd = TaskManager.task_register(task_def_path)
-        all_commands.append(reg_task_cmd)
+        overrides = None
+        with launch_span('ecs.register_task_definition'):
+            if stable_task_defs_enabled():
+                task_def_arn, overrides, reg_task_cmds, _ = TaskManager.resolve_stable_task_def(task_def_path)
+                all_commands.extend(reg_task_cmds)
+            else:
+                task_def_arn, reg_task_cmd = TaskManager.task_register(task_def_path)
+                all_commands.append(reg_task_cmd)
 
-        for nodei in range(num_nodes):
+        with launch_span('ecs.launch_tasks'):
             if container_instance_ids is None:
-                task_id, cluster_name, container_inst_id, exec_result, exec_task_cmd = TaskManager.task_exec(task_def_arn)
+                task_def = FileManager.load_json(task_def_path)
+                launched, exec_task_cmds = TaskManager.place_and_start_tasks(task_def_arn, num_nodes,
+                                                                             task_def_gpus(task_def), overrides, lease,
+                                                                             task_def_host_ports(task_def))
             else:
-                task_id, cluster_name, container_inst_id, exec_result, exec_task_cmd = TaskManager.task_start(task_def_arn, container_instance_ids[nodei])
+                launched, exec_task_cmds = TaskManager.launch_tasks(task_def_arn, num_nodes, container_instance_ids, overrides)
+        all_commands.extend(exec_task_cmds)
 
-            node_name_orchestrated = node_manager.fetch_node_name(container_inst_id)
+        for task_id, cluster_name, container_inst_id in launched:
+            with launch_span('node_name.fetch'):
+                node_name_orchestrated = node_manager.fetch_node_name(container_inst_id)
             print(f"Training task {task_id} launched for node {node_name_orchestrated}")
 
-            TaskManager.record_task_to_ddb(
+            task_items.append(TaskManager.build_task_item(
                 task_id = task_id,
                 node_name_orchestrated = node_name_orchestrated,
                 node_index = -1,
@@ -190,29 +626,37 @@ class TaskManager:
                 task_def_arn = task_def_arn,
                 cluster_name = cluster_name,
                 container_inst_id = container_inst_id,
-            )
+            ))
 
-            all_commands.append(exec_task_cmd)
             container_inst_ids.append(container_inst_id)
             ecs_task_ids.append(task_id)
             orch_node_names.append(node_name_orchestrated)
 
-        history_file = FileManager.create_execution_history(exec_history_save_dir, all_commands)
+        if record_tasks:
+            TaskManager.record_tasks_to_ddb(task_items)
+
+        with launch_span('history.write'):
+            history_file = FileManager.create_execution_history(exec_history_save_dir, all_commands)
         print('history_file', history_file)
 
-        return ecs_task_ids, orch_node_names, container_inst_ids, history_file
+        return ecs_task_ids, orch_node_names, container_inst_ids, history_file, task_items
 
 
     @staticmethod
     def task_register_and_exec(task_def_path):
 
-        reg_task_cmd = [
-            'aws', 'ecs', 'register-task-definition',
-            '--cli-input-json', f'file://{task_def_path}',
-            '--output', 'json'
-        ]
-        
-        reg_result = _run_aws_cli(reg_task_cmd)
+        overrides = None
+        if stable_task_defs_enabled():
+            _, overrides, reg_task_cmds, reg_result = TaskManager.resolve_stable_task_def(task_def_path)
+            reg_task_cmd = reg_task_cmds[0] if reg_task_cmds else []
+        else:
+            reg_task_cmd = [
+                'aws', 'ecs', 'register-task-definition',
+                '--cli-input-json', f'file://{task_def_path}',
+                '--output', 'json'
+            ]
+
+            reg_result = _ecs_call('register_task_definition', **FileManager.load_json(task_def_path))
         # reg_result = {'taskDefinition': {'taskDefinitionArn': 'arn:aws-cn:ecs:cn-northwest-1:455385591292:task-definition/TrainingTask:453', 'containerDefinitions': [{'name': 'TrainingContainer', 'image': '455385591292.dkr.ecr.cn-northwest-1.amazonaws.com.cn/hybridgpu-training-torch260:latest', 'cpu': 0, 'portMappings': [{'containerPort': 10086, 'hostPort': 10086, 'protocol': 'tcp'}], 'essential': True, 'entryPoint': ['/bin/sh'], 'command': ['/workspace/training_output_20250222-073224/training-node002.sh'], 'environment': [], 'mountPoints': [{'sourceVolume': 'mylustre', 'containerPath': '/workspace', 'readOnly': False}, {'sourceVolume': 'mylustremodel', 'containerPath': '/modeldatas', 'readOnly': False}, {'sourceVolume': 'mylustredata', 'containerPath': '/datafiles', 'readOnly': False}, {'sourceVolume': 'instancelocaldata', 'containerPath': '/localdata', 'readOnly': False}], 'volumesFrom': [], 'linuxParameters': {'devices': [{'hostPath': '/dev/infiniband', 'containerPath': '/dev/infiniband', 'permissions': ['read', 'write']}], 'sharedMemorySize': 16384}, 'privileged': True, 'ulimits': [{'name': 'memlock', 'softLimit': -1, 'hardLimit': -1}], 'logConfiguration': {'logDriver': 'awslogs', 'options': {'awslogs-group': '/ecs/ECSHybridGpuTraining', 'mode': 'non-blocking', 'awslogs-create-group': 'true', 'max-buffer-size': '25m', 'awslogs-region': 'cn-northwest-1', 'awslogs-stream-prefix': 'ecs'}, 'secretOptions': []}, 'systemControls': [], 'resourceRequirements': [{'value': '8', 'type': 'GPU'}]}], 'family': 'TrainingTask', 'taskRoleArn': 'arn:aws-cn:iam::455385591292:role/ecsanywhereTaskRole', 'executionRoleArn': 'arn:aws-cn:iam::455385591292:role/ecsanywhereTaskExecutionRole', 'networkMode': 'host', 'revision': 453, 'volumes': [{'name': 'mylustre', 'host': {'sourcePath': '/fsx/hzworkspace/ecs-gpu-console-v2'}}, {'name': 'mylustremodel', 'host': {'sourcePath': '/fsx/hzworkspace/modeldatas'}}, {'name': 'mylustredata', 'host': {'sourcePath': '/fsx/hzworkspace/datafiles'}}, {'name': 'instancelocaldata', 'host': {'sourcePath': '/home/node-user/local-data-test'}}], 'status': 'ACTIVE', 'requiresAttributes': [{'name': 'ecs.capability.execution-role-awslogs'}, {'name': 'com.amazonaws.ecs.capability.task-iam-role-network-host'}, {'name': 'com.amazonaws.ecs.capability.ecr-auth'}, {'name': 'com.amazonaws.ecs.capability.privileged-container'}, {'name': 'com.amazonaws.ecs.capability.docker-remote-api.1.17'}, {'name': 'com.amazonaws.ecs.capability.docker-remote-api.1.28'}, {'name': 'com.amazonaws.ecs.capability.task-iam-role'}, {'name': 'com.amazonaws.ecs.capability.docker-remote-api.1.22'}, {'name': 'ecs.capability.execution-role-ecr-pull'}, {'name': 'com.amazonaws.ecs.capability.docker-remote-api.1.18'}, {'name': 'com.amazonaws.ecs.capability.docker-remote-api.1.29'}, {'name': 'com.amazonaws.ecs.capability.logging-driver.awslogs'}, {'name': 'com.amazonaws.ecs.capability.docker-remote-api.1.19'}, {'name': 'ecs.capability.pid-ipc-namespace-sharing'}], 'placementConstraints': [{'type': 'memberOf', 'expression': 'attribute:node==node002'}], 'compatibilities': ['EXTERNAL', 'EC2'], 'runtimePlatform': {'cpuArchitecture': 'X86_64', 'operatingSystemFamily': 'LINUX'}, 'requiresCompatibilities': ['EXTERNAL'], 'memory': '1843200', 'ipcMode': 'host', 'registeredAt': 1740236698.253, 'registeredBy': 'arn:aws-cn:iam::455385591292:user/zhenghao'}}
 
         exec_task_cmd = [
@@ -221,10 +665,18 @@ class TaskManager:
             '--task-definition', reg_result['taskDefinition']['taskDefinitionArn'],
             '--count', '1',
             '--launch-type', LAUNCH_TYPE,
+            *_overrides_cli_args(overrides),
             '--output', 'json'
         ]
 
-        exec_result = _run_aws_cli(exec_task_cmd)
+        exec_result = _ecs_call('run_task',
+                                cluster=os.environ['CLUSTER_NAME'],
+                                taskDefinition=reg_result['taskDefinition']['taskDefinitionArn'],
+                                count=1,
+                                launchType=LAUNCH_TYPE,
+                                **({'overrides': overrides} if overrides else {}))
+        if not exec_result.get('tasks'):
+            raise RuntimeError(f"run-task placed no task: {exec_result.get('failures')}")
         # exec_result = {'tasks': [{'attachments': [], 'attributes': [{'name': 'ecs.cpu-architecture', 'value': 'x86_64'}], 'clusterArn': 'arn:aws-cn:ecs:cn-northwest-1:455385591292:cluster/nwcd-gpu-testing', 'containerInstanceArn': 'arn:aws-cn:ecs:cn-northwest-1:455385591292:container-instance/nwcd-gpu-testing/2c0cf09946f8409b94f0494dc059bd39', 'containers': [{'containerArn': 'arn:aws-cn:ecs:cn-northwest-1:455385591292:container/nwcd-gpu-testing/595b16b4d57f4efc8bf65692164b2c71/5180808f-49cf-469b-872c-454b853fb736', 'taskArn': 'arn:aws-cn:ecs:cn-northwest-1:455385591292:task/nwcd-gpu-testing/595b16b4d57f4efc8bf65692164b2c71', 'name': 'TrainingContainer', 'image': '455385591292.dkr.ecr.cn-northwest-1.amazonaws.com.cn/hybridgpu:training', 'lastStatus': 'PENDING', 'networkInterfaces': [], 'cpu': '0', 'gpuIds': ['GPU-01d4f7d4-1ec5-2a06-c2d0-20a6dd73f53a', 'GPU-32eba458-d805-fa5e-2394-83ffbee5ecef', 'GPU-3a76ac8a-8175-09e2-50ec-6fea87363da2', 'GPU-3d686c9d-4e09-6cc8-3ed6-e5c200ae8366', 'GPU-7780ccd7-d529-ab9e-176e-39abd92b551b', 'GPU-b79120c4-b809-2edb-9d9a-8f3c77b707c0', 'GPU-c2547f54-68ff-a581-8669-e3fd61cd9dee', 'GPU-cb9055ed-c530-853a-027e-53256bd3e32a']}], 'cpu': '0', 'createdAt': 174072, 'desiredStatus': 'RUNNING', 'enableExecuteCommand': False, 'group': 'family:TrainingTask', 'lastStatus': 'PENDING', 'launchType': 'EXTERNAL', 'memory': '1843200', 'overrides': {'containerOverrides': [{'name': 'TrainingContainer'}], 'inferenceAcceleratorOverrides': []}, 'tags': [], 'taskArn': 'arn:aws-cn:ecs:cn-northwest-1:455385591292:task/nwcd-gpu-testing/595b16b4d57f4efc8bf65692164b2c71', 'taskDefinitionArn': 'arn:aws-cn:ecs:cn-northwest-1:455385591292:task-definition/TrainingTask:411', 'version': 1}], 'failures': []}
 
         print(exec_result)
@@ -239,18 +691,167 @@ class TaskManager:
 
     @staticmethod
     def stop_ecs_task(task_id):
-
-        stop_task_cmd = [
-            'aws', 'ecs', 'stop-task',
-            '--cluster', os.environ['CLUSTER_NAME'],
-            '--task', task_id,
-            '--output', 'json'
-        ]
-        exec_result = _run_aws_cli(stop_task_cmd)
+        exec_result = _ecs_call('stop_task',
+                                cluster=os.environ['CLUSTER_NAME'],
+                                task=task_id)
 
         return exec_result
 
 
+    @staticmethod
+    def stop_tasks_bulk(task_ids, reason=None):
+        """
+        Stop many ECS tasks with concurrent stop-task calls over a pool of
+        ECS_LAUNCH_WORKERS threads.
+
+        Args:
+            task_ids (List[str]): IDs of the tasks to stop
+            reason (str): Optional stop reason shown in the ECS console
+
+        Returns:
+            Dict[str, Optional[str]]: task_id -> None if the stop was accepted,
+            otherwise the error message
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            return {}
+
+        def _stop(task_id):
+            _ecs_call('stop_task',
+                      cluster=os.environ['CLUSTER_NAME'],
+                      task=task_id,
+                      **({'reason': reason} if reason else {}))
+
+        with ThreadPoolExecutor(max_workers=min(_get_launch_workers(), len(task_ids)),
+                                thread_name_prefix='ecs-stop') as executor:
+            futures = {task_id: executor.submit(_stop, task_id) for task_id in task_ids}
+
+        errors = {}
+        for task_id, future in futures.items():
+            try:
+                future.result()
+                errors[task_id] = None
+            except Exception as e:
+                print(f"Error stopping task {task_id}: {str(e)}")
+                errors[task_id] = str(e)
+        return errors
+
+
+    @staticmethod
+    def wait_tasks_stopped(task_ids, timeout=STOP_WAIT_TIMEOUT, poll_interval=STOP_WAIT_POLL_INTERVAL):
+        """
+        Poll describe-tasks in bulk until every task reports STOPPED, or is
+        unknown to ECS, or the timeout passes.
+
+        Returns:
+            Dict[str, Optional[str]]: task_id -> last known lastStatus, None if
+            ECS does not know the task or it was never described
+        """
+        pending = list(dict.fromkeys(task_ids))
+        last_statuses = {task_id: None for task_id in pending}
+        deadline = time.time() + timeout
+        while pending:
+            described = TaskManager.describe_tasks_bulk(pending)
+            for task_id, task in described.items():
+                last_statuses[task_id] = task.get('lastStatus') if task else None
+            pending = [task_id for task_id in pending
+                       if task_id not in described
+                       or last_statuses[task_id] not in (None, 'STOPPED')]
+            if not pending or time.time() >= deadline:
+                break
+            time.sleep(poll_interval)
+        return last_statuses
+
+
+    @staticmethod
+    def list_cluster_task_ids(desired_status='RUNNING'):
+        """
+        IDs of the cluster's tasks with the given desired status, following
+        nextToken across list-tasks pages.
+        """
+        task_ids = []
+        list_kwargs = {'cluster': os.environ['CLUSTER_NAME'], 'desiredStatus': desired_status}
+        while True:
+            result = _ecs_call('list_tasks', **list_kwargs)
+            task_ids.extend(_get_arn_id(task_arn) for task_arn in result.get('taskArns', []))
+            if not result.get('nextToken'):
+                return task_ids
+            list_kwargs['nextToken'] = result['nextToken']
+
+
+    @staticmethod
+    def describe_tasks_bulk(task_ids):
+        """
+        Describe many ECS tasks with describe-tasks calls of up to 100 tasks,
+        issued concurrently when there is more than one chunk.
+        
+        Args:
+            task_ids (List[str]): IDs of the tasks to describe
+            
+        Returns:
+            Dict[str, Optional[Dict]]: task_id -> describe-tasks entry, or None if
+            ECS does not know the task. Tasks of a chunk whose call failed are left
+            out, so callers can tell "unknown this round" from "not found".
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        chunks = [task_ids[start:start + DESCRIBE_TASKS_MAX]
+                  for start in range(0, len(task_ids), DESCRIBE_TASKS_MAX)]
+        if not chunks:
+            return {}
+
+        def _describe_chunk(chunk):
+            result = _ecs_call('describe_tasks',
+                               cluster=os.environ['CLUSTER_NAME'],
+                               tasks=chunk)
+            described = {task_id: None for task_id in chunk}
+            for task in result.get('tasks', []):
+                described[_get_arn_id(task['taskArn'])] = task
+            return described
+
+        statuses = {}
+        if len(chunks) == 1:
+            try:
+                statuses.update(_describe_chunk(chunks[0]))
+            except Exception as e:
+                print(f"Error describing tasks: {e}")
+            return statuses
+
+        with ThreadPoolExecutor(max_workers=min(_get_launch_workers(), len(chunks)),
+                                thread_name_prefix='ecs-describe') as executor:
+            futures = [executor.submit(_describe_chunk, chunk) for chunk in chunks]
+
+        for future in futures:
+            try:
+                statuses.update(future.result())
+            except Exception as e:
+                print(f"Error describing tasks: {e}")
+
+        return statuses
+
+
+    @staticmethod
+    def get_running_tasks(task_ids):
+        """
+        Returns:
+            Dict[str, bool]: task_id -> True if the task is running; tasks that
+            could not be described count as not running
+        """
+        described = TaskManager.describe_tasks_bulk(task_ids)
+        return {task_id: _task_is_running(described.get(task_id)) for task_id in task_ids}
+
+
+    @staticmethod
+    def check_tasks_stop_status(task_ids):
+        """
+        Returns:
+            Dict[str, str]: task_id -> 'NO_TASK', 'RUNNING', 'FAIL' or 'SUCCESS'
+            (see check_task_stop_status); tasks that could not be described this
+            time are left out
+        """
+        described = TaskManager.describe_tasks_bulk(task_ids)
+        return {task_id: task_stop_status(task) for task_id, task in described.items()}
+
+
     @staticmethod
     def is_task_running(task_id):
         """
@@ -262,30 +863,7 @@ class TaskManager:
         Returns:
             bool: True if the task is running, False otherwise (stopped, crashed, etc.)
         """
-        describe_task_cmd = [
-            'aws', 'ecs', 'describe-tasks',
-            '--cluster', os.environ['CLUSTER_NAME'],
-            '--tasks', task_id,
-            '--output', 'json'
-        ]
-        
-        try:
-            result = _run_aws_cli(describe_task_cmd)
-            
-            # Check if we got task information back
-            if not result.get('tasks'):
-                return False
-                
-            task = result['tasks'][0]
-            last_status = task.get('lastStatus')
-            desired_status = task.get('desiredStatus')
-            
-            # Task is running if both lastStatus and desiredStatus are "RUNNING"
-            return last_status == 'RUNNING' and desired_status == 'RUNNING'
-            
-        except Exception as e:
-            print(f"Error checking task status: {e}")
-            return False
+        return TaskManager.get_running_tasks([task_id])[task_id]
 
 
     @staticmethod
@@ -296,38 +874,10 @@ class TaskManager:
         Args:
             task_id (str): The ID of the task to check
             
+        Returns:
+            str: 'NO_TASK', 'RUNNING', 'FAIL' or 'SUCCESS', False if the check failed
         """
-        describe_task_cmd = [
-            'aws', 'ecs', 'describe-tasks',
-            '--cluster', os.environ['CLUSTER_NAME'],
-            '--tasks', task_id,
-            '--output', 'json'
-        ]
-        
-        try:
-            result = _run_aws_cli(describe_task_cmd)
-            
-            # Check if we got task information back
-            if not result.get('tasks'):
-                print(f"While check task stop status, task {task_id} not found")
-                return "NO_TASK"
-                
-            task = result['tasks'][0]
-            last_status = task.get('lastStatus')
-            
-            # First check if the task is actually stopped
-            if last_status != 'STOPPED':
-                return "RUNNING"
-                
-            # Check containers for exit codes
-            containers = task.get('containers', [])
-            for container in containers:
-                exit_code = container.get('exitCode')
-                if exit_code is None or exit_code != 0:
-                    return 'FAIL'
-
-            return 'SUCCESS'
-            
-        except Exception as e:
-            print(f"Error checking task status: {e}")
-            return False
+        status = TaskManager.check_tasks_stop_status([task_id]).get(task_id, False)
+        if status == "NO_TASK":
+            print(f"While check task stop status, task {task_id} not found")
+        return status
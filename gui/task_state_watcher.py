@@ -0,0 +1,229 @@
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from node_manager import singleton
+from task_manager import TaskManager, task_stop_status
+
+
+DEFAULT_WATCH_INTERVAL = 10
+DEFAULT_CALLBACK_WORKERS = 4
+
+# Stop statuses after which a task no longer changes
+TERMINAL_STATUSES = ('SUCCESS', 'FAIL')
+
+
+@dataclass(frozen=True)
+class TaskState:
+    task_id: str
+    # 'RUNNING', 'SUCCESS', 'FAIL' or 'NO_TASK', see task_manager.task_stop_status
+    status: str
+    last_status: Optional[str] = None
+    desired_status: Optional[str] = None
+    container_inst_id: Optional[str] = None
+    updated_at: float = field(default_factory=time.time)
+
+
+class _Waiter:
+    def __init__(self, task_ids: List[str], fail_fast: bool, deadline: Optional[float]):
+        self.task_ids = task_ids
+        self.fail_fast = fail_fast
+        self.deadline = deadline
+        self.future = Future()
+
+
+@singleton
+class TaskStateWatcher:
+    """
+    Cluster-wide ECS task state poller.
+
+    A single daemon thread lists the cluster's running tasks and describes
+    them, together with every task a subscriber watches, in batched
+    describe-tasks calls once per TASK_WATCH_INTERVAL seconds. The result is
+    kept in an in-memory task-state table, so the ECS cost per interval
+    depends on the number of tasks, not on the number of jobs waiting on them.
+
+    Subscribers get callbacks on status transitions (subscribe) or a Future
+    resolved when a set of tasks has stopped (when_all_stopped). Callbacks and
+    future continuations run on a small worker pool, never on the poller.
+    """
+
+    def __init__(self):
+        self.interval = float(os.environ.get('TASK_WATCH_INTERVAL', DEFAULT_WATCH_INTERVAL))
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, TaskState] = {}
+        self._watch_counts = Counter()
+        self._subscribers: Dict[int, tuple] = {}
+        self._waiters: List[_Waiter] = []
+        self._next_subscription_id = 0
+        self._version = 0
+
+        self._callback_executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('TASK_WATCH_CALLBACK_WORKERS', DEFAULT_CALLBACK_WORKERS)),
+            thread_name_prefix='task-watch-callback'
+        )
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='task-state-watcher', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                # Keep watching, the next interval retries
+                print(f"Error polling task states: {str(e)}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def poll_once(self) -> None:
+        """List and describe the cluster's tasks once, then notify subscribers."""
+        try:
+            listed = set(TaskManager.list_cluster_task_ids())
+        except Exception as e:
+            print(f"Error listing cluster tasks: {str(e)}")
+            listed = set()
+
+        with self._lock:
+            watched = set(self._watch_counts)
+
+        described = TaskManager.describe_tasks_bulk(sorted(listed | watched))
+
+        now = time.time()
+        transitions = []
+        with self._lock:
+            for task_id, task in described.items():
+                state = TaskState(
+                    task_id=task_id,
+                    status=task_stop_status(task),
+                    last_status=task.get('lastStatus') if task else None,
+                    desired_status=task.get('desiredStatus') if task else None,
+                    container_inst_id=task.get('containerInstanceArn', '').split('/')[-1] if task else None,
+                    updated_at=now
+                )
+                previous = self._tasks.get(task_id)
+                self._tasks[task_id] = state
+                if previous is None or previous.status != state.status:
+                    transitions.append((previous, state))
+
+            # Forget stopped tasks nobody is watching any more
+            for task_id in list(self._tasks):
+                if task_id not in listed and task_id not in self._watch_counts:
+                    del self._tasks[task_id]
+
+            self._version += 1
+            subscribers = list(self._subscribers.values())
+
+        for previous, state in transitions:
+            for task_ids, callback in subscribers:
+                if task_ids is None or state.task_id in task_ids:
+                    self._callback_executor.submit(self._safe_callback, callback, previous, state)
+
+        self._check_waiters(now)
+
+    @staticmethod
+    def _safe_callback(callback, previous, state) -> None:
+        try:
+            callback(previous, state)
+        except Exception as e:
+            print(f"Error in task state callback for {state.task_id}: {str(e)}")
+
+    def _check_waiters(self, now: float) -> None:
+        done = []
+        with self._lock:
+            for waiter in self._waiters:
+                statuses = {task_id: self._tasks[task_id].status
+                            for task_id in waiter.task_ids if task_id in self._tasks}
+
+                failed = any(status == 'FAIL' for status in statuses.values())
+                finished = len(statuses) == len(waiter.task_ids) and all(
+                    status in TERMINAL_STATUSES for status in statuses.values()
+                )
+                if finished or (failed and waiter.fail_fast):
+                    done.append((waiter, statuses, None))
+                elif waiter.deadline is not None and now >= waiter.deadline:
+                    done.append((waiter, statuses, TimeoutError(
+                        f"Tasks still not stopped after timeout: {statuses}"
+                    )))
+
+            for waiter, _, _ in done:
+                self._waiters.remove(waiter)
+                self._watch_counts.subtract(waiter.task_ids)
+                self._watch_counts += Counter()  # drop zero counts
+
+        for waiter, statuses, error in done:
+            # Resolve off the poller thread, done callbacks may launch jobs
+            if error is None:
+                self._callback_executor.submit(waiter.future.set_result, statuses)
+            else:
+                self._callback_executor.submit(waiter.future.set_exception, error)
+
+    def subscribe(self, callback: Callable[[Optional[TaskState], TaskState], None],
+                  task_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Call callback(previous_state, new_state) whenever a task's status changes.
+
+        Args:
+            callback: Called on a worker thread; previous_state is None for
+                a task seen for the first time
+            task_ids: Tasks to watch, None for every task listed in the cluster
+
+        Returns:
+            int: Subscription ID for unsubscribe
+        """
+        task_ids = set(task_ids) if task_ids is not None else None
+        with self._lock:
+            subscription_id = self._next_subscription_id
+            self._next_subscription_id += 1
+            self._subscribers[subscription_id] = (task_ids, callback)
+            if task_ids:
+                self._watch_counts.update(task_ids)
+        self.start()
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        with self._lock:
+            task_ids, _ = self._subscribers.pop(subscription_id, (None, None))
+            if task_ids:
+                self._watch_counts.subtract(task_ids)
+                self._watch_counts += Counter()
+
+    def when_all_stopped(self, task_ids: Iterable[str], fail_fast: bool = True,
+                         timeout: Optional[float] = None) -> Future:
+        """
+        Future resolved with {task_id: status} once every task has stopped
+        ('SUCCESS' or 'FAIL'), or as soon as one fails when fail_fast is set.
+        Tasks not found by ECS keep being waited for until the timeout, after
+        which the future fails with TimeoutError.
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        deadline = time.time() + timeout if timeout is not None else None
+        waiter = _Waiter(task_ids, fail_fast, deadline)
+        with self._lock:
+            self._waiters.append(waiter)
+            self._watch_counts.update(task_ids)
+        self.start()
+        return waiter.future
+
+    def get_task_state(self, task_id: str) -> Optional[TaskState]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def get_snapshot(self) -> Dict[str, TaskState]:
+        """Copy of the task-state table, task_id -> TaskState."""
+        with self._lock:
+            return dict(self._tasks)
+
+    def get_version(self) -> int:
+        """Number of completed polls, changes whenever the table may have changed."""
+        with self._lock:
+            return self._version
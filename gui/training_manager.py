@@ -6,11 +6,12 @@ from typing import List, Dict, Any, Tuple, Optional
 from file_manager import FileManager
 from dist_command_generator import DistCommandGenerator
 from node_manager import NodeManager
-from task_manager import TaskManager
+from task_manager import TaskManager, task_def_gpus, task_def_host_ports
 from job_manager import JobManager
 # from job_manager import Job
 from health_manager import HealthManager
 from ddb_handler import DynamoDBHandler
+from launch_tracer import launch_span
 
 import boto3
 from datetime import datetime
@@ -22,6 +23,17 @@ import json
 import boto3
 
 
+def job_port_mappings(port_mappings, master_port):
+    """
+    Port mappings of a job's training container: the k-th mapping of the
+    template binds master_port + k. Tasks use host networking, so a fixed
+    host port (e.g. 2022 of the template) would keep any two jobs off the
+    same node; derived ones only clash when the jobs' port ranges overlap.
+    """
+    return [dict(mapping, containerPort=int(master_port) + k, hostPort=int(master_port) + k)
+            for k, mapping in enumerate(port_mappings)]
+
+
 def _convert_floats_to_decimal(obj):
     if isinstance(obj, float):
         return Decimal(str(obj))  # Convert float to string first for precision
@@ -71,23 +83,48 @@ class TrainingManager:
         return master_node_name
 
 
+    def training_gpus_per_node(self, gpus_per_node=None):
+        """GPUs each training task requests: gpus_per_node, or the training container definition's"""
+        if gpus_per_node:
+            return int(gpus_per_node)
+        return task_def_gpus({'containerDefinitions': [self.task_manager.get_training_container_def()]})
+
+
+    def launch_host_ports(self, master_port, health_check=False):
+        """
+        Host ports a job's tasks bind on each of its nodes: those derived from
+        master_port for the training container (see job_port_mappings), plus
+        the health check's with precheck.
+        """
+        training_container_def = self.task_manager.get_training_container_def()
+        port_mappings = job_port_mappings(training_container_def.get('portMappings', []), master_port)
+        container_defs = [dict(training_container_def, portMappings=port_mappings)]
+        if health_check:
+            container_defs.append(self.task_manager.get_healthcheck_container_def())
+        return task_def_host_ports({'containerDefinitions': container_defs})
+
+
     def generate_nodes_script(self, 
                               num_nodes, 
                               master_port, 
                               user_script_path, 
                               exec_history_save_dir,
                             #   ui_task_config
-                            is_health_check
+                            is_health_check,
+                            gpus_per_node=None
                               ):
         
         # print('Assigned node name: ', node_name)
+        gpus_per_node = self.training_gpus_per_node(gpus_per_node)
         
-        script_content = self.command_generator.generate_dist_wrapper_script(num_nodes, 
-                                                                             master_port,
-                                                                             user_script_path,
-                                                                             exec_history_save_dir,
-                                                                             is_health_check
-                                                                             )
+        with launch_span('script.generate'):
+            script_content = self.command_generator.generate_dist_wrapper_script(num_nodes, 
+                                                                                 master_port,
+                                                                                 user_script_path,
+                                                                                 exec_history_save_dir,
+                                                                                 is_health_check,
+                                                                                 gpus_per_node
+                                                                                 )
 
 
 
@@ -96,16 +133,19 @@ class TrainingManager:
         # script_path = os.path.join(output_dir, f"training-{node_name}.sh")
         wrap_script_path = os.path.join(exec_history_save_dir, f"training-rdzv.sh")
         
-        FileManager.write_script(wrap_script_path, script_content)
+        with launch_span('script.write'):
+            FileManager.write_script(wrap_script_path, script_content)
 
-        node_task_def_path = self.construct_node_task_def(None, -99, master_port, wrap_script_path, None, exec_history_save_dir)
+        with launch_span('task_def.write'):
+            node_task_def_path = self.construct_node_task_def(None, -99, master_port, wrap_script_path, None,
+                                                              exec_history_save_dir, gpus_per_node)
 
         return node_task_def_path
 
     
 
 
-    def construct_node_task_def(self, node_name: str, node_index: int, master_port: int, train_script_path: str, task_config: Dict[str, str], output_dir: str):
+    def construct_node_task_def(self, node_name: str, node_index: int, master_port: int, train_script_path: str, task_config: Dict[str, str], output_dir: str, gpus_per_node: int = None):
         
         ecs_task_def = self.task_manager.get_ecs_task_def()
         # ecs_task_def['family'] = task_config['family']
@@ -115,10 +155,16 @@ class TrainingManager:
 
         training_container_def = self.task_manager.get_training_container_def()
         # training_container_def['image'] = task_config['image']
-        training_container_def['portMappings'][0]['containerPort'] = int(master_port)
-        training_container_def['portMappings'][0]['hostPort'] = int(master_port)
+        training_container_def['portMappings'] = job_port_mappings(training_container_def.get('portMappings', []),
+                                                                   master_port)
         # training_container_def['logConfiguration']['options']['awslogs-group'] = task_config['logGroup']
         training_container_def['command'] = ['/workspace/'+train_script_path]
+        if gpus_per_node:
+            # ECS pins this many GPUs to the task, so jobs can share a node
+            training_container_def['resourceRequirements'] = [
+                requirement for requirement in training_container_def.get('resourceRequirements', [])
+                if requirement.get('type') != 'GPU'
+            ] + [{'value': str(gpus_per_node), 'type': 'GPU'}]
 
 
         # if task_config['traininghealth_check']:
@@ -10,12 +10,52 @@ export USER_PASSWORD='a'
 export CLUSTER_NAME="nwcd-l4-v1"
 export JOB_MANAGE_TABLE="$CLUSTER_NAME-jobs"
 export TASK_MANAGE_TABLE="$CLUSTER_NAME-tasks"
+# Job/task storage backend: dynamodb, or sqlite for offline/single-site use
+export STORAGE_BACKEND="dynamodb"
+export SQLITE_DB_PATH="_submit_history/console.db"
+# Billing mode for tables created by the console: PAY_PER_REQUEST or PROVISIONED
+export DDB_BILLING_MODE="PAY_PER_REQUEST"
+# Commit a job row and all its task rows atomically (TransactWriteItems)
+export DDB_TRANSACTIONAL_WRITES="false"
+# Read-through cache TTLs (seconds) for job/task lookups, 0 disables
+export DDB_CACHE_TTL_JOBS=10
+export DDB_CACHE_TTL_TASKS=300
+# Coalesce job status writes per job within this window (seconds), 0 writes through
+export JOB_STATUS_COALESCE_WINDOW=0.5
+
+# Shared boto3 connection pool size (Gradio handlers + background threads)
+export AWS_MAX_POOL_CONNECTIONS=32
+
+# Concurrent ECS run-task/start-task calls per job launch
+export ECS_LAUNCH_WORKERS=8
+
+# Reuse one task definition per template content hash and send the per-job
+# command as run-task/start-task overrides instead of registering per job
+export ECS_STABLE_TASK_DEFS="false"
+
+# Seconds between cluster-wide task state polls (list-tasks + batched describe-tasks)
+export TASK_WATCH_INTERVAL=10
+
+# Max AWS calls in flight across all concurrent job submissions of the launch pipeline
+export LAUNCH_MAX_CONCURRENT_AWS_CALLS=8
+
+# Seconds a container instance status snapshot is reused by node table renders,
+# and concurrent describe-container-instances calls (100 instances each) per refresh
+export NODE_STATUS_TTL=5
+export NODE_REFRESH_WORKERS=8
+
+# Seconds between rebuilds of the node/job snapshot shared by all console sessions
+export CLUSTER_SNAPSHOT_INTERVAL=15
 
 
 export ECS_CLUSTER_CONF_PATH="HYBRID_GPU_PRE_SETTINGS"
 export ECS_TASK_DEF="$ECS_CLUSTER_CONF_PATH/ecs_task_def.json"
 export TRAINING_CONTAINER_DEF="$ECS_CLUSTER_CONF_PATH/training_container_def.json"
 export HEALTH_CONTAINER_DEF="$ECS_CLUSTER_CONF_PATH/healthcheck_container_def.json"
+# Per-node ip / ibdev / switch group used to keep multi-node jobs within one group;
+# nodes without a group label are grouped by their /TOPOLOGY_SUBNET_PREFIX subnet
+export NODE_MAPPING_PATH="$ECS_CLUSTER_CONF_PATH/node_mapping_info.yaml"
+export TOPOLOGY_SUBNET_PREFIX=24
 
 
 # export NODE_NAME_LIST="A800_node001,A800_node002,A800_node003,A800_node004"
@@ -11,6 +11,7 @@ echo "ECS_NUM_NODES: $ECS_NUM_NODES"
 # echo "ECS_NODE_RANK: $ECS_NODE_RANK"
 echo "ECS_MASTER_ADDR: $ECS_MASTER_ADDR"
 echo "ECS_MASTER_PORT: $ECS_MASTER_PORT"
+echo "ECS_GPUS_PER_NODE: $ECS_GPUS_PER_NODE"
 
 
 echo "##### Trainign data copying from FSx for lustre to each instance local storage #####"
@@ -23,7 +24,7 @@ export DEV_SLEEP_SEC=600
 
     # --rdzv-id=myjobid \
 torchrun \
-    --nproc-per-node=1 \
+    --nproc-per-node=${ECS_GPUS_PER_NODE:-1} \
     --nnodes=${ECS_NUM_NODES} \
     --rdzv-backend=c10d \
     --rdzv-endpoint=${ECS_MASTER_ADDR}:${ECS_MASTER_PORT} \
@@ -11,6 +11,7 @@ echo "ECS_NUM_NODES: $ECS_NUM_NODES"
 echo "ECS_NODE_RANK: $ECS_NODE_RANK"
 echo "ECS_MASTER_ADDR: $ECS_MASTER_ADDR"
 echo "ECS_MASTER_PORT: $ECS_MASTER_PORT"
+echo "ECS_GPUS_PER_NODE: $ECS_GPUS_PER_NODE"
 
 
 echo "##### Trainign data copying from FSx for lustre to each instance local storage #####"
@@ -27,7 +28,7 @@ export NCCL_DEBUG=ERROR
 
 # 启动训练
 torchrun \
-    --nproc_per_node 8 \
+    --nproc_per_node ${ECS_GPUS_PER_NODE:-8} \
     --nnodes ${ECS_NUM_NODES} \
     --node_rank ${ECS_NODE_RANK} \
     --master_addr "${ECS_MASTER_ADDR}" \